@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+"""
+Benchmarks de desempenho dos componentes do assistente
+
+Uso:
+    python benchmark.py            # executa todos os benchmarks
+    python benchmark.py sqlite     # executa apenas os benchmarks selecionados
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from typing import Callable, Dict
+
+def _measure(func: Callable[[], None], iterations: int) -> float:
+    """Retorna a latência média por chamada em microssegundos"""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations * 1_000_000
+
+def _report(label: str, before: float, after: float) -> None:
+    speedup = before / after if after else float('inf')
+    print(f"{label:<32} antes: {before:>9.1f} µs  depois: {after:>9.1f} µs  ({speedup:.1f}x)")
+
+def bench_sqlite(iterations: int = 500) -> None:
+    """Compara uma conexão nova por chamada com o pool persistente do DatabaseManager"""
+    from database.database import DatabaseManager
+
+    print("💾 SQLite: conexão por chamada vs. pool persistente")
+    print("-" * 50)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        db = DatabaseManager(db_path)
+
+        # Comportamento antigo: abre e fecha uma conexão por chamada
+        def legacy_save_interaction() -> None:
+            conn = sqlite3.connect(db_path)
+            conn.execute('''
+                INSERT INTO interactions (human_message, assistant_message, context)
+                VALUES (?, ?, ?)
+            ''', ("olá", "oi", ""))
+            conn.commit()
+            conn.close()
+
+        def legacy_recent_interactions() -> None:
+            conn = sqlite3.connect(db_path)
+            conn.execute('SELECT * FROM interactions ORDER BY timestamp DESC LIMIT 10').fetchall()
+            conn.close()
+
+        _report("save_interaction", _measure(legacy_save_interaction, iterations),
+                _measure(lambda: db.save_interaction("olá", "oi"), iterations))
+        _report("get_recent_interactions", _measure(legacy_recent_interactions, iterations),
+                _measure(lambda: db.get_recent_interactions(10), iterations))
+
+        db.close()
+    print()
+
+def bench_batch_insert(days: int = 365, events_per_day: int = 5) -> None:
+    """Importa um ano de eventos: um save_events por dia vs. um único save_events_batch"""
+    from database.database import DatabaseManager
+
+    print(f"📦 Importação de {days} dias x {events_per_day} eventos")
+    print("-" * 50)
+
+    payloads = [
+        {
+            'date': f"{(day % 28) + 1:02d}/{(day // 28) % 12 + 1:02d}/2024",
+            'events': [
+                {'title': f"Evento {day}-{i}", 'description': "Importado", 'category': 'outros'}
+                for i in range(events_per_day)
+            ]
+        }
+        for day in range(days)
+    ]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(os.path.join(tmp, "bench.db"))
+
+        start = time.perf_counter()
+        for payload in payloads:
+            db.save_events(payload)
+        before = (time.perf_counter() - start) / days * 1000
+
+        start = time.perf_counter()
+        db.save_events_batch(payloads)
+        after = (time.perf_counter() - start) / days * 1000
+
+        print(f"{'ms por dia':<32} antes: {before:>9.3f} ms  depois: {after:>9.3f} ms  ({before / after:.1f}x)")
+        db.close()
+    print()
+
+def bench_semantic(items: int = 20000, queries: int = 50) -> None:
+    """Busca semântica: varredura exata de todos os vetores vs. índice LSH"""
+    from database.vector_index import VectorIndex
+
+    print(f"🧭 Busca semântica em {items} itens")
+    print("-" * 50)
+
+    words = ["reunião", "consulta", "viagem", "academia", "mercado", "aniversário", "dentista",
+             "projeto", "escola", "cinema", "família", "trabalho", "médico", "orçamento"]
+    index = VectorIndex()
+    index.add_many(
+        ('event', i, f"{words[i % len(words)]} {words[(i * 7) % len(words)]} item {i}")
+        for i in range(items)
+    )
+    start = time.perf_counter()
+    index.flush()
+    print(f"{'indexação por item':<32} {(time.perf_counter() - start) / items * 1000:>9.3f} ms")
+
+    texts = [f"{words[i % len(words)]} {words[(i * 3) % len(words)]}" for i in range(queries)]
+    exact = VectorIndex(n_planes=0)
+    exact._vectors = index._vectors
+
+    def exact_search() -> None:
+        for text in texts:
+            exact.search(text, 5)
+
+    def lsh_search() -> None:
+        for text in texts:
+            index.search(text, 5)
+
+    _report("search (k=5)", _measure(exact_search, 1) / queries, _measure(lsh_search, 1) / queries)
+    print()
+
+def bench_search(rows: int = 200000, iterations: int = 20) -> None:
+    """Busca por palavra-chave: LIKE com varredura da tabela vs. índice FTS5"""
+    from database.database import DatabaseManager
+
+    print(f"🔎 Busca textual em {rows} eventos")
+    print("-" * 50)
+
+    words = ["reunião", "consulta", "viagem", "academia", "mercado", "aniversário", "dentista",
+             "projeto", "escola", "cinema", "família", "trabalho", "médico", "orçamento"]
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(os.path.join(tmp, "bench.db"))
+        db.save_events_batch([
+            {
+                'date': '01/01/2025',
+                'events': [
+                    {'title': f"{words[i % len(words)]} {i}", 'description': f"Nota {words[(i * 5) % len(words)]} {i}"}
+                    for i in range(start, min(start + 1000, rows))
+                ]
+            }
+            for start in range(0, rows, 1000)
+        ])
+        conn = db.pool.get_connection()
+
+        def legacy_search(term: str) -> None:
+            conn.execute(
+                "SELECT id FROM events WHERE title LIKE ? OR description LIKE ? ORDER BY id DESC LIMIT 20",
+                (f"%{term}%", f"%{term}%")
+            ).fetchall()
+
+        for label, term in (("termo raro", "12345"), ("termo comum", "dentista")):
+            _report(f"search ({label})", _measure(lambda: legacy_search(term), iterations),
+                    _measure(lambda: db.search(term, kinds=('event',)), iterations))
+        db.close()
+    print()
+
+def bench_audio(seconds: float = 10.0) -> None:
+    """Bytes enviados e tempo de codificação por fala para cada codec disponível"""
+    import math
+    import struct
+    from utils.audio_encoding import CODECS, SOUNDFILE_AVAILABLE, AudioEncoder
+
+    print(f"🎧 Codificação de {seconds:.0f}s de fala (44,1 kHz -> 16 kHz)")
+    print("-" * 50)
+
+    rate = 44100
+    count = int(rate * seconds)
+    audio = struct.pack(f'<{count}h', *(
+        int(6000 * math.sin(2 * math.pi * 180 * i / rate) * (0.5 + 0.5 * math.sin(2 * math.pi * 3 * i / rate)))
+        for i in range(count)
+    ))
+    chunks = [audio[i:i + 2048] for i in range(0, len(audio), 2048)]
+    print(f"{'PCM 44,1 kHz (antes)':<32} {len(audio) / 1024:>9.1f} KB")
+
+    for codec in CODECS:
+        if codec != 'wav' and not SOUNDFILE_AVAILABLE:
+            print(f"{codec:<32} (requer soundfile)")
+            continue
+        encoded = AudioEncoder(codec, 16000).encode(chunks, rate)
+        print(f"{codec + ' 16 kHz':<32} {encoded.bytes_on_wire / 1024:>9.1f} KB  "
+              f"{encoded.encode_seconds * 1000:>7.1f} ms")
+    print()
+
+def bench_tools(iterations: int = 2000) -> None:
+    """Schema da ferramenta DailyEvents: recompilado a cada requisição vs. registro em cache"""
+    from tools.daily_events import DailyEvents
+    from utils.basemodel2tool import base_model2tool
+    from utils.tool_registry import ToolRegistry
+
+    print("🧰 Schema de ferramentas")
+    print("-" * 50)
+
+    registry = ToolRegistry()
+    _report("tools=[DailyEvents]",
+            _measure(lambda: [base_model2tool(DailyEvents)], iterations),
+            _measure(lambda: registry.tools(DailyEvents), iterations))
+    print()
+
+def bench_normalize(events: int = 5000) -> None:
+    """Normalização da saída da IA: dicionários recriados por evento vs. tabelas compiladas em lote"""
+    from tools.event_normalizer import normalize_events
+
+    print(f"🧹 Normalização de {events} eventos")
+    print("-" * 50)
+
+    samples = [
+        {'título': 'Reunião', 'descrição': 'Planejamento', 'categoria': 'Reunião', 'prioridade': 'Importante'},
+        {'title': 'Consulta', 'description': 'Retorno', 'category': 'saude', 'priority': 'alta', 'time': '10:00'},
+        {'titulo': 'Viagem', 'descricao': 'Férias', 'categoria': 'travel', 'prioridade': 'normal', 'local': 'Santos'}
+    ]
+    batch = [dict(samples[i % len(samples)]) for i in range(events)]
+
+    def legacy_normalize() -> None:
+        # Como em run(): tabelas recriadas a cada evento e o dicionário limpo e refeito
+        ai_events = [dict(original) for original in batch]
+        for event in ai_events:
+            field_mapping = {
+                'título': 'title', 'titulo': 'title', 'descrição': 'description', 'descricao': 'description',
+                'categoria': 'category', 'prioridade': 'priority', 'horário': 'time', 'horario': 'time',
+                'local': 'location', 'lembrete': 'reminder'
+            }
+            corrected_event = {}
+            for key, value in event.items():
+                corrected_event[field_mapping.get(key, key)] = value
+            event.clear()
+            event.update(corrected_event)
+        for event in ai_events:
+            category_mapping = {
+                'viagem': 'lazer', 'travel': 'lazer', 'trip': 'lazer', 'reunião': 'trabalho', 'meeting': 'trabalho',
+                'consulta': 'saude', 'appointment': 'saude', 'médico': 'saude', 'doctor': 'saude',
+                'estudo': 'estudos', 'study': 'estudos', 'curso': 'estudos', 'course': 'estudos',
+                'família': 'familia', 'family': 'familia', 'pessoal': 'pessoal', 'personal': 'pessoal',
+                'financeiro': 'financeiro', 'financial': 'financeiro', 'conta': 'financeiro', 'bill': 'financeiro'
+            }
+            if 'category' in event:
+                event['category'] = category_mapping.get(event['category'].lower(), 'outros')
+            priority_mapping = {
+                'normal': 'media', 'regular': 'media', 'usual': 'media', 'importante': 'alta',
+                'important': 'alta', 'urgente': 'urgente', 'urgent': 'urgente', 'baixa': 'baixa', 'low': 'baixa'
+            }
+            if 'priority' in event:
+                event['priority'] = priority_mapping.get(event['priority'].lower(), 'media')
+
+    before = _measure(legacy_normalize, 5) / events
+    after = _measure(lambda: normalize_events(batch), 5) / events
+    _report("por evento", before, after)
+    print()
+
+def bench_identities(transcripts: int = 2000) -> None:
+    """Extração de nomes: seis re.findall por fala vs. uma alternação compilada"""
+    import re
+    from identity.name_extractor import extract_names
+
+    print(f"👥 Extração de identidades em {transcripts} transcrições")
+    print("-" * 50)
+
+    templates = [
+        "ontem encontrei {a} no mercado e depois fui para casa",
+        "meu amigo {a} disse que a reunião com {b} foi adiada para amanhã",
+        "{a} é minha irmã e {b} trabalha no hospital do centro",
+        "hoje tive almoço com {a} e conversamos sobre o projeto novo",
+        "preciso comprar pão, leite e café antes das oito",
+        "A consulta foi remarcada para sexta às dez da manhã"
+    ]
+    people = ["Maria", "João Silva", "Ana Paula", "Pedro", "Luíza", "Carlos Eduardo"]
+    corpus = [
+        templates[i % len(templates)].format(a=people[i % len(people)], b=people[(i * 5) % len(people)])
+        for i in range(transcripts)
+    ]
+    legacy_patterns = [
+        r'(?:meu|minha)\s+(?:amigo|amiga|irmão|irmã|pai|mãe|filho|filha|marido|esposa|namorado|namorada|colega|vizinho|professor|médico)\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)',
+        r'([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s+(?:é|é meu|é minha)\s+(amigo|amiga|irmão|irmã|pai|mãe|filho|filha|marido|esposa|namorado|namorada)',
+        r'([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s+(?:trabalha|estuda|mora|gosta|prefere|está|foi|vai)\s+',
+        r'(?:conheci|encontrei|falei com|visitei|chamei)\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)',
+        r'([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s+(?:disse|falou|mencionou|contou|explicou)',
+        r'(?:reunião|almoço|jantar|encontro|conversa)\s+(?:com|entre)\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)'
+    ]
+
+    def legacy_extract() -> None:
+        for text in corpus:
+            for pattern in legacy_patterns:
+                re.findall(pattern, text)
+
+    def compiled_extract() -> None:
+        for text in corpus:
+            extract_names(text)
+
+    _report("por transcrição", _measure(legacy_extract, 3) / transcripts,
+            _measure(compiled_extract, 3) / transcripts)
+    lowered = [text.lower() for text in corpus]
+    _report("por transcrição (minúsculas)",
+            _measure(lambda: [re.findall(p, t) for t in lowered for p in legacy_patterns], 3) / transcripts,
+            _measure(lambda: [extract_names(t) for t in lowered], 3) / transcripts)
+    print()
+
+def bench_reminders(events: int = 200, iterations: int = 20) -> None:
+    """Lembretes: um insert por lembrete após salvar os eventos vs. tudo na mesma transação"""
+    from datetime import datetime, timedelta
+    from database.database import DatabaseManager
+    from notifications.reminder_parser import parse_reminder, reminder_datetime
+
+    print(f"🔔 Lembretes de {events} eventos")
+    print("-" * 50)
+
+    texts = ["30 minutos antes", "1h", "2 horas antes", "1 dia antes", "15 minutes before",
+             "na véspera às 20:00", "at 6pm", "uma hora e meia antes"]
+    event_at = datetime(2099, 3, 14, 10, 0)
+
+    # Comportamento antigo: procura quatro substrings fixas a cada chamada
+    def legacy_parse(text: str) -> datetime:
+        text = text.lower().strip()
+        if "30min" in text or "30 minutos" in text:
+            return event_at - timedelta(minutes=30)
+        if "1h" in text or "1 hora" in text:
+            return event_at - timedelta(hours=1)
+        if "2h" in text or "2 horas" in text:
+            return event_at - timedelta(hours=2)
+        if "1 dia" in text or "1d" in text:
+            return event_at - timedelta(days=1)
+        return event_at - timedelta(hours=1)
+
+    _report("parse (legado, 4 formatos)", _measure(lambda: [legacy_parse(t) for t in texts], 2000) / len(texts),
+            _measure(lambda: [reminder_datetime(t, event_at) for t in texts], 2000) / len(texts))
+    parse_reminder.cache_clear()
+    _report("parse (sem cache vs. com cache)",
+            _measure(lambda: [parse_reminder.__wrapped__(t) for t in texts], 2000) / len(texts),
+            _measure(lambda: [parse_reminder(t) for t in texts], 2000) / len(texts))
+
+    payload = {'date': '14/03/2099', 'events': [
+        {'title': f'Evento {i}', 'description': '', 'time': '10:00', 'reminder': texts[i % len(texts)]}
+        for i in range(events)
+    ]}
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(os.path.join(tmp, "bench.db"))
+
+        # Antes: eventos salvos e depois um INSERT (e commit) por lembrete
+        def per_reminder() -> None:
+            ids = db.insert_events(payload)
+            for event_id, event in zip(ids, payload['events']):
+                with db.pool.transaction() as conn:
+                    conn.execute('INSERT INTO reminders (event_id, reminder_time, message, is_sent) VALUES (?, ?, ?, 0)',
+                                 (event_id, str(reminder_datetime(event['reminder'], event_at)), event['reminder']))
+
+        _report(f"{events} eventos com lembrete", _measure(per_reminder, iterations),
+                _measure(lambda: db.save_events_batch([payload], with_reminders=True), iterations))
+        db.close()
+    print()
+
+BENCHMARKS: Dict[str, Callable[[], None]] = {
+    'sqlite': bench_sqlite,
+    'batch': bench_batch_insert,
+    'semantic': bench_semantic,
+    'search': bench_search,
+    'audio': bench_audio,
+    'tools': bench_tools,
+    'normalize': bench_normalize,
+    'identities': bench_identities,
+    'reminders': bench_reminders,
+}
+
+if __name__ == "__main__":
+    selected = sys.argv[1:] or list(BENCHMARKS)
+    print("⏱️ BENCHMARKS DO ASSISTENTE DE MEMÓRIA")
+    print("=" * 50)
+    for name in selected:
+        if name not in BENCHMARKS:
+            print(f"❌ Benchmark desconhecido: {name}")
+            continue
+        BENCHMARKS[name]()
@@ -0,0 +1,249 @@
+import re
+import unicodedata
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+from database.common import to_iso_date
+
+# Try to import tiktoken, but fall back to a character-based estimate
+try:
+    import tiktoken  # type: ignore
+    _ENCODING = tiktoken.get_encoding("o200k_base")
+    TIKTOKEN_AVAILABLE = True
+except Exception:
+    _ENCODING = None
+    TIKTOKEN_AVAILABLE = False
+
+TokenCounter = Callable[[str], int]
+
+# Palavras muito comuns que não ajudam a medir relevância
+_STOPWORDS = frozenset("""
+    a o as os um uma uns umas de do da dos das em no na nos nas por para com sem que se
+    e ou mas como foi vai ser ter meu minha meus minhas seu sua eu voce ele ela nos eles
+    elas isso esse essa este esta hoje ontem amanha the and for with
+""".split())
+_WORD = re.compile(r"\w+")
+
+def estimate_tokens(text: str) -> int:
+    """Conta tokens com tiktoken quando disponível; senão estima ~4 caracteres por token"""
+    if not text:
+        return 0
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text))
+    return (len(text) + 3) // 4
+
+def _fold(text: str) -> str:
+    """Minúsculas e sem acentos, para comparação de palavras"""
+    decomposed = unicodedata.normalize('NFKD', text.lower())
+    return ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+def _keywords(text: str) -> set:
+    return {word for word in _WORD.findall(_fold(text)) if len(word) > 2 and word not in _STOPWORDS}
+
+def _truncate(text: Any, limit: int) -> str:
+    text = ' '.join(str(text or '').split())
+    return text if len(text) <= limit else text[:limit - 1] + '…'
+
+@dataclass
+class ContextBundle:
+    """Contexto montado para o prompt e o uso de tokens de cada seção"""
+    text: str
+    budget: int
+    section_tokens: Dict[str, int] = field(default_factory=dict)
+    section_items: Dict[str, int] = field(default_factory=dict)
+    dropped_items: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def total_tokens(self) -> int:
+        return sum(self.section_tokens.values())
+
+    def report(self) -> str:
+        parts = [
+            f"{name} {tokens} ({self.section_items.get(name, 0)} itens, {self.dropped_items.get(name, 0)} fora)"
+            for name, tokens in self.section_tokens.items()
+        ]
+        return f"{self.total_tokens}/{self.budget} tokens | " + " | ".join(parts)
+
+class ContextBuilder:
+    """Monta o contexto de memória do prompt respeitando um orçamento de tokens.
+
+    Eventos, interações e identidades são pontuados por relevância à fala
+    atual (palavras em comum) e por recência, e empacotados em formato
+    compacto de uma linha por item até esgotar o orçamento. Cada seção tem
+    uma fatia do orçamento; o que sobra de uma seção é usado pelas demais.
+    """
+
+    SECTIONS = ('events', 'interactions', 'identities')
+    HEADERS = {
+        'events': 'EVENTOS',
+        'interactions': 'INTERAÇÕES RECENTES',
+        'identities': 'IDENTIDADES CONHECIDAS'
+    }
+
+    def __init__(self, max_tokens: int = 1500, token_counter: TokenCounter = estimate_tokens,
+                 shares: Optional[Dict[str, float]] = None, max_item_chars: int = 280):
+        self.max_tokens = max_tokens
+        self.token_counter = token_counter
+        self.shares = shares or {'events': 0.45, 'interactions': 0.35, 'identities': 0.2}
+        self.max_item_chars = max_item_chars
+
+    # ------------------------------------------------------------------
+    # Renderização compacta
+    # ------------------------------------------------------------------
+
+    def _render_event(self, event: Union[str, Dict[str, Any]]) -> str:
+        if isinstance(event, str):
+            return _truncate(event, self.max_item_chars)
+        line = ' '.join(part for part in (str(event.get('date') or ''), str(event.get('time') or '')) if part)
+        line += f" [{event.get('category', 'outros')}/{event.get('priority', 'media')}] {event.get('title', '')}"
+        if event.get('description'):
+            line += f" — {event['description']}"
+        if event.get('location'):
+            line += f" @ {event['location']}"
+        if event.get('reminder'):
+            line += f" (lembrete: {event['reminder']})"
+        return _truncate(line.strip(), self.max_item_chars)
+
+    def _render_interaction(self, interaction: Union[str, Dict[str, Any]]) -> str:
+        if isinstance(interaction, str):
+            return _truncate(interaction, self.max_item_chars)
+        half = self.max_item_chars // 2
+        return (f"U: {_truncate(interaction.get('human_message'), half)} | "
+                f"A: {_truncate(interaction.get('assistant_message'), half)}")
+
+    def _render_identity(self, identity: Union[str, Dict[str, Any]]) -> str:
+        if isinstance(identity, str):
+            return _truncate(identity, self.max_item_chars)
+        line = f"Pessoa: {identity.get('name', '')}"
+        for key, label in (('role', 'Papel'), ('relationship', 'Relacionamento'),
+                           ('preferences', 'Preferências'), ('notes', 'Notas')):
+            if identity.get(key):
+                line += f", {label}: {identity[key]}"
+        return _truncate(line, self.max_item_chars)
+
+    # ------------------------------------------------------------------
+    # Pontuação
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _relevance(keywords: set, line: str) -> float:
+        if not keywords:
+            return 0.0
+        return len(keywords & _keywords(line)) / len(keywords)
+
+    @staticmethod
+    def _event_recency(event: Union[str, Dict[str, Any]], today: date) -> Optional[float]:
+        if isinstance(event, str):
+            return None
+        iso = to_iso_date(event.get('date'))
+        if iso is None:
+            return None
+        age = abs((date.fromisoformat(iso) - today).days)
+        return 1.0 / (1.0 + age / 7.0)
+
+    @staticmethod
+    def _timestamp_recency(interaction: Union[str, Dict[str, Any]], now: datetime) -> Optional[float]:
+        if isinstance(interaction, str):
+            return None
+        value = interaction.get('timestamp')
+        if isinstance(value, str):
+            try:
+                value = datetime.fromisoformat(value)
+            except ValueError:
+                return None
+        if not isinstance(value, datetime):
+            return None
+        age_days = max((now - value.replace(tzinfo=None)).total_seconds(), 0) / 86400
+        return 1.0 / (1.0 + age_days)
+
+    def _rank(self, section: str, items: Sequence[Any], keywords: set,
+              now: datetime) -> List[Tuple[float, int, str]]:
+        render = {
+            'events': self._render_event,
+            'interactions': self._render_interaction,
+            'identities': self._render_identity
+        }[section]
+        ranked = []
+        for index, item in enumerate(items):
+            line = render(item)
+            if not line:
+                continue
+            if section == 'events':
+                recency = self._event_recency(item, now.date())
+            elif section == 'interactions':
+                recency = self._timestamp_recency(item, now)
+            else:
+                recency = 0.0
+            if recency is None:
+                # Sem data: a posição na lista (a primeira é a mais recente) define a recência
+                recency = 1.0 / (1.0 + index)
+            score = 2.0 * self._relevance(keywords, line) + recency
+            ranked.append((score, index, line))
+        ranked.sort(key=lambda entry: (-entry[0], entry[1]))
+        return ranked
+
+    # ------------------------------------------------------------------
+    # Empacotamento
+    # ------------------------------------------------------------------
+
+    def build(self, utterance: str, events: Iterable[Any] = (), interactions: Iterable[Any] = (),
+              identities: Union[str, Iterable[Any]] = (), now: Optional[datetime] = None) -> ContextBundle:
+        """Seleciona e formata os itens mais úteis para a fala atual dentro do orçamento.
+
+        `interactions` deve vir da mais recente para a mais antiga (como em
+        get_memory_context). `identities` aceita o texto de get_all_contexts.
+        """
+        now = now or datetime.now()
+        if isinstance(identities, str):
+            identities = [line for line in identities.splitlines() if line.strip()]
+        keywords = _keywords(utterance)
+        candidates = {
+            'events': self._rank('events', list(events), keywords, now),
+            'interactions': self._rank('interactions', list(interactions), keywords, now),
+            'identities': self._rank('identities', list(identities), keywords, now)
+        }
+
+        selected: Dict[str, List[Tuple[float, int, str]]] = {name: [] for name in self.SECTIONS}
+        used: Dict[str, int] = {name: 0 for name in self.SECTIONS}
+        header_cost = {name: self.token_counter(self.HEADERS[name] + ':\n') for name in self.SECTIONS}
+
+        def pack(section: str, limit: int) -> None:
+            remaining = []
+            for entry in candidates[section]:
+                cost = self.token_counter(entry[2] + '\n')
+                if not selected[section]:
+                    cost += header_cost[section]
+                if used[section] + cost <= limit and sum(used.values()) + cost <= self.max_tokens:
+                    selected[section].append(entry)
+                    used[section] += cost
+                else:
+                    remaining.append(entry)
+            candidates[section] = remaining
+
+        # Primeira passada: cada seção dentro da sua fatia
+        for section in self.SECTIONS:
+            pack(section, int(self.max_tokens * self.shares.get(section, 0)))
+        # Segunda passada: sobras do orçamento vão para quem ainda tem itens
+        for section in self.SECTIONS:
+            pack(section, self.max_tokens)
+
+        blocks = []
+        for section in self.SECTIONS:
+            entries = selected[section]
+            if not entries:
+                continue
+            if section == 'interactions':
+                # Ordem cronológica: da mais antiga para a mais recente
+                entries = sorted(entries, key=lambda entry: -entry[1])
+            elif section == 'events':
+                entries = sorted(entries, key=lambda entry: entry[1])
+            lines = '\n'.join(entry[2] for entry in entries)
+            blocks.append(f"{self.HEADERS[section]}:\n{lines}")
+
+        return ContextBundle(
+            text='\n\n'.join(blocks),
+            budget=self.max_tokens,
+            section_tokens=dict(used),
+            section_items={name: len(selected[name]) for name in self.SECTIONS},
+            dropped_items={name: len(candidates[name]) for name in self.SECTIONS}
+        )
@@ -0,0 +1,41 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+class AsyncAdapter:
+    """Expõe os métodos de um gerenciador síncrono como corrotinas.
+
+    Cada chamada roda em um executor de threads compartilhado, cujo número
+    de workers deve acompanhar o tamanho do pool de conexões: assim o laço
+    de eventos nunca bloqueia em I/O de banco e o número de consultas
+    simultâneas fica limitado ao de conexões disponíveis. O esquema, as
+    transações e as conexões continuam sendo os do gerenciador original.
+
+        db = AsyncAdapter(DatabaseManager(provider=provider), executor)
+        events = await db.get_events_by_date('10/07/2025')
+    """
+
+    def __init__(self, target: Any, executor: Optional[ThreadPoolExecutor] = None):
+        self.target = target
+        self.executor = executor
+
+    async def run(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Executa qualquer função síncrona no executor do adaptador"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+
+    def __getattr__(self, name: str) -> Any:
+        attribute = getattr(self.target, name)
+        if not callable(attribute):
+            return attribute
+
+        @functools.wraps(attribute)
+        async def call(*args: Any, **kwargs: Any) -> Any:
+            return await self.run(attribute, *args, **kwargs)
+
+        return call
+
+def database_executor(pool_size: int, name: str = "db") -> ThreadPoolExecutor:
+    """Executor com uma thread por conexão do pool"""
+    return ThreadPoolExecutor(max_workers=max(1, pool_size), thread_name_prefix=name)
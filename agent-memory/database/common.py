@@ -0,0 +1,121 @@
+"""Utilitários compartilhados pelos backends SQLite e MySQL"""
+
+import re
+from datetime import date, datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from notifications.reminder_parser import reminder_datetime
+
+# Recebe [(reminder_id, reminder_time), ...] dos lembretes gravados junto com eventos
+ReminderListener = Callable[[List[Tuple[int, str]]], None]
+
+_DISPLAY_DATE = re.compile(r'^\s*(\d{1,2})/(\d{1,2})/(\d{4})\s*$')
+_ISO_DATE = re.compile(r'^\s*(\d{4})-(\d{1,2})-(\d{1,2})')
+_TIME = re.compile(r'^\s*(\d{1,2})[:hH](\d{2})?')
+
+def to_iso_date(value: Any) -> Optional[str]:
+    """Converte DD/MM/YYYY (formato do DailyEvents), ISO ou date para YYYY-MM-DD"""
+    if isinstance(value, (date, datetime)):
+        return value.strftime("%Y-%m-%d")
+    if not isinstance(value, str):
+        return None
+    match = _DISPLAY_DATE.match(value)
+    if match:
+        day, month, year = (int(part) for part in match.groups())
+    else:
+        match = _ISO_DATE.match(value)
+        if not match:
+            return None
+        year, month, day = (int(part) for part in match.groups())
+    try:
+        return date(year, month, day).isoformat()
+    except ValueError:
+        return None
+
+def to_display_date(value: Any) -> Any:
+    """Converte uma data do banco para o formato DD/MM/YYYY usado pela aplicação"""
+    iso = to_iso_date(value)
+    if iso is None:
+        return value
+    year, month, day = iso.split('-')
+    return f"{day}/{month}/{year}"
+
+def normalize_time(value: Any) -> Optional[str]:
+    """Normaliza horários como 9:30 ou 14h para HH:MM; outros textos são mantidos"""
+    if not value:
+        return None
+    text = str(value)
+    match = _TIME.match(text)
+    if match:
+        hour, minute = int(match.group(1)), int(match.group(2) or 0)
+        if hour < 24 and minute < 60:
+            return f"{hour:02d}:{minute:02d}"
+    return text
+
+def event_timestamp(iso_date: str, time: Optional[str]) -> Optional[str]:
+    """Combina data ISO e horário HH:MM em um timestamp do evento"""
+    if not time or not re.match(r'^\d{2}:\d{2}$', time):
+        return None
+    return f"{iso_date} {time}:00"
+
+def event_rows(events_data: Dict[str, Any]) -> List[tuple]:
+    """Converte um payload DailyEvents em linhas para INSERT.
+
+    Uma data que não pode ser interpretada (ex.: "hoje" vindo da IA) não
+    descarta os eventos: eles são gravados com a data de hoje e um aviso.
+    """
+    iso_date = to_iso_date(events_data.get('date'))
+    if iso_date is None:
+        iso_date = date.today().isoformat()
+        print(f"⚠️ Data inválida {events_data.get('date')!r}; usando a data de hoje ({iso_date})")
+    rows = []
+    for event in events_data.get('events', []):
+        time = normalize_time(event.get('time'))
+        rows.append((
+            iso_date,
+            event.get('title', ''),
+            event.get('description', ''),
+            event.get('category', 'outros'),
+            event.get('priority', 'media'),
+            time,
+            event.get('location'),
+            event.get('reminder'),
+            event_timestamp(iso_date, time)
+        ))
+    return rows
+
+def reminder_rows(rows: Sequence[tuple], ids: Sequence[int], now: Optional[datetime] = None) -> List[tuple]:
+    """Lembretes (event_id, reminder_time, message) das linhas de event_rows que têm reminder.
+
+    Eventos sem horário contam a partir da meia-noite do dia; eventos que já
+    passaram não geram lembrete.
+    """
+    now = now or datetime.now()
+    reminders = []
+    for event_id, row in zip(ids, rows):
+        iso_date, reminder_text, event_at = row[0], row[7], row[8]
+        if not reminder_text:
+            continue
+        anchor = datetime.fromisoformat(event_at or iso_date)
+        if (anchor < now) if event_at else (anchor.date() < now.date()):
+            continue
+        reminder_time = reminder_datetime(reminder_text, anchor).strftime("%Y-%m-%d %H:%M:%S")
+        reminders.append((event_id, reminder_time, reminder_text))
+    return reminders
+
+def split_ids(payloads: List[Dict[str, Any]], ids: List[int]) -> List[List[int]]:
+    """Distribui a lista plana de ids gerados entre os payloads, na ordem dos eventos"""
+    result = []
+    start = 0
+    for payload in payloads:
+        count = len(payload.get('events', []))
+        result.append(ids[start:start + count])
+        start += count
+    return result
+
+def index_text(*parts: Any) -> str:
+    """Junta os campos textuais de um registro para indexação (vetorial/texto)"""
+    return ' '.join(str(part) for part in parts if part)
+
+def search_terms(text: str) -> List[str]:
+    """Palavras de uma consulta de busca textual, sem operadores ou pontuação"""
+    return re.findall(r'\w+', text or '')
@@ -1,150 +1,194 @@
-import sqlite3
 import json
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Sequence, Tuple
 from pathlib import Path
+from database.sqlite_pool import SQLiteConnectionPool
+from database.common import (ReminderListener, event_rows, index_text, reminder_rows, search_terms,
+                             split_ids, to_display_date, to_iso_date)
+from database.migrations import migrate_sqlite
+from database.vector_index import VectorIndex
+
+EVENT_COLUMNS = "id, date, title, description, category, priority, time, location, reminder"
+INTERACTION_COLUMNS = "id, timestamp, human_message, assistant_message, context"
+
+def _event_dict(row: Any) -> Dict[str, Any]:
+    return {
+        'id': row[0],
+        'date': to_display_date(row[1]),
+        'title': row[2],
+        'description': row[3],
+        'category': row[4],
+        'priority': row[5],
+        'time': row[6],
+        'location': row[7],
+        'reminder': row[8]
+    }
+
+def _interaction_dict(row: Any) -> Dict[str, Any]:
+    return {
+        'id': row[0],
+        'timestamp': row[1],
+        'human_message': row[2],
+        'assistant_message': row[3],
+        'context': row[4]
+    }
 
 class DatabaseManager:
-    def __init__(self, db_path: str = "memory.db"):
+    def __init__(self, db_path: str = "memory.db", pool: Optional[SQLiteConnectionPool] = None,
+                 synchronous: str = "NORMAL", vector_index: Optional[VectorIndex] = None):
         self.db_path = db_path
+        # Conexões persistentes (uma por thread) compartilhadas por todos os métodos
+        self.pool = pool or SQLiteConnectionPool(db_path, synchronous=synchronous)
+        # Índice semântico persistido ao lado do banco (ex.: memory.db.vec)
+        self.vector_index = vector_index or VectorIndex(None if db_path == ":memory:" else f"{db_path}.vec")
+        # Avisado (ex.: ReminderSystem.schedule_many) dos lembretes criados por save_events_batch
+        self.reminder_listener: Optional[ReminderListener] = None
         self.init_database()
+        self.sync_vector_index()
+
+    def close(self) -> None:
+        """Fecha as conexões abertas pelo pool"""
+        self.vector_index.flush()
+        self.pool.close_all()
 
     def init_database(self) -> None:
-        """Inicializa o banco de dados com as tabelas necessárias"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
-        # Tabela de eventos
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS events (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                date TEXT NOT NULL,
-                title TEXT NOT NULL,
-                description TEXT,
-                category TEXT NOT NULL,
-                priority TEXT DEFAULT 'media',
-                time TEXT,
-                location TEXT,
-                reminder TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-
-        # Tabela de interações
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS interactions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                human_message TEXT,
-                assistant_message TEXT,
-                context TEXT
-            )
-        ''')
-
-        # Tabela de lembretes
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS reminders (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                event_id INTEGER,
-                reminder_time TIMESTAMP,
-                message TEXT,
-                is_sent BOOLEAN DEFAULT FALSE,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (event_id) REFERENCES events (id)
-            )
-        ''')
-
-        # Tabela de identidades/contexto
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS identities (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                role TEXT,
-                relationship TEXT,
-                preferences TEXT,
-                notes TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
+        """Aplica as migrações pendentes; não executa DDL se o schema já está atualizado"""
+        migrate_sqlite(self.pool)
+
+    def rebuild_vector_index(self) -> None:
+        """Indexa novamente todos os eventos e interações (ex.: índice apagado ou banco antigo)"""
+        conn = self.pool.get_connection()
+        self.vector_index.clear()
+        self.vector_index.add_many(
+            ('event', row[0], index_text(*row[1:]))
+            for row in conn.execute('SELECT id, title, description, location, category FROM events')
+        )
+        self.vector_index.add_many(
+            ('interaction', row[0], index_text(*row[1:]))
+            for row in conn.execute('SELECT id, human_message, assistant_message FROM interactions')
+        )
+
+    def sync_vector_index(self) -> int:
+        """Indexa os registros gravados depois do último vetor persistido; retorna quantos.
 
-        conn.commit()
-        conn.close()
+        A fila do índice só vai para o disco no flush, então uma queda do
+        processo perde os itens mais recentes. Como os ids crescem, o que
+        falta é o que passa do maior id indexado de cada tipo. Um índice vazio
+        fica para rebuild_vector_index na primeira busca.
+        """
+        if len(self.vector_index) == 0:
+            return 0
+        try:
+            conn = self.pool.get_connection()
+            events = conn.execute(
+                'SELECT id, title, description, location, category FROM events WHERE id > ?',
+                (self.vector_index.max_id('event'),)
+            ).fetchall()
+            interactions = conn.execute(
+                'SELECT id, human_message, assistant_message FROM interactions WHERE id > ?',
+                (self.vector_index.max_id('interaction'),)
+            ).fetchall()
+        except Exception as e:
+            print(f"Erro ao sincronizar índice semântico: {e}")
+            return 0
+        try:
+            self.vector_index.add_many(('event', row[0], index_text(*row[1:])) for row in events)
+            self.vector_index.add_many(('interaction', row[0], index_text(*row[1:])) for row in interactions)
+        except Exception as e:
+            print(f"Erro ao sincronizar índice semântico: {e}")
+            return 0
+        return len(events) + len(interactions)
 
     def save_events(self, events_data: Dict[str, Any]) -> bool:
         """Salva eventos no banco de dados"""
+        return bool(self.save_events_batch([events_data]))
+
+    def insert_events(self, events_data: Dict[str, Any]) -> List[int]:
+        """Salva os eventos de um dia e retorna os ids gerados, na ordem dos eventos"""
+        ids = self.save_events_batch([events_data])
+        return ids[0] if ids else []
+
+    def save_events_batch(self, payloads: List[Dict[str, Any]], with_reminders: bool = False) -> List[List[int]]:
+        """Salva vários payloads DailyEvents em uma única transação.
+
+        Retorna, para cada payload, a lista de ids gerados na ordem dos eventos.
+        Com `with_reminders`, os eventos com reminder ganham seus lembretes na
+        mesma transação. Em caso de erro a transação inteira é desfeita e
+        retorna lista vazia; uma falha do reminder_listener ou do índice
+        semântico, depois do commit, só é registrada.
+        """
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-
-            date = events_data.get('date')
-            events = events_data.get('events', [])
-
-            for event in events:
-                cursor.execute('''
-                    INSERT INTO events (date, title, description, category, priority, time, location, reminder)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    date,
-                    event.get('title', ''),
-                    event.get('description', ''),
-                    event.get('category', 'outros'),
-                    event.get('priority', 'media'),
-                    event.get('time'),
-                    event.get('location'),
-                    event.get('reminder')
-                ))
-
-            conn.commit()
-            conn.close()
-            return True
+            rows = [row for payload in payloads for row in event_rows(payload)]
+            if not rows:
+                return [[] for _ in payloads]
+
+            scheduled: List[Tuple[int, str]] = []
+            with self.pool.transaction() as conn:
+                conn.executemany('''
+                    INSERT INTO events (date, title, description, category, priority, time, location, reminder, event_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', rows)
+                # Com AUTOINCREMENT e a escrita travada pela transação os ids são sequenciais
+                last_id = conn.execute('SELECT last_insert_rowid()').fetchone()[0]
+                ids = list(range(last_id - len(rows) + 1, last_id + 1))
+
+                reminders = reminder_rows(rows, ids) if with_reminders else []
+                if reminders:
+                    conn.executemany('''
+                        INSERT INTO reminders (event_id, reminder_time, message, is_sent)
+                        VALUES (?, ?, ?, 0)
+                    ''', reminders)
+                    last_reminder = conn.execute('SELECT last_insert_rowid()').fetchone()[0]
+                    first_reminder = last_reminder - len(reminders) + 1
+                    scheduled = [(first_reminder + i, row[1]) for i, row in enumerate(reminders)]
+
         except Exception as e:
             print(f"Erro ao salvar eventos: {e}")
-            return False
+            return []
+
+        # A transação já foi confirmada: falhas daqui em diante só são registradas e os ids voltam
+        if scheduled and self.reminder_listener:
+            try:
+                self.reminder_listener(scheduled)
+            except Exception as e:
+                print(f"Erro ao agendar lembretes: {e}")
+        try:
+            self.vector_index.add_many(
+                ('event', event_id, index_text(row[1], row[2], row[6], row[3]))
+                for event_id, row in zip(ids, rows)
+            )
+        except Exception as e:
+            print(f"Erro ao indexar eventos: {e}")
+        return split_ids(payloads, ids)
 
     def save_interaction(self, human_message: str, assistant_message: str, context: str = "") -> None:
         """Salva uma interação no banco de dados"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-
-            cursor.execute('''
-                INSERT INTO interactions (human_message, assistant_message, context)
-                VALUES (?, ?, ?)
-            ''', (human_message, assistant_message, context))
-
-            conn.commit()
-            conn.close()
+            with self.pool.transaction() as conn:
+                cursor = conn.execute('''
+                    INSERT INTO interactions (human_message, assistant_message, context)
+                    VALUES (?, ?, ?)
+                ''', (human_message, assistant_message, context))
         except Exception as e:
             print(f"Erro ao salvar interação: {e}")
+            return
+
+        try:
+            self.vector_index.add('interaction', cursor.lastrowid, index_text(human_message, assistant_message))
+        except Exception as e:
+            print(f"Erro ao indexar interação: {e}")
 
     def get_events_by_date(self, date: str) -> List[Dict[str, Any]]:
         """Busca eventos por data"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-
-            cursor.execute('''
-                SELECT * FROM events WHERE date = ? ORDER BY time ASC
-            ''', (date,))
-
-            events = []
-            for row in cursor.fetchall():
-                events.append({
-                    'id': row[0],
-                    'date': row[1],
-                    'title': row[2],
-                    'description': row[3],
-                    'category': row[4],
-                    'priority': row[5],
-                    'time': row[6],
-                    'location': row[7],
-                    'reminder': row[8]
-                })
-
-            conn.close()
-            return events
+            cursor = self.pool.get_connection().cursor()
+
+            cursor.execute(f'''
+                SELECT {EVENT_COLUMNS}
+                FROM events WHERE date = ? ORDER BY time ASC
+            ''', (to_iso_date(date),))
+
+            return [_event_dict(row) for row in cursor.fetchall()]
         except Exception as e:
             print(f"Erro ao buscar eventos: {e}")
             return []
@@ -152,73 +196,119 @@ class DatabaseManager:
     def get_recent_interactions(self, limit: int = 10) -> List[Dict[str, Any]]:
         """Busca interações recentes"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            cursor = self.pool.get_connection().cursor()
 
-            cursor.execute('''
-                SELECT * FROM interactions ORDER BY timestamp DESC LIMIT ?
+            cursor.execute(f'''
+                SELECT {INTERACTION_COLUMNS}
+                FROM interactions ORDER BY timestamp DESC LIMIT ?
             ''', (limit,))
 
-            interactions = []
-            for row in cursor.fetchall():
-                interactions.append({
-                    'id': row[0],
-                    'timestamp': row[1],
-                    'human_message': row[2],
-                    'assistant_message': row[3],
-                    'context': row[4]
-                })
-
-            conn.close()
-            return interactions
+            return [_interaction_dict(row) for row in cursor.fetchall()]
         except Exception as e:
             print(f"Erro ao buscar interações: {e}")
             return []
 
+    def _fetch_hits(self, hits: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Carrega as linhas de uma lista de resultados [{'kind', 'id', 'score'}], na mesma ordem"""
+        conn = self.pool.get_connection()
+        found: Dict[Any, Dict[str, Any]] = {}
+        for kind, table, columns, to_dict in (
+            ('event', 'events', EVENT_COLUMNS, _event_dict),
+            ('interaction', 'interactions', INTERACTION_COLUMNS, _interaction_dict)
+        ):
+            ids = [hit['id'] for hit in hits if hit['kind'] == kind]
+            if not ids:
+                continue
+            placeholders = ', '.join('?' * len(ids))
+            for row in conn.execute(f'SELECT {columns} FROM {table} WHERE id IN ({placeholders})', ids):
+                found[(kind, row[0])] = to_dict(row)
+
+        # Ids removidos do banco desde a indexação são ignorados
+        return [
+            {**found[(hit['kind'], hit['id'])], 'kind': hit['kind'], 'score': hit['score']}
+            for hit in hits
+            if (hit['kind'], hit['id']) in found
+        ]
+
+    def semantic_search(self, query: str, k: int = 5) -> List[Dict[str, Any]]:
+        """Busca os k eventos/interações semanticamente mais próximos da consulta.
+
+        Cada item traz 'kind' ('event' ou 'interaction') e 'score' além das
+        colunas da tabela. Se o índice estiver vazio (banco criado antes do
+        índice existir) ele é reconstruído na primeira busca.
+        """
+        try:
+            if len(self.vector_index) == 0:
+                self.rebuild_vector_index()
+            return self._fetch_hits(self.vector_index.search(query, k))
+        except Exception as e:
+            print(f"Erro na busca semântica: {e}")
+            return []
+
+    def search(self, query: str, limit: int = 20, offset: int = 0,
+               kinds: Sequence[str] = ('event', 'interaction')) -> List[Dict[str, Any]]:
+        """Busca textual (FTS5) em eventos e interações, ordenada por relevância (BM25).
+
+        Todas as palavras da consulta precisam aparecer (prefixos valem:
+        "reun" encontra "reunião"); acentos e maiúsculas são ignorados.
+        Use limit/offset para paginar. Cada item traz 'kind' e 'score'.
+
+        O BM25 considera todos os registros que casam com a consulta. Cada
+        tabela contribui com seus offset + limit melhores (ORDER BY rank, que
+        o FTS5 resolve sem ordenar o resultado inteiro), o que basta para a
+        página pedida do ranking combinado.
+        """
+        terms = search_terms(query)
+        if not terms or not kinds:
+            return []
+        match = ' '.join(f'"{term}"*' for term in terms)
+
+        selects = []
+        params: List[Any] = []
+        for kind, fts in (('event', 'events_fts'), ('interaction', 'interactions_fts')):
+            if kind not in kinds:
+                continue
+            selects.append(f'''
+                SELECT * FROM (
+                    SELECT '{kind}', rowid, -bm25({fts}) AS score FROM {fts}
+                    WHERE {fts} MATCH ? ORDER BY rank LIMIT ?
+                )
+            ''')
+            params += [match, offset + limit]
+
+        try:
+            rows = self.pool.get_connection().execute(
+                ' UNION ALL '.join(selects) + ' ORDER BY score DESC LIMIT ? OFFSET ?',
+                params + [limit, offset]
+            ).fetchall()
+            return self._fetch_hits([
+                {'kind': kind, 'id': item_id, 'score': round(score, 4)} for kind, item_id, score in rows
+            ])
+        except Exception as e:
+            print(f"Erro na busca textual: {e}")
+            return []
+
     def get_memory_context(self) -> Dict[str, Any]:
         """Retorna contexto completo da memória"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            cursor = self.pool.get_connection().cursor()
 
             # Busca eventos dos últimos 7 dias
-            cursor.execute('''
-                SELECT * FROM events
+            cursor.execute(f'''
+                SELECT {EVENT_COLUMNS}
+                FROM events
                 WHERE date >= date('now', '-7 days')
                 ORDER BY date DESC, time ASC
             ''')
-
-            recent_events = []
-            for row in cursor.fetchall():
-                recent_events.append({
-                    'id': row[0],
-                    'date': row[1],
-                    'title': row[2],
-                    'description': row[3],
-                    'category': row[4],
-                    'priority': row[5],
-                    'time': row[6],
-                    'location': row[7],
-                    'reminder': row[8]
-                })
+            recent_events = [_event_dict(row) for row in cursor.fetchall()]
 
             # Busca interações recentes
-            cursor.execute('''
-                SELECT * FROM interactions
+            cursor.execute(f'''
+                SELECT {INTERACTION_COLUMNS}
+                FROM interactions
                 ORDER BY timestamp DESC LIMIT 20
             ''')
-
-            recent_interactions = []
-            for row in cursor.fetchall():
-                recent_interactions.append({
-                    'id': row[0],
-                    'timestamp': row[1],
-                    'human_message': row[2],
-                    'assistant_message': row[3],
-                    'context': row[4]
-                })
-
-            conn.close()
+            recent_interactions = [_interaction_dict(row) for row in cursor.fetchall()]
 
             return {
                 'events': recent_events,
@@ -1,198 +1,332 @@
-import mysql.connector
 from mysql.connector import Error
-from typing import List, Dict, Any, Optional, cast
+from typing import List, Dict, Any, Optional, Sequence, Tuple, cast
+from database.mysql_pool import MySQLConnectionProvider
+from database.common import (ReminderListener, event_rows, index_text, reminder_rows, search_terms,
+                             split_ids, to_display_date, to_iso_date)
+from database.migrations import migrate_mysql
+from database.vector_index import VectorIndex
+
+EVENT_COLUMNS = """id, date, title, description, category, priority, time, location,
+                   reminder, created_at, updated_at"""
+INTERACTION_COLUMNS = "id, timestamp, human_message, assistant_message, context"
+
+def _event_dict(row: Any) -> Dict[str, Any]:
+    row_data = cast(Any, row)
+    return {
+        'id': row_data[0],
+        'date': to_display_date(row_data[1]),
+        'title': row_data[2],
+        'description': row_data[3],
+        'category': row_data[4],
+        'priority': row_data[5],
+        'time': row_data[6],
+        'location': row_data[7],
+        'reminder': row_data[8],
+        'created_at': row_data[9],
+        'updated_at': row_data[10]
+    }
+
+def _interaction_dict(row: Any) -> Dict[str, Any]:
+    row_data = cast(Any, row)
+    return {
+        'id': row_data[0],
+        'timestamp': row_data[1],
+        'human_message': row_data[2],
+        'assistant_message': row_data[3],
+        'context': row_data[4]
+    }
 
 class DatabaseManager:
-    def __init__(self, host="localhost", user="root", password="", database="agent_memory"):
-        self.connection = mysql.connector.connect(
+    # Quantidade máxima de eventos por INSERT multi-linha
+    BATCH_SIZE = 500
+
+    def __init__(self, host="localhost", user="root", password="", database="agent_memory",
+                 provider: Optional[MySQLConnectionProvider] = None,
+                 vector_index: Optional[VectorIndex] = None):
+        # Pool compartilhado com IdentityManager e ReminderSystem quando fornecido
+        self.provider = provider or MySQLConnectionProvider(
             host=host,
             user=user,
             password=password,
             database=database
         )
+        # Índice semântico local; sem caminho fica só em memória e é reconstruído na primeira busca
+        self.vector_index = vector_index or VectorIndex()
+        # Avisado (ex.: ReminderSystem.schedule_many) dos lembretes criados por save_events_batch
+        self.reminder_listener: Optional[ReminderListener] = None
         self.init_database()
+        self.sync_vector_index()
+
+    def close(self) -> None:
+        """Grava os vetores pendentes e fecha as conexões do pool"""
+        self.vector_index.flush()
+        self.provider.close_all()
 
     def init_database(self) -> None:
-        cursor = self.connection.cursor()
-        # Tabela de eventos
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS events (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                date VARCHAR(20) NOT NULL,
-                title VARCHAR(255) NOT NULL,
-                description TEXT,
-                category VARCHAR(50) NOT NULL,
-                priority VARCHAR(20) DEFAULT 'media',
-                time VARCHAR(10),
-                location VARCHAR(255),
-                reminder VARCHAR(255),
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
-            )
-        ''')
-        # Tabela de interações
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS interactions (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                human_message TEXT,
-                assistant_message TEXT,
-                context TEXT
-            )
-        ''')
-        # Tabela de lembretes
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS reminders (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                event_id INT,
-                reminder_time TIMESTAMP,
-                message VARCHAR(255),
-                is_sent TINYINT(1) DEFAULT 0,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (event_id) REFERENCES events(id)
-            )
-        ''')
-        # Tabela de identidades
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS identities (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                name VARCHAR(255) NOT NULL,
-                role VARCHAR(100),
-                relationship VARCHAR(100),
-                preferences TEXT,
-                notes TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
-            )
-        ''')
-        self.connection.commit()
+        # Aplica as migrações pendentes; não executa DDL se o schema já está atualizado
+        migrate_mysql(self.provider)
 
-    def save_events(self, events_data: Dict[str, Any]) -> bool:
+    def rebuild_vector_index(self) -> None:
+        """Indexa novamente todos os eventos e interações"""
+        with self.provider.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT id, title, description, location, category FROM events')
+            events = cursor.fetchall()
+            cursor.execute('SELECT id, human_message, assistant_message FROM interactions')
+            interactions = cursor.fetchall()
+        self.vector_index.clear()
+        self.vector_index.add_many(('event', row[0], index_text(*row[1:])) for row in cast(Any, events))
+        self.vector_index.add_many(('interaction', row[0], index_text(*row[1:])) for row in cast(Any, interactions))
+
+    def sync_vector_index(self) -> int:
+        """Indexa os registros gravados depois do último vetor persistido (ver a versão SQLite)"""
+        if len(self.vector_index) == 0:
+            return 0
         try:
-            cursor = self.connection.cursor()
-            date = events_data.get('date')
-            events = events_data.get('events', [])
-            for event in events:
-                cursor.execute('''
-                    INSERT INTO events (date, title, description, category, priority, time, location, reminder)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                ''', (
-                    date,
-                    event.get('title', ''),
-                    event.get('description', ''),
-                    event.get('category', 'outros'),
-                    event.get('priority', 'media'),
-                    event.get('time'),
-                    event.get('location'),
-                    event.get('reminder')
-                ))
-            self.connection.commit()
-            return True
+            with self.provider.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('SELECT id, title, description, location, category FROM events WHERE id > %s',
+                               (self.vector_index.max_id('event'),))
+                events = cursor.fetchall()
+                cursor.execute('SELECT id, human_message, assistant_message FROM interactions WHERE id > %s',
+                               (self.vector_index.max_id('interaction'),))
+                interactions = cursor.fetchall()
         except Error as e:
+            print(f"Erro ao sincronizar índice semântico: {e}")
+            return 0
+        try:
+            self.vector_index.add_many(('event', row[0], index_text(*row[1:])) for row in cast(Any, events))
+            self.vector_index.add_many(('interaction', row[0], index_text(*row[1:])) for row in cast(Any, interactions))
+        except Exception as e:
+            print(f"Erro ao sincronizar índice semântico: {e}")
+            return 0
+        return len(events) + len(interactions)
+
+    def save_events(self, events_data: Dict[str, Any]) -> bool:
+        return bool(self.save_events_batch([events_data]))
+
+    def insert_events(self, events_data: Dict[str, Any]) -> List[int]:
+        """Salva os eventos de um dia e retorna os ids gerados, na ordem dos eventos"""
+        ids = self.save_events_batch([events_data])
+        return ids[0] if ids else []
+
+    def save_events_batch(self, payloads: List[Dict[str, Any]], with_reminders: bool = False) -> List[List[int]]:
+        """Salva vários payloads DailyEvents em uma única transação.
+
+        Cada bloco de até BATCH_SIZE eventos vira um único INSERT com múltiplos
+        VALUES (o executemany do conector reescreve o comando). Os ids de cada
+        bloco são consecutivos a partir de lastrowid, o que vale para
+        innodb_autoinc_lock_mode 0 ou 1 (ou 2 sem inserts concorrentes).
+        Com `with_reminders`, os lembretes dos eventos que têm reminder são
+        inseridos da mesma forma, na mesma transação. Uma falha do
+        reminder_listener ou do índice semântico, depois do commit, só é
+        registrada: os ids gravados são retornados.
+        """
+        try:
+            rows = [row for payload in payloads for row in event_rows(payload)]
+            if not rows:
+                return [[] for _ in payloads]
+
+            def insert(conn: Any) -> Tuple[List[int], List[Tuple[int, str]]]:
+                ids: List[int] = []
+                scheduled: List[Tuple[int, str]] = []
+                cursor = conn.cursor()
+                for start in range(0, len(rows), self.BATCH_SIZE):
+                    chunk = rows[start:start + self.BATCH_SIZE]
+                    cursor.executemany('''
+                        INSERT INTO events (date, title, description, category, priority, time, location, reminder, event_at)
+                        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+                    ''', chunk)
+                    first_id = cast(int, cursor.lastrowid)
+                    ids.extend(range(first_id, first_id + len(chunk)))
+
+                reminders = reminder_rows(rows, ids) if with_reminders else []
+                for start in range(0, len(reminders), self.BATCH_SIZE):
+                    chunk = reminders[start:start + self.BATCH_SIZE]
+                    cursor.executemany('''
+                        INSERT INTO reminders (event_id, reminder_time, message, is_sent)
+                        VALUES (%s, %s, %s, 0)
+                    ''', chunk)
+                    first_id = cast(int, cursor.lastrowid)
+                    scheduled.extend((first_id + i, row[1]) for i, row in enumerate(chunk))
+                return ids, scheduled
+
+            # Repetido uma vez se a conexão cair antes do commit (ver MySQLConnectionProvider.run)
+            ids, scheduled = self.provider.run(insert, transaction=True)
+        except (Error, ValueError) as e:
             print(f"Erro ao salvar eventos: {e}")
-            return False
+            return []
 
-    def save_interaction(self, human_message: str, assistant_message: str, context: str = "") -> None:
+        # A transação já foi confirmada: falhas daqui em diante só são registradas e os ids voltam
+        if scheduled and self.reminder_listener:
+            try:
+                self.reminder_listener(scheduled)
+            except Exception as e:
+                print(f"Erro ao agendar lembretes: {e}")
         try:
-            cursor = self.connection.cursor()
+            self.vector_index.add_many(
+                ('event', event_id, index_text(row[1], row[2], row[6], row[3]))
+                for event_id, row in zip(ids, rows)
+            )
+        except Exception as e:
+            print(f"Erro ao indexar eventos: {e}")
+        return split_ids(payloads, ids)
+
+    def save_interaction(self, human_message: str, assistant_message: str, context: str = "") -> None:
+        def insert(conn: Any) -> int:
+            cursor = conn.cursor()
             cursor.execute('''
                 INSERT INTO interactions (human_message, assistant_message, context)
                 VALUES (%s, %s, %s)
             ''', (human_message, assistant_message, context))
-            self.connection.commit()
+            return cast(int, cursor.lastrowid)
+
+        try:
+            interaction_id = self.provider.run(insert, transaction=True)
         except Error as e:
             print(f"Erro ao salvar interação: {e}")
+            return
+
+        # A interação já foi gravada: uma falha do índice (dimensão, disco) só é registrada
+        try:
+            self.vector_index.add('interaction', interaction_id, index_text(human_message, assistant_message))
+        except Exception as e:
+            print(f"Erro ao indexar interação: {e}")
 
     def get_events_by_date(self, date: str) -> List[Dict[str, Any]]:
         try:
-            cursor = self.connection.cursor()
-            cursor.execute('''
-                SELECT * FROM events WHERE date = %s ORDER BY time ASC
-            ''', (date,))
-            events = []
-            for row in cursor.fetchall():
-                row_data = cast(Any, row)
-                events.append({
-                    'id': row_data[0],
-                    'date': row_data[1],
-                    'title': row_data[2],
-                    'description': row_data[3],
-                    'category': row_data[4],
-                    'priority': row_data[5],
-                    'time': row_data[6],
-                    'location': row_data[7],
-                    'reminder': row_data[8],
-                    'created_at': row_data[9],
-                    'updated_at': row_data[10]
-                })
-            return events
+            with self.provider.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(f'''
+                    SELECT {EVENT_COLUMNS}
+                    FROM events WHERE date = %s ORDER BY time ASC
+                ''', (to_iso_date(date),))
+                rows = cursor.fetchall()
+            return [_event_dict(row) for row in rows]
         except Error as e:
             print(f"Erro ao buscar eventos: {e}")
             return []
 
     def get_recent_interactions(self, limit: int = 10) -> List[Dict[str, Any]]:
         try:
-            cursor = self.connection.cursor()
-            cursor.execute('''
-                SELECT * FROM interactions ORDER BY timestamp DESC LIMIT %s
-            ''', (limit,))
-            interactions = []
-            for row in cursor.fetchall():
-                row_data = cast(Any, row)
-                interactions.append({
-                    'id': row_data[0],
-                    'timestamp': row_data[1],
-                    'human_message': row_data[2],
-                    'assistant_message': row_data[3],
-                    'context': row_data[4]
-                })
-            return interactions
+            with self.provider.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(f'''
+                    SELECT {INTERACTION_COLUMNS}
+                    FROM interactions ORDER BY timestamp DESC LIMIT %s
+                ''', (limit,))
+                rows = cursor.fetchall()
+            return [_interaction_dict(row) for row in rows]
         except Error as e:
             print(f"Erro ao buscar interações: {e}")
             return []
 
-    def get_memory_context(self) -> Dict[str, Any]:
+    def _fetch_hits(self, hits: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Carrega as linhas de uma lista de resultados [{'kind', 'id', 'score'}], na mesma ordem"""
+        found: Dict[Any, Dict[str, Any]] = {}
+        with self.provider.connection() as conn:
+            cursor = conn.cursor()
+            for kind, table, columns, to_dict in (
+                ('event', 'events', EVENT_COLUMNS, _event_dict),
+                ('interaction', 'interactions', INTERACTION_COLUMNS, _interaction_dict)
+            ):
+                ids = [hit['id'] for hit in hits if hit['kind'] == kind]
+                if not ids:
+                    continue
+                placeholders = ', '.join(['%s'] * len(ids))
+                cursor.execute(f'SELECT {columns} FROM {table} WHERE id IN ({placeholders})', ids)
+                for row in cursor.fetchall():
+                    item = to_dict(row)
+                    found[(kind, item['id'])] = item
+
+        # Ids removidos do banco desde a indexação são ignorados
+        return [
+            {**found[(hit['kind'], hit['id'])], 'kind': hit['kind'], 'score': hit['score']}
+            for hit in hits
+            if (hit['kind'], hit['id']) in found
+        ]
+
+    def semantic_search(self, query: str, k: int = 5) -> List[Dict[str, Any]]:
+        """Busca os k eventos/interações semanticamente mais próximos da consulta.
+
+        Cada item traz 'kind' ('event' ou 'interaction') e 'score' além das
+        colunas da tabela.
+        """
         try:
-            cursor = self.connection.cursor()
-            # Busca eventos dos últimos 7 dias
-            cursor.execute('''
-                SELECT * FROM events
-                WHERE date >= DATE_SUB(CURDATE(), INTERVAL 7 DAY)
-                ORDER BY date DESC, time ASC
-            ''')
-            recent_events = []
-            for row in cursor.fetchall():
-                row_data = cast(Any, row)
-                recent_events.append({
-                    'id': row_data[0],
-                    'date': row_data[1],
-                    'title': row_data[2],
-                    'description': row_data[3],
-                    'category': row_data[4],
-                    'priority': row_data[5],
-                    'time': row_data[6],
-                    'location': row_data[7],
-                    'reminder': row_data[8],
-                    'created_at': row_data[9],
-                    'updated_at': row_data[10]
-                })
-            # Busca interações recentes
-            cursor.execute('''
-                SELECT * FROM interactions ORDER BY timestamp DESC LIMIT 20
+            if len(self.vector_index) == 0:
+                self.rebuild_vector_index()
+            return self._fetch_hits(self.vector_index.search(query, k))
+        except Error as e:
+            print(f"Erro na busca semântica: {e}")
+            return []
+        except Exception as e:
+            # Falhas do índice (ex.: ValueError de dimensão, OSError no .vec) não chegam ao loop de voz
+            print(f"Erro no índice semântico: {e}")
+            return []
+
+    def search(self, query: str, limit: int = 20, offset: int = 0,
+               kinds: Sequence[str] = ('event', 'interaction')) -> List[Dict[str, Any]]:
+        """Busca textual (índices FULLTEXT) em eventos e interações, ordenada por relevância.
+
+        Todas as palavras da consulta precisam aparecer (prefixos valem).
+        Palavras com menos de 3 letras são ignoradas, como no índice do
+        InnoDB (innodb_ft_min_token_size). Use limit/offset para paginar.
+        """
+        terms = [term for term in search_terms(query) if len(term) >= 3]
+        if not terms or not kinds:
+            return []
+        against = ' '.join(f'+{term}*' for term in terms)
+
+        selects = []
+        params: List[Any] = []
+        for kind, table, columns in (
+            ('event', 'events', 'title, description, location'),
+            ('interaction', 'interactions', 'human_message, assistant_message')
+        ):
+            if kind not in kinds:
+                continue
+            selects.append(f'''
+                (SELECT '{kind}' AS kind, id, MATCH ({columns}) AGAINST (%s IN BOOLEAN MODE) AS score
+                 FROM {table} WHERE MATCH ({columns}) AGAINST (%s IN BOOLEAN MODE))
             ''')
-            recent_interactions = []
-            for row in cursor.fetchall():
-                row_data = cast(Any, row)
-                recent_interactions.append({
-                    'id': row_data[0],
-                    'timestamp': row_data[1],
-                    'human_message': row_data[2],
-                    'assistant_message': row_data[3],
-                    'context': row_data[4]
-                })
+            params += [against, against]
+
+        try:
+            with self.provider.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    ' UNION ALL '.join(selects) + ' ORDER BY score DESC LIMIT %s OFFSET %s',
+                    params + [limit, offset]
+                )
+                rows = cursor.fetchall()
+            return self._fetch_hits([
+                {'kind': row[0], 'id': row[1], 'score': round(float(row[2]), 4)} for row in cast(Any, rows)
+            ])
+        except Error as e:
+            print(f"Erro na busca textual: {e}")
+            return []
+
+    def get_memory_context(self) -> Dict[str, Any]:
+        try:
+            with self.provider.connection() as conn:
+                cursor = conn.cursor()
+                # Busca eventos dos últimos 7 dias
+                cursor.execute(f'''
+                    SELECT {EVENT_COLUMNS}
+                    FROM events
+                    WHERE date >= DATE_SUB(CURDATE(), INTERVAL 7 DAY)
+                    ORDER BY date DESC, time ASC
+                ''')
+                recent_event_rows = cursor.fetchall()
+                # Busca interações recentes
+                cursor.execute(f'''
+                    SELECT {INTERACTION_COLUMNS}
+                    FROM interactions ORDER BY timestamp DESC LIMIT 20
+                ''')
+                recent_interaction_rows = cursor.fetchall()
             return {
-                'events': recent_events,
-                'interactions': recent_interactions
+                'events': [_event_dict(row) for row in recent_event_rows],
+                'interactions': [_interaction_dict(row) for row in recent_interaction_rows]
             }
         except Error as e:
             print(f"Erro ao buscar contexto: {e}")
@@ -0,0 +1,440 @@
+"""Migrações versionadas do schema, compartilhadas pelos backends SQLite e MySQL.
+
+Cada migração tem uma versão, uma descrição e os passos de cada dialeto
+(comandos SQL ou funções que recebem o cursor). A versão aplicada fica na
+tabela schema_migrations; quando o banco já está na última versão a
+inicialização faz uma única consulta e nenhum DDL.
+
+Os passos devem ser idempotentes: no MySQL o DDL faz commit implícito, e
+bancos criados antes do versionamento já possuem parte do schema.
+"""
+
+from typing import Any, Callable, Dict, List, NamedTuple, Sequence, Union
+from database.common import event_timestamp, normalize_time, to_iso_date
+
+Step = Union[str, Callable[[Any], None]]
+
+class Migration(NamedTuple):
+    version: int
+    description: str
+    sqlite: Sequence[Step]
+    mysql: Sequence[Step]
+
+# ---------------------------------------------------------------------------
+# Passos específicos de cada dialeto
+# ---------------------------------------------------------------------------
+
+# Datas ilegíveis caem para o dia em que o evento foi registrado (como no MySQL)
+_SQLITE_UNREADABLE_DATES = '''
+    UPDATE events SET date = COALESCE(date(created_at), date('now'))
+    WHERE date IS NULL OR date NOT GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]'
+'''
+
+def _sqlite_upgrade_event_dates(cursor: Any) -> None:
+    """Datas DD/MM/YYYY viram ISO (YYYY-MM-DD) e event_at é preenchido"""
+    columns = [row[1] for row in cursor.execute('PRAGMA table_info(events)')]
+    if 'event_at' in columns:
+        return
+
+    cursor.execute('ALTER TABLE events ADD COLUMN event_at TIMESTAMP')
+    updates = []
+    for event_id, old_date, old_time in cursor.execute('SELECT id, date, time FROM events').fetchall():
+        iso_date = to_iso_date(old_date)
+        if iso_date is None:
+            # Tratada por _SQLITE_UNREADABLE_DATES: como texto seria maior que qualquer data ISO
+            continue
+        time = normalize_time(old_time)
+        updates.append((iso_date, time, event_timestamp(iso_date, time), event_id))
+    cursor.executemany('UPDATE events SET date = ?, time = ?, event_at = ? WHERE id = ?', updates)
+    cursor.execute(_SQLITE_UNREADABLE_DATES)
+
+def _mysql_columns(cursor: Any, table: str) -> Dict[str, str]:
+    """Colunas de uma tabela MySQL e seus tipos (DATA_TYPE em minúsculas)"""
+    cursor.execute('''
+        SELECT COLUMN_NAME, DATA_TYPE FROM INFORMATION_SCHEMA.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+    ''', (table,))
+    return {str(name).lower(): str(data_type).lower() for name, data_type in cursor.fetchall()}
+
+def _mysql_upgrade_event_dates(cursor: Any) -> None:
+    """events.date VARCHAR (DD/MM/YYYY) vira DATE e event_at é preenchido.
+
+    Cada ALTER faz commit implícito, então uma execução interrompida deixa o
+    schema no meio do caminho. O estado é lido do INFORMATION_SCHEMA e cada
+    ALTER só roda se ainda falta: date_new e event_at são criados se não
+    existem, e se a coluna antiga já foi removida resta apenas renomear.
+    """
+    columns = _mysql_columns(cursor, 'events')
+    if columns.get('date', 'date') != 'date':
+        if 'date_new' not in columns:
+            cursor.execute('ALTER TABLE events ADD COLUMN date_new DATE AFTER id')
+        if 'event_at' not in columns:
+            cursor.execute('ALTER TABLE events ADD COLUMN event_at DATETIME')
+        # A coluna antiga ainda existe: o preenchimento pode ser refeito do zero
+        cursor.execute('SELECT id, date, time FROM events')
+        updates = []
+        for event_id, old_date, old_time in cursor.fetchall():
+            iso_date = to_iso_date(old_date)
+            if iso_date is None:
+                continue
+            time = normalize_time(old_time)
+            updates.append((iso_date, time, event_timestamp(iso_date, time), event_id))
+        if updates:
+            cursor.executemany('UPDATE events SET date_new = %s, time = %s, event_at = %s WHERE id = %s', updates)
+        # Datas ilegíveis caem para o dia em que o evento foi registrado
+        cursor.execute('UPDATE events SET date_new = DATE(created_at) WHERE date_new IS NULL')
+        cursor.execute('ALTER TABLE events DROP COLUMN date')
+        columns = _mysql_columns(cursor, 'events')
+    if 'date' not in columns and 'date_new' in columns:
+        cursor.execute('ALTER TABLE events CHANGE COLUMN date_new date DATE NOT NULL')
+
+def sqlite_column(table: str, column: str, definition: str) -> Callable[[Any], None]:
+    """Adiciona uma coluna SQLite apenas se ainda não existir"""
+    def step(cursor: Any) -> None:
+        columns = [row[1] for row in cursor.execute(f'PRAGMA table_info({table})')]
+        if column not in columns:
+            cursor.execute(f'ALTER TABLE {table} ADD COLUMN {column} {definition}')
+    return step
+
+def mysql_column(table: str, column: str, definition: str) -> Callable[[Any], None]:
+    """Adiciona uma coluna MySQL apenas se ainda não existir"""
+    def step(cursor: Any) -> None:
+        cursor.execute('''
+            SELECT COUNT(*) FROM INFORMATION_SCHEMA.COLUMNS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s
+        ''', (table, column))
+        if cursor.fetchone()[0] == 0:
+            cursor.execute(f'ALTER TABLE {table} ADD COLUMN {column} {definition}')
+    return step
+
+def mysql_index(table: str, name: str, columns: str, kind: str = "INDEX") -> Callable[[Any], None]:
+    """Cria um índice MySQL apenas se ainda não existir (MySQL não tem CREATE INDEX IF NOT EXISTS)"""
+    def step(cursor: Any) -> None:
+        cursor.execute('''
+            SELECT COUNT(*) FROM INFORMATION_SCHEMA.STATISTICS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s
+        ''', (table, name))
+        if cursor.fetchone()[0] == 0:
+            prefix = "INDEX" if kind == "INDEX" else f"{kind} INDEX"
+            cursor.execute(f'CREATE {prefix} {name} ON {table} ({columns})')
+    return step
+
+# ---------------------------------------------------------------------------
+# Histórico de migrações (em ordem; nunca altere uma migração já publicada)
+# ---------------------------------------------------------------------------
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "tabelas iniciais", sqlite=[
+        '''
+        CREATE TABLE IF NOT EXISTS events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            date DATE NOT NULL,
+            title TEXT NOT NULL,
+            description TEXT,
+            category TEXT NOT NULL,
+            priority TEXT DEFAULT 'media',
+            time TEXT,
+            location TEXT,
+            reminder TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            event_at TIMESTAMP
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS interactions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            human_message TEXT,
+            assistant_message TEXT,
+            context TEXT
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS reminders (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            event_id INTEGER,
+            reminder_time TIMESTAMP,
+            message TEXT,
+            is_sent BOOLEAN DEFAULT FALSE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (event_id) REFERENCES events (id)
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS identities (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            role TEXT,
+            relationship TEXT,
+            preferences TEXT,
+            notes TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+    ], mysql=[
+        '''
+        CREATE TABLE IF NOT EXISTS events (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            date DATE NOT NULL,
+            title VARCHAR(255) NOT NULL,
+            description TEXT,
+            category VARCHAR(50) NOT NULL,
+            priority VARCHAR(20) DEFAULT 'media',
+            time VARCHAR(10),
+            location VARCHAR(255),
+            reminder VARCHAR(255),
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            event_at DATETIME
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS interactions (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            human_message TEXT,
+            assistant_message TEXT,
+            context TEXT
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS reminders (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            event_id INT,
+            reminder_time TIMESTAMP,
+            message VARCHAR(255),
+            is_sent TINYINT(1) DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (event_id) REFERENCES events(id)
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS identities (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            role VARCHAR(100),
+            relationship VARCHAR(100),
+            preferences TEXT,
+            notes TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+        )
+        ''',
+    ]),
+    Migration(2, "datas ISO e coluna event_at", sqlite=[
+        _sqlite_upgrade_event_dates,
+    ], mysql=[
+        _mysql_upgrade_event_dates,
+    ]),
+    Migration(3, "índices de intervalo", sqlite=[
+        'CREATE INDEX IF NOT EXISTS idx_events_date_time ON events (date, time)',
+        'CREATE INDEX IF NOT EXISTS idx_interactions_timestamp ON interactions (timestamp)',
+        'CREATE INDEX IF NOT EXISTS idx_reminders_due ON reminders (is_sent, reminder_time)',
+    ], mysql=[
+        mysql_index('events', 'idx_events_date_time', 'date, time'),
+        mysql_index('interactions', 'idx_interactions_timestamp', 'timestamp'),
+        mysql_index('reminders', 'idx_reminders_due', 'is_sent, reminder_time'),
+    ]),
+    Migration(4, "busca textual", sqlite=[
+        # Tabelas FTS5 de conteúdo externo: o texto fica só em events/interactions
+        '''
+        CREATE VIRTUAL TABLE IF NOT EXISTS events_fts USING fts5(
+            title, description, location,
+            content='events', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+        )
+        ''',
+        '''
+        CREATE VIRTUAL TABLE IF NOT EXISTS interactions_fts USING fts5(
+            human_message, assistant_message,
+            content='interactions', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+        )
+        ''',
+        # Gatilhos mantêm o índice sincronizado a cada INSERT/UPDATE/DELETE
+        '''
+        CREATE TRIGGER IF NOT EXISTS events_fts_insert AFTER INSERT ON events BEGIN
+            INSERT INTO events_fts (rowid, title, description, location)
+            VALUES (new.id, new.title, new.description, new.location);
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS events_fts_delete AFTER DELETE ON events BEGIN
+            INSERT INTO events_fts (events_fts, rowid, title, description, location)
+            VALUES ('delete', old.id, old.title, old.description, old.location);
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS events_fts_update AFTER UPDATE ON events BEGIN
+            INSERT INTO events_fts (events_fts, rowid, title, description, location)
+            VALUES ('delete', old.id, old.title, old.description, old.location);
+            INSERT INTO events_fts (rowid, title, description, location)
+            VALUES (new.id, new.title, new.description, new.location);
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS interactions_fts_insert AFTER INSERT ON interactions BEGIN
+            INSERT INTO interactions_fts (rowid, human_message, assistant_message)
+            VALUES (new.id, new.human_message, new.assistant_message);
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS interactions_fts_delete AFTER DELETE ON interactions BEGIN
+            INSERT INTO interactions_fts (interactions_fts, rowid, human_message, assistant_message)
+            VALUES ('delete', old.id, old.human_message, old.assistant_message);
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS interactions_fts_update AFTER UPDATE ON interactions BEGIN
+            INSERT INTO interactions_fts (interactions_fts, rowid, human_message, assistant_message)
+            VALUES ('delete', old.id, old.human_message, old.assistant_message);
+            INSERT INTO interactions_fts (rowid, human_message, assistant_message)
+            VALUES (new.id, new.human_message, new.assistant_message);
+        END
+        ''',
+        # Indexa as linhas que já existiam
+        "INSERT INTO events_fts (events_fts) VALUES ('rebuild')",
+        "INSERT INTO interactions_fts (interactions_fts) VALUES ('rebuild')",
+    ], mysql=[
+        # Índices FULLTEXT do InnoDB são atualizados no commit de cada INSERT
+        mysql_index('events', 'ft_events_text', 'title, description, location', kind='FULLTEXT'),
+        mysql_index('interactions', 'ft_interactions_text', 'human_message, assistant_message', kind='FULLTEXT'),
+    ]),
+    Migration(5, "nome único de identidade", sqlite=[
+        # Mantém a identidade mais antiga de cada nome antes de criar o índice único
+        'DELETE FROM identities WHERE id NOT IN (SELECT MIN(id) FROM identities GROUP BY name)',
+        'CREATE UNIQUE INDEX IF NOT EXISTS idx_identities_name ON identities (name)',
+    ], mysql=[
+        # A comparação segue a collation da coluna (em geral sem distinção de caixa e acento)
+        'DELETE duplicate FROM identities duplicate JOIN identities kept ON kept.name = duplicate.name AND kept.id < duplicate.id',
+        mysql_index('identities', 'idx_identities_name', 'name', kind='UNIQUE'),
+    ]),
+    Migration(6, "reserva de lembretes entre processos", sqlite=[
+        sqlite_column('reminders', 'claimed_by', 'TEXT'),
+        sqlite_column('reminders', 'lease_until', 'TIMESTAMP'),
+    ], mysql=[
+        # Quem reservou o lembrete e até quando; reservas vencidas podem ser retomadas
+        mysql_column('reminders', 'claimed_by', 'VARCHAR(128) NULL'),
+        mysql_column('reminders', 'lease_until', 'DATETIME NULL'),
+        mysql_index('reminders', 'idx_reminders_claimed_by', 'claimed_by'),
+    ]),
+    Migration(7, "datas ilegíveis de eventos", sqlite=[
+        # Bancos já na versão 2 guardaram como texto as datas que não puderam converter
+        _SQLITE_UNREADABLE_DATES,
+    ], mysql=[
+        # No MySQL a migração 2 já usa DATE(created_at) para essas datas
+    ]),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+# ---------------------------------------------------------------------------
+# Execução
+# ---------------------------------------------------------------------------
+
+class MigrationRunner:
+    """Aplica as migrações pendentes em uma conexão SQLite ou MySQL"""
+
+    DIALECTS = ('sqlite', 'mysql')
+
+    def __init__(self, dialect: str, migrations: Sequence[Migration] = MIGRATIONS):
+        if dialect not in self.DIALECTS:
+            raise ValueError(f"Dialeto não suportado: {dialect}")
+        versions = [migration.version for migration in migrations]
+        if versions != sorted(set(versions)):
+            raise ValueError("As migrações devem ter versões únicas e em ordem crescente")
+        self.dialect = dialect
+        self.migrations = list(migrations)
+        self.placeholder = '?' if dialect == 'sqlite' else '%s'
+
+    @property
+    def latest_version(self) -> int:
+        return self.migrations[-1].version if self.migrations else 0
+
+    def current_version(self, conn: Any) -> int:
+        """Versão aplicada no banco; 0 se a tabela de controle ainda não existe"""
+        cursor = conn.cursor()
+        try:
+            cursor.execute('SELECT MAX(version) FROM schema_migrations')
+            row = cursor.fetchone()
+        except Exception:
+            if self.dialect == 'sqlite':
+                conn.rollback()
+            return 0
+        return int(row[0]) if row and row[0] is not None else 0
+
+    def _create_version_table(self, cursor: Any) -> None:
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version INTEGER PRIMARY KEY,
+                description VARCHAR(255) NOT NULL,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+
+    def _lock(self, cursor: Any) -> None:
+        # Evita que dois processos migrem o mesmo banco MySQL ao mesmo tempo
+        if self.dialect == 'mysql':
+            cursor.execute("SELECT GET_LOCK('agent_memory_migrations', 60)")
+            cursor.fetchone()
+
+    def _unlock(self, cursor: Any) -> None:
+        if self.dialect == 'mysql':
+            cursor.execute("SELECT RELEASE_LOCK('agent_memory_migrations')")
+            cursor.fetchone()
+
+    def migrate(self, conn: Any) -> int:
+        """Aplica as migrações pendentes e retorna a versão final do schema"""
+        version = self.current_version(conn)
+        if version >= self.latest_version:
+            return version
+
+        cursor = conn.cursor()
+        self._lock(cursor)
+        try:
+            self._create_version_table(cursor)
+            conn.commit()
+            # Relê a versão: outro processo pode ter migrado enquanto esperávamos
+            version = self.current_version(conn)
+            for migration in self.migrations:
+                if migration.version <= version:
+                    continue
+                self._apply(conn, migration)
+                version = migration.version
+                print(f"🗄️ Migração {migration.version} aplicada: {migration.description}")
+        finally:
+            self._unlock(cursor)
+        return version
+
+    def _apply(self, conn: Any, migration: Migration) -> None:
+        cursor = conn.cursor()
+        if self.dialect == 'sqlite':
+            cursor.execute('BEGIN IMMEDIATE')
+        try:
+            steps = migration.sqlite if self.dialect == 'sqlite' else migration.mysql
+            for step in steps:
+                if callable(step):
+                    step(cursor)
+                else:
+                    cursor.execute(step)
+            cursor.execute(
+                f'INSERT INTO schema_migrations (version, description) VALUES ({self.placeholder}, {self.placeholder})',
+                (migration.version, migration.description)
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+def migrate_sqlite(pool: Any) -> int:
+    """Migra o banco de um SQLiteConnectionPool (uma vez por pool)"""
+    if pool.schema_version is None or pool.schema_version < LATEST_VERSION:
+        pool.schema_version = MigrationRunner('sqlite').migrate(pool.get_connection())
+    return pool.schema_version
+
+def migrate_mysql(provider: Any) -> int:
+    """Migra o banco de um MySQLConnectionProvider (uma vez por provedor)"""
+    if provider.schema_version is None or provider.schema_version < LATEST_VERSION:
+        with provider.connection() as conn:
+            provider.schema_version = MigrationRunner('mysql').migrate(conn)
+    return provider.schema_version
@@ -0,0 +1,227 @@
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple, TypeVar
+import mysql.connector
+from mysql.connector import Error
+
+# Códigos de erro que indicam conexão perdida ("MySQL server has gone away" etc.)
+LOST_CONNECTION_ERRORS = frozenset({2006, 2013, 2055})
+
+T = TypeVar('T')
+
+class MySQLConnectionProvider:
+    """Provedor de conexões MySQL com pool compartilhado.
+
+    Um único provedor é compartilhado por DatabaseManager, IdentityManager e
+    ReminderSystem. Cada operação faz checkout de uma conexão (reentrante na
+    mesma thread), que é verificada com ping quando ficou ociosa por mais de
+    `health_check_interval` segundos e reconectada se o servidor a descartou.
+    Conexões ociosas por mais de `max_idle_time` são fechadas, para que o
+    processo não segure sockets parados durante longos períodos. Depois de
+    uma conexão perdida, todas as que estavam ociosas passam pelo ping no
+    próximo checkout, e run() repete uma vez a operação interrompida.
+    """
+
+    def __init__(self, host="localhost", user="root", password="", database="agent_memory",
+                 pool_size: int = 5, checkout_timeout: float = 10.0,
+                 health_check_interval: float = 30.0, max_idle_time: float = 300.0):
+        self._config: Dict[str, Any] = {
+            'host': host,
+            'user': user,
+            'password': password,
+            'database': database,
+            'autocommit': True
+        }
+        self.pool_size = pool_size
+        self.checkout_timeout = checkout_timeout
+        self.health_check_interval = health_check_interval
+        self.max_idle_time = max_idle_time
+
+        self._idle: "queue.LifoQueue[Tuple[Any, float]]" = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        # Momento da última conexão perdida: conexões ociosas de antes dele são verificadas
+        self._lost_at = 0.0
+        # Versão do schema já verificada por este provedor (ver database.migrations)
+        self.schema_version: Optional[int] = None
+
+    @classmethod
+    def from_env(cls, **overrides: Any) -> "MySQLConnectionProvider":
+        """Cria o provedor a partir das variáveis MYSQL_* do ambiente"""
+        config: Dict[str, Any] = {
+            'host': os.getenv("MYSQL_HOST", "localhost"),
+            'user': os.getenv("MYSQL_USER", "root"),
+            'password': os.getenv("MYSQL_PASSWORD", ""),
+            'database': os.getenv("MYSQL_DATABASE", "agent_memory"),
+            'pool_size': int(os.getenv("MYSQL_POOL_SIZE", "5"))
+        }
+        config.update(overrides)
+        return cls(**config)
+
+    def _connect(self) -> Any:
+        return mysql.connector.connect(**self._config)
+
+    def _discard(self, conn: Any) -> None:
+        try:
+            conn.close()
+        except Error:
+            pass
+        with self._lock:
+            self._created -= 1
+
+    def _acquire(self) -> Any:
+        try:
+            conn, last_used = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                can_create = self._created < self.pool_size
+                if can_create:
+                    self._created += 1
+            if can_create:
+                try:
+                    return self._connect()
+                except Error:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+            try:
+                conn, last_used = self._idle.get(timeout=self.checkout_timeout)
+            except queue.Empty:
+                raise Error(msg=f"Pool de conexões esgotado após {self.checkout_timeout}s")
+
+        # Health check apenas em conexões que ficaram ociosas ou são anteriores a uma queda
+        if time.monotonic() - last_used > self.health_check_interval or last_used <= self._lost_at:
+            try:
+                conn.ping(reconnect=True, attempts=3, delay=1)
+            except Error:
+                # Substitui a conexão morta mantendo a contagem do pool
+                try:
+                    conn.close()
+                except Error:
+                    pass
+                try:
+                    return self._connect()
+                except Error:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+        return conn
+
+    def _release(self, conn: Any) -> None:
+        self._idle.put((conn, time.monotonic()))
+        self._prune_idle()
+
+    def _prune_idle(self) -> None:
+        """Fecha conexões ociosas há mais de max_idle_time"""
+        now = time.monotonic()
+        keep = []
+        while True:
+            try:
+                conn, last_used = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if now - last_used > self.max_idle_time:
+                self._discard(conn)
+            else:
+                keep.append((conn, last_used))
+        # Reinsere da mais antiga para a mais recente (LIFO reutiliza a mais recente)
+        for item in sorted(keep, key=lambda item: item[1]):
+            self._idle.put(item)
+
+    @contextmanager
+    def connection(self) -> Iterator[Any]:
+        """Faz checkout de uma conexão para a thread atual (reentrante)"""
+        held = getattr(self._local, 'connection', None)
+        if held is not None:
+            self._local.depth += 1
+            try:
+                yield held
+            finally:
+                self._local.depth -= 1
+            return
+
+        conn = self._acquire()
+        self._local.connection = conn
+        self._local.depth = 1
+        lost = False
+        try:
+            yield conn
+        except Error as e:
+            lost = getattr(e, 'errno', None) in LOST_CONNECTION_ERRORS
+            raise
+        finally:
+            self._local.connection = None
+            self._local.depth = 0
+            if lost:
+                self._lost_at = time.monotonic()
+                self._discard(conn)
+            else:
+                self._release(conn)
+
+    @contextmanager
+    def transaction(self) -> Iterator[Any]:
+        """Executa um bloco em transação; blocos aninhados participam da transação externa"""
+        with self.connection() as conn:
+            if getattr(self._local, 'in_transaction', False):
+                yield conn
+                return
+            conn.start_transaction()
+            self._local.in_transaction = True
+            try:
+                yield conn
+                conn.commit()
+            except Exception:
+                try:
+                    conn.rollback()
+                except Error:
+                    pass
+                raise
+            finally:
+                self._local.in_transaction = False
+
+    def run(self, operation: Callable[[Any], T], transaction: bool = False) -> T:
+        """Executa operation(conn) em uma conexão do pool (em transação, se pedido).
+
+        Se a conexão cair antes do commit (ex.: o servidor a descartou dentro
+        de health_check_interval), o MySQL desfaz o que foi feito e a operação
+        é repetida uma vez com outra conexão. Uma queda durante o commit não é
+        repetida, porque não se sabe se ele foi aplicado; dentro de outro
+        checkout também não, pois quem decide é a operação externa.
+        """
+        retry = getattr(self._local, 'connection', None) is None
+        while True:
+            committing = False
+            try:
+                with (self.transaction() if transaction else self.connection()) as conn:
+                    result = operation(conn)
+                    committing = True
+                return result
+            except Error as e:
+                if not retry or committing or getattr(e, 'errno', None) not in LOST_CONNECTION_ERRORS:
+                    raise
+                retry = False
+                print(f"🔌 Conexão MySQL perdida ({e}); repetindo com uma nova conexão")
+
+    def close_all(self) -> None:
+        """Fecha todas as conexões ociosas do pool"""
+        while True:
+            try:
+                conn, _ = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(conn)
+
+_default_provider: Optional[MySQLConnectionProvider] = None
+_default_lock = threading.Lock()
+
+def get_default_provider(**config: Any) -> MySQLConnectionProvider:
+    """Retorna o provedor compartilhado do processo, criando-o na primeira chamada"""
+    global _default_provider
+    with _default_lock:
+        if _default_provider is None:
+            _default_provider = MySQLConnectionProvider.from_env(**config)
+        return _default_provider
@@ -0,0 +1,82 @@
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Iterator, List, Optional
+
+class SQLiteConnectionPool:
+    """Pool de conexões SQLite persistentes, uma conexão por thread.
+
+    Cada thread reutiliza sua própria conexão (evitando abrir o arquivo,
+    recarregar o schema e refazer o cache de statements a cada chamada).
+    As conexões são abertas em modo WAL, com nível de `synchronous`
+    configurável e cache de prepared statements do próprio sqlite3.
+    """
+
+    JOURNAL_MODES = ('DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL', 'OFF')
+    SYNCHRONOUS_LEVELS = ('OFF', 'NORMAL', 'FULL', 'EXTRA')
+
+    def __init__(self, db_path: str = "memory.db", journal_mode: str = "WAL",
+                 synchronous: str = "NORMAL", cached_statements: int = 256,
+                 timeout: float = 5.0):
+        journal_mode = journal_mode.upper()
+        synchronous = synchronous.upper()
+        if journal_mode not in self.JOURNAL_MODES:
+            raise ValueError(f"journal_mode inválido: {journal_mode}")
+        if synchronous not in self.SYNCHRONOUS_LEVELS:
+            raise ValueError(f"synchronous inválido: {synchronous}")
+
+        self.db_path = db_path
+        self.journal_mode = journal_mode
+        self.synchronous = synchronous
+        self.cached_statements = cached_statements
+        self.timeout = timeout
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections: List[sqlite3.Connection] = []
+        # Versão do schema já verificada por este pool (ver database.migrations)
+        self.schema_version: Optional[int] = None
+
+    def _create_connection(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.timeout,
+            cached_statements=self.cached_statements,
+            check_same_thread=False
+        )
+        conn.execute(f"PRAGMA journal_mode={self.journal_mode}")
+        conn.execute(f"PRAGMA synchronous={self.synchronous}")
+        return conn
+
+    def get_connection(self) -> sqlite3.Connection:
+        """Retorna a conexão da thread atual, criando-a na primeira chamada"""
+        conn = getattr(self._local, 'connection', None)
+        if conn is None:
+            conn = self._create_connection()
+            self._local.connection = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Executa um bloco em transação: commit no sucesso, rollback no erro"""
+        conn = self.get_connection()
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+    def close_all(self) -> None:
+        """Fecha todas as conexões abertas pelo pool"""
+        with self._lock:
+            connections = self._connections
+            self._connections = []
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+        self._local = threading.local()
@@ -0,0 +1,225 @@
+import base64
+import json
+import math
+import os
+import random
+import re
+import threading
+import unicodedata
+import zlib
+from array import array
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+EmbeddingFunction = Callable[[str], Sequence[float]]
+
+_WORD = re.compile(r"\w+")
+
+def _fold(text: str) -> str:
+    decomposed = unicodedata.normalize('NFKD', text.lower())
+    return ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+def hashing_embedding(text: str, dim: int = 256) -> List[float]:
+    """Embedding local e offline por feature hashing de palavras e trigramas de caracteres.
+
+    Não captura sinônimos como um modelo treinado, mas aproxima textos com
+    vocabulário parecido (inclusive com erros de transcrição e flexões).
+    Para embeddings melhores, passe outra função ao VectorIndex.
+    """
+    vector = [0.0] * dim
+    for word in _WORD.findall(_fold(text)):
+        features = [(word, 1.0)]
+        if len(word) > 3:
+            features += [(word[i:i + 3], 0.5) for i in range(len(word) - 2)]
+        for feature, weight in features:
+            digest = zlib.crc32(feature.encode('utf-8'))
+            sign = 1.0 if digest & 1 else -1.0
+            vector[(digest >> 1) % dim] += sign * weight
+    return vector
+
+def _normalize(vector: Sequence[float]) -> array:
+    norm = math.sqrt(sum(value * value for value in vector))
+    if norm == 0:
+        return array('f', vector)
+    return array('f', (value / norm for value in vector))
+
+class VectorIndex:
+    """Índice vetorial local com busca aproximada (LSH por hiperplanos aleatórios).
+
+    Os vetores ficam em memória e são persistidos em um arquivo append-only
+    ao lado do banco, de modo que cada inserção custa apenas uma linha no
+    disco. Itens novos entram em uma fila e só são embutidos no próximo
+    flush() (feito automaticamente pela busca), para que inserts em lote não
+    paguem o custo do embedding. A busca consulta os buckets LSH do vetor da
+    pergunta (e seus vizinhos de 1 bit) e reordena os candidatos por
+    similaridade de cosseno; com poucos candidatos, cai para busca exata.
+    """
+
+    def __init__(self, path: Optional[str] = None, embed: EmbeddingFunction = hashing_embedding,
+                 n_tables: int = 4, n_planes: int = 10, seed: int = 42):
+        self.path = path
+        self.embed = embed
+        self.n_tables = n_tables
+        self.n_planes = n_planes
+        self.seed = seed
+
+        self._lock = threading.Lock()
+        self._vectors: Dict[Tuple[str, int], array] = {}
+        self._tables: List[Dict[int, set]] = [{} for _ in range(n_tables)]
+        self._planes: Optional[List[List[array]]] = None
+        self._dim: Optional[int] = None
+        self._pending: List[Tuple[str, int, str]] = []
+
+        if path and os.path.exists(path):
+            self._load()
+
+    def __len__(self) -> int:
+        return len(self._vectors) + len(self._pending)
+
+    # ------------------------------------------------------------------
+    # LSH
+    # ------------------------------------------------------------------
+
+    def _ensure_planes(self, dim: int) -> None:
+        if self._planes is not None:
+            if dim != self._dim:
+                raise ValueError(f"Dimensão do embedding mudou: {self._dim} -> {dim}")
+            return
+        rng = random.Random(self.seed)
+        self._dim = dim
+        self._planes = [
+            [array('f', (rng.gauss(0.0, 1.0) for _ in range(dim))) for _ in range(self.n_planes)]
+            for _ in range(self.n_tables)
+        ]
+
+    @staticmethod
+    def _sparse(vector: array) -> List[Tuple[int, float]]:
+        """Componentes não nulos; embeddings por hashing têm poucos, o que barateia os produtos"""
+        return [(i, value) for i, value in enumerate(vector) if value]
+
+    @staticmethod
+    def _dot(sparse: List[Tuple[int, float]], dense: Sequence[float]) -> float:
+        return sum(value * dense[i] for i, value in sparse)
+
+    def _signatures(self, vector: array) -> List[int]:
+        assert self._planes is not None
+        sparse = self._sparse(vector)
+        signatures = []
+        for planes in self._planes:
+            signature = 0
+            for bit, plane in enumerate(planes):
+                if self._dot(sparse, plane) >= 0:
+                    signature |= 1 << bit
+            signatures.append(signature)
+        return signatures
+
+    # ------------------------------------------------------------------
+    # Escrita
+    # ------------------------------------------------------------------
+
+    def _insert(self, key: Tuple[str, int], vector: array) -> None:
+        self._ensure_planes(len(vector))
+        if key in self._vectors:
+            self._remove(key)
+        self._vectors[key] = vector
+        for table, signature in zip(self._tables, self._signatures(vector)):
+            table.setdefault(signature, set()).add(key)
+
+    def _remove(self, key: Tuple[str, int]) -> None:
+        vector = self._vectors.pop(key, None)
+        if vector is None:
+            return
+        for table, signature in zip(self._tables, self._signatures(vector)):
+            table.get(signature, set()).discard(key)
+
+    def add(self, kind: str, item_id: int, text: str) -> None:
+        """Agenda a indexação de um item (ex.: kind='event')"""
+        self.add_many([(kind, item_id, text)])
+
+    def max_id(self, kind: str) -> int:
+        """Maior id de um tipo já indexado ou na fila (0 se não há nenhum)"""
+        with self._lock:
+            ids = [item_id for item_kind, item_id in self._vectors if item_kind == kind]
+            ids += [item_id for item_kind, item_id, _ in self._pending if item_kind == kind]
+        return max(ids, default=0)
+
+    def add_many(self, items: Iterable[Tuple[str, int, str]]) -> None:
+        with self._lock:
+            self._pending.extend((kind, int(item_id), text) for kind, item_id, text in items)
+
+    def flush(self) -> None:
+        """Embute os itens pendentes e grava as novas linhas no arquivo do índice"""
+        with self._lock:
+            self._flush()
+
+    def _flush(self) -> None:
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, []
+        records = []
+        for kind, item_id, text in pending:
+            vector = _normalize(self.embed(text))
+            self._insert((kind, item_id), vector)
+            records.append({
+                'kind': kind,
+                'id': item_id,
+                'v': base64.b64encode(vector.tobytes()).decode('ascii')
+            })
+        if self.path:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.writelines(json.dumps(record) + '\n' for record in records)
+
+    def clear(self) -> None:
+        """Remove todos os vetores (inclusive do arquivo)"""
+        with self._lock:
+            self._vectors.clear()
+            self._pending = []
+            self._tables = [{} for _ in range(self.n_tables)]
+            if self.path and os.path.exists(self.path):
+                os.remove(self.path)
+
+    def _load(self) -> None:
+        assert self.path is not None
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    vector = array('f')
+                    vector.frombytes(base64.b64decode(record['v']))
+                except (ValueError, KeyError):
+                    # Linha truncada por queda do processo: ignora
+                    continue
+                self._insert((record['kind'], int(record['id'])), vector)
+
+    # ------------------------------------------------------------------
+    # Busca
+    # ------------------------------------------------------------------
+
+    def search(self, query: str, k: int = 5, kinds: Optional[Iterable[str]] = None,
+               min_score: float = 0.0) -> List[Dict[str, Any]]:
+        """Retorna até k itens mais similares: [{'kind', 'id', 'score'}, ...]"""
+        allowed = set(kinds) if kinds else None
+        vector = _normalize(self.embed(query))
+        with self._lock:
+            self._flush()
+            if not self._vectors:
+                return []
+            self._ensure_planes(len(vector))
+            candidates: set = set()
+            for table, signature in zip(self._tables, self._signatures(vector)):
+                candidates.update(table.get(signature, ()))
+                # Multi-probe: buckets a um bit de distância
+                for bit in range(self.n_planes):
+                    candidates.update(table.get(signature ^ (1 << bit), ()))
+            if allowed is not None:
+                candidates = {key for key in candidates if key[0] in allowed}
+            if len(candidates) < k:
+                candidates = {key for key in self._vectors if allowed is None or key[0] in allowed}
+            sparse = self._sparse(vector)
+            scored = [(self._dot(sparse, self._vectors[key]), key) for key in candidates]
+
+        scored.sort(key=lambda entry: entry[0], reverse=True)
+        return [
+            {'kind': key[0], 'id': key[1], 'score': round(score, 4)}
+            for score, key in scored[:k]
+            if score > min_score
+        ]
@@ -1,80 +1,159 @@
-import mysql.connector
+import threading
 from mysql.connector import Error
-from typing import Dict, List, Any, Optional, cast
+from typing import Dict, Iterable, List, Any, Optional, Sequence, Tuple, cast
 from datetime import datetime
-import re
+from database.mysql_pool import MySQLConnectionProvider
+from database.migrations import migrate_mysql
+from identity.name_extractor import extract_names, is_valid_person_name, name_key
+
+IDENTITY_FIELDS = ('id', 'name', 'role', 'relationship', 'preferences', 'notes', 'created_at', 'updated_at')
+
+def _row_to_identity(row: Any) -> Dict[str, Any]:
+    return dict(zip(IDENTITY_FIELDS, cast(Any, row)))
+
+def render_identity(identity: Dict[str, Any]) -> str:
+    """Linha de contexto do prompt para uma identidade"""
+    context = f"Pessoa: {identity['name']}"
+    if identity.get('role'):
+        context += f", Papel: {identity['role']}"
+    if identity.get('relationship'):
+        context += f", Relacionamento: {identity['relationship']}"
+    if identity.get('preferences'):
+        context += f", Preferências: {identity['preferences']}"
+    if identity.get('notes'):
+        context += f", Notas: {identity['notes']}"
+    return context
 
 class IdentityManager:
-    def __init__(self, host="localhost", user="root", password="", database="agent_memory"):
-        self.connection = mysql.connector.connect(
+    """Identidades (pessoas) conhecidas pelo assistente.
+
+    As identidades ficam em um cache em memória indexado por name_key,
+    aquecido na inicialização com uma única consulta. Leituras consultam o
+    cache antes do banco e cada escrita invalida os nomes que tocou, para
+    que a próxima leitura busque a linha atualizada. Nomes fora do cache são
+    buscados juntos (um SELECT ... IN por fala) e os novos são gravados com
+    um único INSERT ... ON DUPLICATE KEY UPDATE, apoiado no índice único de
+    identities.name (migração 5).
+
+    O texto de get_all_contexts também fica em cache: é montado a partir de
+    uma única consulta e só é refeito depois de uma escrita, de modo que
+    montar o prompt não faz I/O de identidades em regime permanente.
+    """
+
+    def __init__(self, host="localhost", user="root", password="", database="agent_memory",
+                 provider: Optional[MySQLConnectionProvider] = None, warm_cache: bool = True):
+        # Pool compartilhado com DatabaseManager e ReminderSystem quando fornecido
+        self.provider = provider or MySQLConnectionProvider(
             host=host,
             user=user,
             password=password,
             database=database
         )
+        self._cache: Dict[str, Dict[str, Any]] = {}
+        self._cache_lock = threading.Lock()
+        self._contexts: Optional[str] = None
+        # Incrementado a cada invalidação; recargas concorrentes com uma escrita são descartadas
+        self._generation = 0
         self.init_identity_table()
+        if warm_cache:
+            self.warm_cache()
 
     def init_identity_table(self) -> None:
         try:
-            cursor = self.connection.cursor()
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS identities (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    name VARCHAR(255) NOT NULL,
-                    role VARCHAR(100),
-                    relationship VARCHAR(100),
-                    preferences TEXT,
-                    notes TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
-                )
-            ''')
-            self.connection.commit()
+            # A tabela identities faz parte das migrações compartilhadas
+            migrate_mysql(self.provider)
         except Error as e:
             print(f"Erro ao inicializar tabela de identidades: {e}")
 
+    # ------------------------------------------------------------------
+    # Cache
+    # ------------------------------------------------------------------
+
+    def warm_cache(self) -> int:
+        """Carrega todas as identidades no cache; retorna quantas foram carregadas"""
+        loaded = self._reload()
+        return loaded[0] if loaded else 0
+
+    def _reload(self) -> Optional[Tuple[int, str]]:
+        """Uma consulta recarrega o cache e o contexto; retorna (quantidade, contexto)"""
+        with self._cache_lock:
+            generation = self._generation
+        try:
+            identities = self._fetch_all()
+        except Error as e:
+            print(f"Erro ao carregar identidades: {e}")
+            return None
+        contexts = "\n".join(render_identity(identity) for identity in identities)
+        with self._cache_lock:
+            if generation == self._generation:
+                self._cache = {name_key(identity['name']): identity for identity in identities}
+                self._contexts = contexts
+        return len(identities), contexts
+
+    def invalidate(self, names: Optional[Iterable[str]] = None) -> None:
+        """Descarta os nomes informados do cache (ou o cache inteiro)"""
+        with self._cache_lock:
+            self._generation += 1
+            self._contexts = None
+            if names is None:
+                self._cache.clear()
+                return
+            for name in names:
+                self._cache.pop(name_key(name), None)
+
+    # ------------------------------------------------------------------
+    # Escrita
+    # ------------------------------------------------------------------
+
     def add_identity(self, name: str, role: Optional[str] = None, relationship: Optional[str] = None,
                     preferences: Optional[str] = None, notes: Optional[str] = None) -> bool:
         try:
-            cursor = self.connection.cursor()
-            cursor.execute('''
-                INSERT INTO identities (name, role, relationship, preferences, notes)
-                VALUES (%s, %s, %s, %s, %s)
-            ''', (name, role, relationship, preferences, notes))
-            self.connection.commit()
+            with self.provider.transaction() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    INSERT INTO identities (name, role, relationship, preferences, notes)
+                    VALUES (%s, %s, %s, %s, %s)
+                ''', (name, role, relationship, preferences, notes))
             print(f"✅ Identidade '{name}' adicionada com sucesso!")
             return True
         except Error as e:
             print(f"Erro ao adicionar identidade: {e}")
             return False
+        finally:
+            self.invalidate([name])
 
-    def get_identity(self, name: str) -> Optional[Dict[str, Any]]:
+    def add_identities(self, identities: Sequence[Tuple[str, Optional[str]]]) -> bool:
+        """Grava vários pares (nome, relacionamento) em um único INSERT.
+
+        Um nome que já existe (inclusive gravado por outra sessão depois da
+        leitura) não é duplicado: o índice único transforma a linha em UPDATE,
+        que só preenche o relacionamento quando ele ainda está vazio.
+        """
+        if not identities:
+            return True
+        placeholders = ', '.join(['(%s, %s)'] * len(identities))
+        values = [value for name, relationship in identities for value in (name, relationship)]
         try:
-            cursor = self.connection.cursor()
-            cursor.execute('''
-                SELECT * FROM identities WHERE name = %s
-            ''', (name,))
-            row = cursor.fetchone()
-            if row:
-                row_data = cast(Any, row)
-                return {
-                    'id': row_data[0],
-                    'name': row_data[1],
-                    'role': row_data[2],
-                    'relationship': row_data[3],
-                    'preferences': row_data[4],
-                    'notes': row_data[5],
-                    'created_at': row_data[6],
-                    'updated_at': row_data[7]
-                }
-            return None
+            with self.provider.transaction() as conn:
+                cursor = conn.cursor()
+                # VALUES(col) está obsoleto desde o MySQL 8.0.20, mas o alias de
+                # linha (AS new ... new.col) só existe a partir do 8.0.19 e não
+                # no MariaDB; VALUES() funciona em todos (no 8.0 só gera aviso)
+                cursor.execute(f'''
+                    INSERT INTO identities (name, relationship)
+                    VALUES {placeholders}
+                    ON DUPLICATE KEY UPDATE relationship = COALESCE(relationship, VALUES(relationship))
+                ''', values)
+            print(f"✅ Identidades gravadas: {', '.join(name for name, _ in identities)}")
+            return True
         except Error as e:
-            print(f"Erro ao buscar identidade: {e}")
-            return None
+            print(f"Erro ao adicionar identidades: {e}")
+            return False
+        finally:
+            self.invalidate(name for name, _ in identities)
 
     def update_identity(self, name: str, **kwargs: Any) -> bool:
         try:
-            cursor = self.connection.cursor()
             update_fields = []
             values = []
             for field, value in kwargs.items():
@@ -89,8 +168,12 @@ class IdentityManager:
                     SET {', '.join(update_fields)}, updated_at = %s
                     WHERE name = %s
                 '''
-                cursor.execute(query, values)
-                self.connection.commit()
+                try:
+                    with self.provider.transaction() as conn:
+                        cursor = conn.cursor()
+                        cursor.execute(query, values)
+                finally:
+                    self.invalidate([name])
                 print(f"✅ Identidade '{name}' atualizada!")
                 return True
             return False
@@ -98,26 +181,56 @@ class IdentityManager:
             print(f"Erro ao atualizar identidade: {e}")
             return False
 
-    def get_all_identities(self) -> List[Dict[str, Any]]:
+    # ------------------------------------------------------------------
+    # Leitura
+    # ------------------------------------------------------------------
+
+    def get_identity(self, name: str) -> Optional[Dict[str, Any]]:
+        return self.get_identities([name]).get(name_key(name))
+
+    def get_identities(self, names: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Identidades existentes entre os nomes, indexadas por name_key.
+
+        Nomes em cache não vão ao banco; os demais são buscados juntos em um
+        único SELECT ... WHERE name IN (...).
+        """
+        keys = {name_key(name): name for name in names}
+        with self._cache_lock:
+            found = {key: dict(self._cache[key]) for key in keys if key in self._cache}
+        missing = [name for key, name in keys.items() if key not in found]
+        if not missing:
+            return found
         try:
-            cursor = self.connection.cursor()
+            with self.provider.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(f'''
+                    SELECT * FROM identities WHERE name IN ({', '.join(['%s'] * len(missing))})
+                ''', missing)
+                rows = cursor.fetchall()
+        except Error as e:
+            print(f"Erro ao buscar identidade: {e}")
+            return found
+        with self._cache_lock:
+            for row in rows:
+                identity = _row_to_identity(row)
+                key = name_key(identity['name'])
+                self._cache[key] = identity
+                if key in keys:
+                    found[key] = dict(identity)
+        return found
+
+    def _fetch_all(self) -> List[Dict[str, Any]]:
+        with self.provider.connection() as conn:
+            cursor = conn.cursor()
             cursor.execute('''
                 SELECT * FROM identities ORDER BY name
             ''')
-            identities = []
-            for row in cursor.fetchall():
-                row_data = cast(Any, row)
-                identities.append({
-                    'id': row_data[0],
-                    'name': row_data[1],
-                    'role': row_data[2],
-                    'relationship': row_data[3],
-                    'preferences': row_data[4],
-                    'notes': row_data[5],
-                    'created_at': row_data[6],
-                    'updated_at': row_data[7]
-                })
-            return identities
+            rows = cursor.fetchall()
+        return [_row_to_identity(row) for row in rows]
+
+    def get_all_identities(self) -> List[Dict[str, Any]]:
+        try:
+            return self._fetch_all()
         except Error as e:
             print(f"Erro ao buscar identidades: {e}")
             return []
@@ -126,43 +239,37 @@ class IdentityManager:
         """Extrai informações de identidade do texto"""
         identities = []
         try:
-            # Padrões para reconhecer pessoas
-            patterns = [
-                r'(?:meu|minha)\s+(?:amigo|amiga|irmão|irmã|pai|mãe|filho|filha|marido|esposa|namorado|namorada|colega|vizinho|professor|médico)\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)',
-                r'([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s+(?:é|é meu|é minha)\s+(amigo|amiga|irmão|irmã|pai|mãe|filho|filha|marido|esposa|namorado|namorada)',
-                r'([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s+(?:trabalha|estuda|mora|gosta|prefere|está|foi|vai)\s+',
-                r'(?:conheci|encontrei|falei com|visitei|chamei)\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)',
-                r'([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s+(?:disse|falou|mencionou|contou|explicou)',
-                r'(?:reunião|almoço|jantar|encontro|conversa)\s+(?:com|entre)\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)'
-            ]
-
-            for pattern in patterns:
-                matches = re.findall(pattern, text)
-                for match in matches:
-                    if isinstance(match, tuple):
-                        name = match[0]
-                        relationship = match[1] if len(match) > 1 else None
-                    else:
-                        name = match
-                        relationship = None
-
-                    # Verifica se já existe
-                    existing = self.get_identity(name)
-                    if not existing:
-                        # Adiciona nova identidade
-                        self.add_identity(name, relationship=relationship)
-                        identities.append({
-                            'name': name,
-                            'relationship': relationship,
-                            'action': 'added'
-                        })
-                    else:
-                        identities.append({
-                            'name': name,
-                            'relationship': existing.get('relationship'),
-                            'action': 'found'
-                        })
+            # Uma passada da alternação compilada; palavras que não são nomes
+            # (is_valid_person_name) já são descartadas pelo extrator
+            names = extract_names(text)
+            if not names:
+                return []
+
+            # Uma consulta em lote para a fala inteira (nenhuma se tudo está em cache)
+            existing = self.get_identities(name for name, _ in names)
+            new: List[Tuple[str, Optional[str]]] = []
+            seen = set()
+            for name, relationship in names:
+                key = name_key(name)
+                if key in seen:
+                    continue
+                seen.add(key)
+                if key in existing:
+                    identities.append({
+                        'name': name,
+                        'relationship': existing[key].get('relationship'),
+                        'action': 'found'
+                    })
+                else:
+                    new.append((name, relationship))
+                    identities.append({
+                        'name': name,
+                        'relationship': relationship,
+                        'action': 'added'
+                    })
 
+            # Um único INSERT para todos os nomes novos
+            self.add_identities(new)
             return identities
         except Exception as e:
             print(f"Erro ao extrair identidades: {e}")
@@ -170,44 +277,25 @@ class IdentityManager:
 
     def _is_valid_person_name(self, name: str) -> bool:
         """Verifica se o nome é válido para uma pessoa"""
-        # Remove palavras que não são nomes de pessoas
-        invalid_words = ['hoje', 'amanhã', 'ontem', 'agora', 'depois', 'antes', 'sempre', 'nunca']
-        return name.lower() not in invalid_words and len(name) > 1
+        return is_valid_person_name(name)
 
     def get_context_for_identity(self, name: str) -> str:
         """Retorna contexto para uma identidade específica"""
         try:
             identity = self.get_identity(name)
-            if identity:
-                context = f"Pessoa: {identity['name']}"
-                if identity.get('role'):
-                    context += f", Papel: {identity['role']}"
-                if identity.get('relationship'):
-                    context += f", Relacionamento: {identity['relationship']}"
-                if identity.get('preferences'):
-                    context += f", Preferências: {identity['preferences']}"
-                if identity.get('notes'):
-                    context += f", Notas: {identity['notes']}"
-                return context
-            return ""
+            return render_identity(identity) if identity else ""
         except Exception as e:
             print(f"Erro ao buscar contexto da identidade: {e}")
             return ""
 
     def get_all_contexts(self) -> str:
-        """Retorna contexto de todas as identidades"""
+        """Retorna contexto de todas as identidades (do cache, refeito após escritas)"""
         try:
-            identities = self.get_all_identities()
-            if not identities:
-                return ""
-
-            contexts = []
-            for identity in identities:
-                context = self.get_context_for_identity(identity['name'])
-                if context:
-                    contexts.append(context)
-
-            return "\n".join(contexts)
+            with self._cache_lock:
+                if self._contexts is not None:
+                    return self._contexts
+            loaded = self._reload()
+            return loaded[1] if loaded else ""
         except Exception as e:
             print(f"Erro ao buscar todos os contextos: {e}")
             return ""
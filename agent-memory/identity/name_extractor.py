@@ -0,0 +1,78 @@
+import re
+import unicodedata
+from typing import Dict, List, Optional, Tuple
+
+# Nome próprio: palavras capitalizadas em sequência (com acentos, ex.: "João", "Ângela Maria")
+_NAME = r'[A-ZÀ-ÖØ-Þ][a-zß-öø-ÿ]+(?:\s+[A-ZÀ-ÖØ-Þ][a-zß-öø-ÿ]+)*'
+_FAMILY = 'amigo|amiga|irmão|irmã|pai|mãe|filho|filha|marido|esposa|namorado|namorada'
+_RELATIONSHIP = _FAMILY + '|colega|vizinho|professor|médico'
+
+def _opening(*words: str) -> str:
+    """Alternação que aceita a palavra também com inicial maiúscula (início de frase)"""
+    return '|'.join(f'[{word[0]}{word[0].upper()}]{word[1:]}' for word in words)
+
+# Os seis padrões originais em uma única alternação, compilada uma vez. Os
+# três que começam pelo nome compartilham o prefixo, que é casado uma só vez;
+# os demais começam por um verbo ou por "meu/minha", que podem abrir a frase.
+IDENTITY_PATTERN = re.compile(
+    r'\b(?:'
+    rf'(?P<name>{_NAME})\s+(?:'
+    rf'(?:é|é meu|é minha)\s+(?P<rel>{_FAMILY})'
+    r'|(?:trabalha|estuda|mora|gosta|prefere|está|foi|vai)\s+'
+    r'|(?:disse|falou|mencionou|contou|explicou))'
+    rf'|(?:{_opening("meu", "minha")})\s+(?P<rel_before>{_RELATIONSHIP})\s+(?P<name_after_rel>{_NAME})'
+    rf'|(?:{_opening("conheci", "encontrei", "falei com", "visitei", "chamei")}'
+    rf'|(?:{_opening("reunião", "almoço", "jantar", "encontro", "conversa")})\s+(?:com|entre))'
+    rf'\s+(?P<name_after_verb>{_NAME})'
+    r')'
+)
+
+# Palavras capitalizadas no início de frases que não são nomes de pessoas
+INVALID_NAME_WORDS = frozenset([
+    'hoje', 'amanhã', 'ontem', 'agora', 'depois', 'antes', 'sempre', 'nunca',
+    'ele', 'ela', 'eles', 'elas', 'eu', 'nós', 'você', 'vocês', 'isso', 'isto', 'aquilo',
+    'aqui', 'lá', 'também', 'mas', 'então', 'quando', 'ainda', 'já', 'semana', 'mês', 'ano'
+])
+
+def is_valid_person_name(name: str) -> bool:
+    """Verifica se o nome é válido para uma pessoa"""
+    return name.lower() not in INVALID_NAME_WORDS and len(name) > 1
+
+def clean_name(name: str) -> Optional[str]:
+    """Remove palavras que não são nomes das pontas (ex.: "Hoje João" -> "João")"""
+    words = name.split()
+    while words and not is_valid_person_name(words[0]):
+        words.pop(0)
+    while words and not is_valid_person_name(words[-1]):
+        words.pop()
+    return ' '.join(words) or None
+
+def name_key(name: str) -> str:
+    """Chave de comparação do nome: minúsculas, sem acentos e com espaços simples.
+
+    Segue a collation padrão da coluna identities.name no MySQL, em que
+    "João" e "joao" colidem no índice único.
+    """
+    decomposed = unicodedata.normalize('NFKD', ' '.join(name.split()).lower())
+    return ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+def extract_names(text: str) -> List[Tuple[str, Optional[str]]]:
+    """Nomes de pessoas mencionados no texto e o relacionamento, se dito.
+
+    Uma única passada da alternação compilada; cada nome aparece uma vez,
+    na ordem em que surge, com o primeiro relacionamento encontrado.
+    """
+    # Todos os padrões exigem uma letra maiúscula: texto sem nenhuma não tem nomes
+    if not text or text.islower():
+        return []
+
+    found: Dict[str, Optional[str]] = {}
+    for match in IDENTITY_PATTERN.finditer(text):
+        name, relationship, rel_before, name_after_rel, name_after_verb = match.groups()
+        name = clean_name(name or name_after_rel or name_after_verb)
+        if not name:
+            continue
+        relationship = relationship or rel_before
+        if name not in found or (relationship and not found[name]):
+            found[name] = relationship
+    return list(found.items())
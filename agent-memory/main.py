@@ -2,15 +2,18 @@ from openai import OpenAI
 from dotenv import load_dotenv
 from dotenv import find_dotenv
 import os
-from utils.record_audio import record_audio
-from utils.basemodel2tool import base_model2tool
+from utils.record_audio import record_utterance
+from utils.transcription import transcribe
+from utils.tool_registry import registry
 from tools.daily_events import DailyEvents
 from datetime import datetime
 import json
+from context.context_builder import ContextBuilder
 
 load_dotenv(find_dotenv())
 
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+context_builder = ContextBuilder(max_tokens=int(os.getenv("CONTEXT_MAX_TOKENS", "1500")))
 
 print("🎤 Assistente de Memória Iniciado!")
 print("💡 Dica: Diga 'sair' ou 'quit' para encerrar a aplicação")
@@ -22,31 +25,12 @@ while True:
         "interactions": []
     } if not os.path.exists("memory.json") else json.load(open("memory.json"))
 
-    filename_audio = record_audio()
+    # Áudio gravado e codificado em memória, enviado sem arquivo em disco
+    audio = record_utterance()
+    if not audio:
+        continue
 
-    with open(filename_audio, "rb") as audio_file:
-        transcription = client.audio.transcriptions.create(
-            model="whisper-1",
-            file=audio_file,
-            language="pt"
-        )
-
-    # Aguarda um pouco antes de tentar deletar o arquivo
-    import time
-    time.sleep(0.5)
-
-    try:
-        os.remove(filename_audio)
-    except PermissionError:
-        print(f"⚠️ Não foi possível deletar {filename_audio} - arquivo ainda em uso")
-        # Tenta deletar novamente após mais tempo
-        time.sleep(1)
-        try:
-            os.remove(filename_audio)
-        except PermissionError:
-            print(f"⚠️ Arquivo {filename_audio} não foi deletado automaticamente")
-
-    text = transcription.text.lower().strip()
+    text = transcribe(client, audio).lower().strip()
 
     print(f"🎤 Você disse: {text}")
 
@@ -62,17 +46,22 @@ while True:
 
     actual_date = datetime.now().strftime("%d/%m/%Y")
 
+    # Envia só a parte da memória que cabe no orçamento de tokens (mais recentes primeiro)
+    bundle = context_builder.build(
+        text,
+        events=list(reversed(memory["events"])),
+        interactions=list(reversed(memory["interactions"]))
+    )
+
     completion = client.chat.completions.create(
     model="gpt-4o",
     messages=[
         {"role": "developer", "content": f"You are a helpful assistant. You are responsible for remembering events of my life. Today is {actual_date} use this as a reference to remember events. If the event occurred in the past, you should use the date to remember the event using today's date as a reference."},
-        {"role": "assistant", "content": json.dumps(memory)},
+        {"role": "assistant", "content": bundle.text},
         {"role": "user", "content": text}
     ],
     tool_choice="auto",
-    tools=[
-        base_model2tool(DailyEvents)  # type: ignore
-        ]
+    tools=registry.tools(DailyEvents)  # type: ignore
     )
 
     if completion.choices[0].message.tool_calls:
@@ -0,0 +1,186 @@
+from openai import AsyncOpenAI
+import asyncio
+import os
+from functools import partial
+from database.async_adapter import AsyncAdapter, database_executor
+from main_enhanced import EnhancedMemoryAssistant
+from utils.audio_encoding import EncodedAudio
+from utils.transcription import transcribe_async
+from typing import Any, Callable, Dict, Optional
+
+class AsyncEnhancedMemoryAssistant(EnhancedMemoryAssistant):
+    """Assistente de memória sobre asyncio: várias sessões em um só processo.
+
+    As chamadas à OpenAI usam o cliente assíncrono, o banco é acessado por
+    adaptadores que rodam os gerenciadores existentes em um executor do
+    tamanho do pool MySQL, e os lembretes são uma tarefa do laço de eventos.
+    Falas de uma mesma sessão são tratadas em ordem; sessões diferentes
+    avançam em paralelo e compartilham a mesma memória.
+    """
+
+    def __init__(self, reminder_interval: float = 60.0):
+        super().__init__(start_reminders=False)
+        self.async_client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        # Uma thread por conexão: o banco nunca recebe mais consultas simultâneas que o pool
+        self.executor = database_executor(self.db_provider.pool_size)
+        self.db = AsyncAdapter(self.db_manager, self.executor)
+        self.identities = AsyncAdapter(self.identity_manager, self.executor)
+        self.reminders = AsyncAdapter(self.reminder_system, self.executor)
+        self.reminder_interval = reminder_interval
+        self.reminder_task: Optional[asyncio.Task] = None
+        self.reminder_wakeup: Optional[asyncio.Event] = None
+        self._wake_reminder_loop: Optional[Callable[[], None]] = None
+        self._session_locks: Dict[str, asyncio.Lock] = {}
+
+    async def start(self) -> None:
+        """Agenda o laço de lembretes no laço de eventos atual"""
+        if self.reminder_task is None:
+            # Lembretes agendados por outras threads (save_events no executor)
+            # acordam o laço pelo laço de eventos, sem esperar o intervalo
+            loop = asyncio.get_running_loop()
+            self.reminder_wakeup = asyncio.Event()
+            self._wake_reminder_loop = partial(loop.call_soon_threadsafe, self.reminder_wakeup.set)
+            self.reminder_system.add_wakeup_listener(self._wake_reminder_loop)
+            self.reminder_task = asyncio.create_task(self.reminder_loop())
+            print("🔔 Sistema de lembretes iniciado!")
+
+    async def close(self) -> None:
+        """Cancela os lembretes e libera o executor do banco"""
+        print(f"🧭 Estratégia de ferramenta: {self.tool_strategy.stats.report()}")
+        self.tool_strategy.persist()
+        if self.reminder_task is not None:
+            self.reminder_task.cancel()
+            try:
+                await self.reminder_task
+            except asyncio.CancelledError:
+                pass
+            self.reminder_task = None
+            print("🔔 Sistema de lembretes parado!")
+        if self._wake_reminder_loop is not None:
+            self.reminder_system.remove_wakeup_listener(self._wake_reminder_loop)
+            self._wake_reminder_loop = None
+        # Esperar as chamadas ao banco em andamento bloquearia o laço: a espera roda em outra thread
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.executor.shutdown)
+        await loop.run_in_executor(None, self.db_manager.close)
+
+    async def reminder_loop(self) -> None:
+        """Espera o próximo lembrete (no máximo reminder_interval segundos) e o entrega.
+
+        Um lembrete agendado antes do prazo atual acorda a espera por
+        reminder_wakeup, então ele não fica preso atrás de um sono longo.
+        """
+        if self.reminder_wakeup is None:
+            self.reminder_wakeup = asyncio.Event()
+        while True:
+            # Limpo antes de consultar a agenda: um agendamento durante run_pending não se perde
+            self.reminder_wakeup.clear()
+            try:
+                delay = await self.reminders.run_pending()
+            except Exception as e:
+                print(f"Erro no sistema de lembretes: {e}")
+                delay = None
+            timeout = self.reminder_interval if delay is None else min(delay, self.reminder_interval)
+            try:
+                await asyncio.wait_for(self.reminder_wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def process_audio_async(self, audio: EncodedAudio) -> str:
+        """Transcreve o áudio com o cliente assíncrono"""
+        try:
+            return await transcribe_async(self.async_client, audio)
+        except Exception as e:
+            print(f"❌ Erro ao processar áudio: {e}")
+            return ""
+
+    async def get_context_async(self, text: str = "") -> Dict[str, Any]:
+        """Obtém o contexto da memória com as consultas em paralelo"""
+        memory_context, hits, identity_context = await asyncio.gather(
+            self.db.get_memory_context(),
+            self.db.semantic_search(text, k=5) if text else asyncio.sleep(0, result=[]),
+            self.identities.get_all_contexts()
+        )
+        for hit in hits:
+            key = 'events' if hit['kind'] == 'event' else 'interactions'
+            if all(item['id'] != hit['id'] for item in memory_context[key]):
+                memory_context[key].append(hit)
+
+        return {
+            'memory': memory_context,
+            'identities': identity_context
+        }
+
+    async def think_async(self, text: str) -> Optional[Any]:
+        """Identidades, contexto e chamada ao modelo sem bloquear o laço; retorna a completion"""
+        identities = await self.identities.extract_identities_from_text(text)
+        if identities:
+            print(f"👥 Identidades reconhecidas: {len(identities)}")
+
+        context = await self.get_context_async(text)
+
+        decision = self.decide_tool(text)
+        try:
+            completion = await self.async_client.chat.completions.create(
+                **self.build_ai_request(text, context, decision.tool_choice))
+        except Exception as e:
+            print(f"❌ Erro ao processar com IA: {e}")
+            return None
+
+        # Sinais ambíguos e a IA não usou a ferramenta: força o uso
+        fell_back = self.needs_fallback(decision, completion)
+        if fell_back:
+            print("🔧 Detectei possíveis eventos. Forçando uso da ferramenta...")
+            try:
+                completion = await self.async_client.chat.completions.create(**self.build_forced_request(text))
+            except Exception as e:
+                print(f"❌ Erro ao processar com IA forçada: {e}")
+
+        self.record_tool_outcome(decision, bool(completion.choices[0].message.tool_calls) and not fell_back, fell_back)
+        return completion
+
+    async def handle_text(self, text: str, session_id: str = "default") -> str:
+        """Processa uma fala de uma sessão e retorna a resposta do assistente"""
+        lock = self._session_locks.setdefault(session_id, asyncio.Lock())
+        async with lock:
+            completion = await self.think_async(text)
+            if completion is None:
+                return ""
+            return await self.db.run(self.persist_stage, text, completion)
+
+    async def run(self) -> None:  # type: ignore[override]
+        """Loop de voz da sessão local; outras sessões podem usar handle_text no mesmo laço"""
+        print("🎤 Diga 'sair' para encerrar a aplicação")
+        print("-" * 50)
+        await self.start()
+        try:
+            while True:
+                try:
+                    audio = await asyncio.to_thread(self.capture_stage)
+                    if not audio:
+                        continue
+
+                    text = await self.process_audio_async(audio)
+                    if not text:
+                        print("❌ Erro ao processar áudio")
+                        continue
+                    text = text.lower().strip()
+                    print(f"🎤 Você disse: {text}")
+
+                    if self.is_exit_command(text):
+                        print("👋 Encerrando aplicação...")
+                        break
+
+                    await self.handle_text(text, session_id="local")
+
+                except Exception as e:
+                    print(f"❌ Erro inesperado: {e}")
+                    continue
+        finally:
+            await self.close()
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(AsyncEnhancedMemoryAssistant().run())
+    except KeyboardInterrupt:
+        print("\n👋 Encerrando aplicação...")
@@ -2,31 +2,58 @@ from openai import OpenAI
 from dotenv import load_dotenv
 from dotenv import find_dotenv
 import os
-from utils.record_audio import record_audio
-from utils.basemodel2tool import base_model2tool
-from tools.daily_events import DailyEvents
+from utils.record_audio import record_utterance
+from utils.audio_encoding import AudioEncoder, EncodedAudio
+from utils.transcription import transcribe
+from utils.pipeline import STOP, Pipeline
+from utils.json_stream import StreamedCompletion, consume_stream
+from utils.tool_registry import registry
+from tools.daily_events import DailyEvents, Event
+from tools.event_normalizer import normalize_event, normalize_events
+from tools.tool_strategy import ToolDecision, ToolStrategy, has_event_keywords
 # Requer: pip install mysql-connector-python
 from database.database_mysql import DatabaseManager
+from database.mysql_pool import get_default_provider
+from database.vector_index import VectorIndex
 from notifications.reminder_system import ReminderSystem
 from identity.identity_manager import IdentityManager
+from context.context_builder import ContextBuilder
 from datetime import datetime
 import json
-import threading
-import time
-from typing import Dict, Any, Optional
+import sys
+from typing import Dict, Any, List, Optional, Tuple, Union
 
 # Carrega variáveis de ambiente
 load_dotenv(find_dotenv())
 
 class EnhancedMemoryAssistant:
-    def __init__(self):
+    def __init__(self, start_reminders: bool = True):
         self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-        self.db_manager = DatabaseManager()
-        self.reminder_system = ReminderSystem()
-        self.identity_manager = IdentityManager()
-
-        # Inicia sistema de lembretes
-        self.reminder_system.start()
+        # Um único pool de conexões MySQL compartilhado pelos três gerenciadores
+        self.db_provider = get_default_provider()
+        # Índice semântico local persistido em disco (busca por significado)
+        self.db_manager = DatabaseManager(
+            provider=self.db_provider,
+            vector_index=VectorIndex(os.getenv("VECTOR_INDEX_PATH", "memory_vectors.vec"))
+        )
+        self.reminder_system = ReminderSystem(provider=self.db_provider)
+        # Lembretes criados junto com os eventos entram direto na agenda
+        self.db_manager.reminder_listener = self.reminder_system.schedule_many
+        self.identity_manager = IdentityManager(provider=self.db_provider)
+        # Contexto do prompt limitado por orçamento de tokens
+        self.context_builder = ContextBuilder(max_tokens=int(os.getenv("CONTEXT_MAX_TOKENS", "1500")))
+        # Codificação do áudio enviado para transcrição (AUDIO_CODEC, AUDIO_SAMPLE_RATE)
+        self.audio_encoder = AudioEncoder.from_env()
+        # Classificador local que escolhe o tool_choice antes da chamada à IA
+        self.tool_strategy = ToolStrategy.from_env()
+        # Respostas da IA em stream: texto e eventos aparecem (e são salvos) conforme chegam
+        self.streaming = os.getenv("STREAM_MODE") == "1"
+        # Modo strict da OpenAI: argumentos da ferramenta sempre seguem o schema
+        self.strict_tools = os.getenv("TOOL_STRICT") == "1"
+
+        # Inicia sistema de lembretes (a versão assíncrona roda o laço como tarefa)
+        if start_reminders:
+            self.reminder_system.start()
 
         print("🚀 Assistente de Memória Avançado Iniciado!")
         print("💡 Funcionalidades:")
@@ -37,30 +64,10 @@ class EnhancedMemoryAssistant:
         print("   🎤 Interface por voz")
         print("-" * 50)
 
-    def process_audio(self, filename_audio: str) -> str:
-        """Processa áudio e retorna transcrição"""
+    def process_audio(self, audio: EncodedAudio) -> str:
+        """Transcreve o áudio gravado (enviado direto da memória) e retorna o texto"""
         try:
-            with open(filename_audio, "rb") as audio_file:
-                transcription = self.client.audio.transcriptions.create(
-                    model="whisper-1",
-                    file=audio_file,
-                    language="pt"
-                )
-
-            # Aguarda um pouco antes de tentar deletar o arquivo
-            time.sleep(0.5)
-
-            try:
-                os.remove(filename_audio)
-            except PermissionError:
-                print(f"⚠️ Não foi possível deletar {filename_audio} - arquivo ainda em uso")
-                time.sleep(1)
-                try:
-                    os.remove(filename_audio)
-                except PermissionError:
-                    print(f"⚠️ Arquivo {filename_audio} não foi deletado automaticamente")
-
-            return transcription.text
+            return transcribe(self.client, audio)
 
         except Exception as e:
             error_msg = str(e)
@@ -73,22 +80,21 @@ class EnhancedMemoryAssistant:
             else:
                 print(f"❌ Erro ao processar áudio: {e}")
 
-            # Tenta deletar o arquivo mesmo em caso de erro
-            try:
-                if os.path.exists(filename_audio):
-                    os.remove(filename_audio)
-            except:
-                pass
-
             return ""
 
     def extract_identities(self, text: str) -> list:
         """Extrai identidades do texto"""
         return self.identity_manager.extract_identities_from_text(text)
 
-    def get_context(self) -> Dict[str, Any]:
+    def get_context(self, text: str = "") -> Dict[str, Any]:
         """Obtém contexto completo da memória"""
         memory_context = self.db_manager.get_memory_context()
+        if text:
+            # Soma às lembranças recentes as mais próximas da fala, mesmo que antigas
+            for hit in self.db_manager.semantic_search(text, k=5):
+                key = 'events' if hit['kind'] == 'event' else 'interactions'
+                if all(item['id'] != hit['id'] for item in memory_context[key]):
+                    memory_context[key].append(hit)
         identity_context = self.identity_manager.get_all_contexts()
 
         return {
@@ -96,19 +102,26 @@ class EnhancedMemoryAssistant:
             'identities': identity_context
         }
 
-    def process_with_ai(self, text: str, context: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-        """Processa texto com IA usando contexto completo"""
+    def build_ai_request(self, text: str, context: Dict[str, Any],
+                         tool_choice: Union[str, Dict[str, Any]] = "auto") -> Dict[str, Any]:
+        """Monta os parâmetros da chamada ao modelo com o contexto da memória"""
         actual_date = datetime.now().strftime("%d/%m/%Y")
 
+        # Seleciona apenas o contexto mais relevante para esta fala
+        bundle = self.context_builder.build(
+            text,
+            events=context['memory'].get('events', []),
+            interactions=context['memory'].get('interactions', []),
+            identities=context['identities']
+        )
+        print(f"🧮 Contexto: {bundle.report()}")
+
         # Constrói prompt com contexto
         context_prompt = f"""
         Você é um assistente de memória pessoal avançado. Hoje é {actual_date}.
 
         CONTEXTO DA MEMÓRIA:
-        {json.dumps(context['memory'], indent=2, ensure_ascii=False)}
-
-        IDENTIDADES CONHECIDAS:
-        {context['identities']}
+        {bundle.text or "(vazio)"}
 
         REGRAS CRÍTICAS:
         1. SEMPRE use a ferramenta DailyEvents quando mencionar eventos, datas ou localizações
@@ -157,16 +170,21 @@ class EnhancedMemoryAssistant:
         }}
         """
 
+        return {
+            'model': "gpt-4o",
+            'messages': [
+                {"role": "system", "content": context_prompt},
+                {"role": "user", "content": text}
+            ],
+            'tool_choice': tool_choice,
+            'tools': registry.tools(DailyEvents, strict=self.strict_tools)  # type: ignore
+        }
+
+    def process_with_ai(self, text: str, context: Dict[str, Any],
+                        tool_choice: Union[str, Dict[str, Any]] = "auto") -> Optional[Dict[str, Any]]:
+        """Processa texto com IA usando contexto completo"""
         try:
-            completion = self.client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {"role": "system", "content": context_prompt},
-                    {"role": "user", "content": text}
-                ],
-                tool_choice="auto",
-                tools=[base_model2tool(DailyEvents)]  # type: ignore
-            )
+            completion = self.client.chat.completions.create(**self.build_ai_request(text, context, tool_choice))
 
             return {
                 'completion': completion,
@@ -178,8 +196,8 @@ class EnhancedMemoryAssistant:
             print(f"❌ Erro ao processar com IA: {e}")
             return None
 
-    def process_with_ai_forced(self, text: str, context: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-        """Processa texto com IA forçando o uso da ferramenta DailyEvents"""
+    def build_forced_request(self, text: str) -> Dict[str, Any]:
+        """Monta os parâmetros da chamada que obriga o uso da ferramenta DailyEvents"""
         actual_date = datetime.now().strftime("%d/%m/%Y")
 
         forced_prompt = f"""
@@ -211,16 +229,20 @@ class EnhancedMemoryAssistant:
         NÃO RESPONDA COMO CONVERSA NORMAL. USE APENAS A FERRAMENTA DailyEvents!
         """
 
+        return {
+            'model': "gpt-4o",
+            'messages': [
+                {"role": "system", "content": forced_prompt},
+                {"role": "user", "content": text}
+            ],
+            'tool_choice': {"type": "function", "function": {"name": "DailyEvents"}},
+            'tools': registry.tools(DailyEvents, strict=self.strict_tools)  # type: ignore
+        }
+
+    def process_with_ai_forced(self, text: str, context: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Processa texto com IA forçando o uso da ferramenta DailyEvents"""
         try:
-            completion = self.client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {"role": "system", "content": forced_prompt},
-                    {"role": "user", "content": text}
-                ],
-                tool_choice={"type": "function", "function": {"name": "DailyEvents"}},
-                tools=[base_model2tool(DailyEvents)]  # type: ignore
-            )
+            completion = self.client.chat.completions.create(**self.build_forced_request(text))
 
             return {
                 'completion': completion,
@@ -235,15 +257,13 @@ class EnhancedMemoryAssistant:
     def save_events(self, events_data: Dict[str, Any]) -> bool:
         """Salva eventos no banco de dados"""
         try:
-            # Salva eventos
-            success = self.db_manager.save_events(events_data)
+            # Eventos e seus lembretes na mesma transação (os ids dos eventos vêm do insert)
+            success = bool(self.db_manager.save_events_batch([events_data], with_reminders=True))
 
             if success and events_data.get('events'):
-                # Cria lembretes para eventos com reminder
                 for event in events_data['events']:
                     if event.get('reminder'):
-                        # Aqui você implementaria a criação de lembretes
-                        print(f"🔔 Lembrete configurado para: {event.get('title')}")
+                        print(f"🔔 Lembrete configurado para: {event.get('title')} ({event['reminder']})")
 
             return success
 
@@ -255,6 +275,320 @@ class EnhancedMemoryAssistant:
         """Salva interação no banco de dados"""
         self.db_manager.save_interaction(human_message, assistant_message)
 
+    def is_exit_command(self, text: str) -> bool:
+        """Verifica se a fala é um comando para encerrar"""
+        # Verifica comando de saída (mais abrangente)
+        exit_commands = [
+            "sair", "quit", "exit", "encerrar", "parar", "sair!", "quit!", "exit!",
+            "encerrar a aplicação", "parar aplicação", "fechar", "close", "stop",
+            "tchau", "bye", "até logo", "até mais"
+        ]
+        return any(cmd in text for cmd in exit_commands)
+
+    def capture_stage(self) -> Optional[EncodedAudio]:
+        """Estágio de captura: grava uma fala (reamostrada e codificada em memória)"""
+        audio = record_utterance(encoder=self.audio_encoder)
+        if not audio:
+            print("⚠️ Gravação muito curta. Tente novamente.")
+        return audio
+
+    def transcribe_stage(self, audio: EncodedAudio) -> Optional[str]:
+        """Estágio de transcrição: retorna o texto normalizado da fala"""
+        text = self.process_audio(audio)
+        if not text:
+            print("❌ Erro ao processar áudio")
+            return None
+
+        text = text.lower().strip()
+        print(f"🎤 Você disse: {text}")
+        return text
+
+    def has_event_keywords(self, text: str) -> bool:
+        """Verifica se o texto contém palavras-chave de eventos (excluindo comandos de saída)"""
+        return has_event_keywords(text)
+
+    def decide_tool(self, text: str) -> ToolDecision:
+        """Escolhe o tool_choice da fala com o classificador local"""
+        decision = self.tool_strategy.decide(text)
+        print(f"🧭 {decision.report()}")
+        return decision
+
+    def needs_fallback(self, decision: ToolDecision, completion: Any) -> bool:
+        """A IA não usou a ferramenta numa fala que provavelmente descreve eventos"""
+        return decision.fallback and not completion.choices[0].message.tool_calls
+
+    def record_tool_outcome(self, decision: ToolDecision, used_tool: bool, fell_back: bool) -> None:
+        """Contabiliza a decisão (used_tool: a primeira chamada usou a ferramenta); cada fallback mostra a taxa acumulada"""
+        self.tool_strategy.record(decision, used_tool, fell_back)
+        if fell_back:
+            stats = self.tool_strategy.stats
+            print(f"📈 Fallback para chamada forçada: {stats.fallbacks}/{stats.turns} falas ({stats.fallback_rate:.0%})")
+
+    def prepare_context(self, text: str) -> Dict[str, Any]:
+        """Extrai as identidades da fala e obtém o contexto da memória"""
+        # Extrai identidades
+        identities = self.extract_identities(text)
+        if identities:
+            print(f"👥 Identidades reconhecidas: {len(identities)}")
+
+        # Obtém contexto
+        return self.get_context(text)
+
+    def think_stage(self, text: str) -> Optional[Any]:
+        """Estágio de IA: identidades, contexto e chamada ao modelo; retorna a completion"""
+        context = self.prepare_context(text)
+
+        # Decide antes da chamada se a ferramenta DailyEvents deve ser usada
+        decision = self.decide_tool(text)
+
+        # Processa com IA (uma única chamada no caso comum)
+        result = self.process_with_ai(text, context, decision.tool_choice)
+        if not result:
+            return None
+
+        completion = result['completion']
+
+        # Sinais ambíguos e a IA não usou a ferramenta: força o uso
+        fell_back = self.needs_fallback(decision, completion)
+        if fell_back:
+            print("🔧 Detectei possíveis eventos. Forçando uso da ferramenta...")
+            # Tenta novamente com prompt mais específico
+            result = self.process_with_ai_forced(text, context)
+            if result:
+                completion = result['completion']
+
+        self.record_tool_outcome(decision, bool(completion.choices[0].message.tool_calls) and not fell_back, fell_back)
+        return completion
+
+    def normalize_ai_event(self, event: Dict[str, Any]) -> Dict[str, Any]:
+        """Corrige um evento vindo da IA: campos em português e valores fora das enumerações"""
+        return normalize_event(event)
+
+    def event_record(self, event: Any) -> Dict[str, Any]:
+        """Converte um Event validado para o formato do banco"""
+        return {
+            'title': event.title,
+            'description': event.description,
+            'category': event.category.value,
+            'priority': event.priority.value,
+            'time': event.time,
+            'location': event.location,
+            'reminder': event.reminder
+        }
+
+    def event_line(self, event: Any) -> str:
+        """Linha da resposta para um evento registrado"""
+        category_emoji = self.get_category_emoji(event.category.value)
+        priority_emoji = self.get_priority_emoji(event.priority.value)
+        return f"{category_emoji} {priority_emoji} {event.title}"
+
+    def persist_stage(self, text: str, completion: Any) -> str:
+        """Estágio de persistência: salva eventos e interação, mostra e retorna a resposta"""
+        responses = []
+
+        # Processa resposta da IA
+        if completion.choices[0].message.tool_calls:
+            print("🔧 Processando eventos com ferramenta DailyEvents...")
+            for tool_call in completion.choices[0].message.tool_calls:
+                if tool_call.function.name == "DailyEvents":
+                    try:
+                        # Obtém dados da IA
+                        ai_data = json.loads(tool_call.function.arguments)
+
+                        # Verifica se há eventos na resposta
+                        if 'events' not in ai_data or not ai_data['events']:
+                            print("⚠️ IA não retornou eventos válidos. Processando como conversa...")
+                            continue
+
+                        # Corrige campos e valores da IA (português para inglês, enumerações)
+                        ai_data['events'] = normalize_events(ai_data['events'])
+
+                        # Cria objeto DailyEvents com dados corrigidos
+                        daily_events = DailyEvents(**ai_data)
+
+                        # Converte para formato do banco
+                        events_data = {
+                            'date': daily_events.date,
+                            'events': [self.event_record(event) for event in daily_events.events]
+                        }
+
+                        # Salva eventos
+                        if self.save_events(events_data):
+                            print(f"✅ Eventos do dia {daily_events.date} registrados com sucesso!")
+
+                            # Resposta contextualizada
+                            response = f"Perfeito! Registrei {len(daily_events.events)} evento(s) para {daily_events.date}.\n"
+
+                            for event in daily_events.events:
+                                response += self.event_line(event) + "\n"
+
+                            if any(event.reminder for event in daily_events.events):
+                                response += "\n🔔 Lembretes configurados automaticamente!"
+
+                            print(response)
+                            self.save_interaction(text, response)
+                            responses.append(response)
+                        else:
+                            print("❌ Erro ao salvar eventos")
+
+                    except Exception as e:
+                        print(f"❌ Erro ao processar eventos: {e}")
+                        print("💡 Tentando criar eventos automaticamente...")
+
+                        # Tenta criar eventos automaticamente baseado no texto
+                        try:
+                            # Extrai datas mencionadas do texto
+                            import re
+                            date_patterns = [
+                                r'ontem\s+(\d{1,2}/\d{1,2}/\d{4})',
+                                r'hoje\s+(\d{1,2}/\d{1,2}/\d{4})',
+                                r'amanhã\s+(\d{1,2}/\d{1,2}/\d{4})',
+                                r'(\d{1,2}/\d{1,2}/\d{4})'
+                            ]
+
+                            extracted_events = []
+                            for pattern in date_patterns:
+                                matches = re.findall(pattern, text)
+                                for match in matches:
+                                    # Cria evento básico
+                                    event_data = {
+                                        'date': match,
+                                        'events': [{
+                                            'title': f'Evento em {match}',
+                                            'description': f'Evento mencionado para {match}',
+                                            'category': 'outros',
+                                            'priority': 'media'
+                                        }]
+                                    }
+                                    extracted_events.append(event_data)
+
+                            if extracted_events:
+                                print("✅ Criando eventos automaticamente...")
+                                for event_data in extracted_events:
+                                    daily_events = DailyEvents(**event_data)
+                                    events_data = {
+                                        'date': daily_events.date,
+                                        'events': [
+                                            {
+                                                'title': event.title,
+                                                'description': event.description,
+                                                'category': event.category.value,
+                                                'priority': event.priority.value,
+                                                'time': event.time,
+                                                'location': event.location,
+                                                'reminder': event.reminder
+                                            }
+                                            for event in daily_events.events
+                                        ]
+                                    }
+                                    if self.save_events(events_data):
+                                        print(f"✅ Evento criado para {daily_events.date}")
+
+                        except Exception as fallback_error:
+                            print(f"❌ Erro no fallback: {fallback_error}")
+                            print("💡 Processando como conversa normal...")
+                            # Continua para processar como mensagem normal
+
+        if completion.choices[0].message.content:
+            response = completion.choices[0].message.content
+            print(f"🤖 {response}")
+            self.save_interaction(text, response)
+            responses.append(response)
+
+        return "\n".join(responses)
+
+    def stream_with_ai(self, request: Dict[str, Any], saved: List[Event]) -> Optional[StreamedCompletion]:
+        """Chama a IA em stream: mostra o texto conforme chega e salva cada evento assim que seu objeto fecha"""
+        pending: List[Dict[str, Any]] = []
+        line_open = [False]
+
+        def end_line() -> None:
+            if line_open[0]:
+                line_open[0] = False
+                print()
+
+        def on_text(piece: str) -> None:
+            if not line_open[0]:
+                line_open[0] = True
+                print("🤖 ", end="")
+            print(piece, end="", flush=True)
+
+        def on_item(item: Dict[str, Any], fields: Dict[str, Any]) -> None:
+            pending.append(item)
+            if fields.get('date'):
+                end_line()
+                self.save_streamed_events(fields['date'], pending, saved)
+
+        try:
+            stream = self.client.chat.completions.create(stream=True, **request)
+            result = consume_stream(stream, "DailyEvents", "events", on_text=on_text, on_item=on_item)
+        except Exception as e:
+            end_line()
+            print(f"❌ Erro ao processar com IA: {e}")
+            return None
+
+        end_line()
+        if pending:
+            # A data chegou depois da lista de eventos
+            if result.fields.get('date'):
+                self.save_streamed_events(result.fields['date'], pending, saved)
+            else:
+                print(f"⚠️ IA não informou a data; {len(pending)} evento(s) não registrados")
+        print(f"⚡ Stream: primeiro trecho em {result.first_chunk_seconds or 0:.2f}s, "
+              f"{result.items} evento(s), total {result.total_seconds:.2f}s")
+        return result
+
+    def save_streamed_events(self, date: str, pending: List[Dict[str, Any]], saved: List[Event]) -> None:
+        """Valida e salva os eventos recebidos até agora do stream"""
+        events = []
+        for raw in normalize_events(pending):
+            try:
+                events.append(Event(**raw))
+            except Exception as e:
+                print(f"⚠️ Evento inválido ignorado: {e}")
+        pending.clear()
+
+        if events and self.save_events({'date': date, 'events': [self.event_record(event) for event in events]}):
+            for event in events:
+                print(f"✅ {date}: {self.event_line(event)}")
+            saved.extend(events)
+
+    def stream_stage(self, text: str) -> str:
+        """Estágios de IA e persistência em stream; retorna a resposta"""
+        context = self.prepare_context(text)
+        decision = self.decide_tool(text)
+        saved: List[Event] = []
+
+        result = self.stream_with_ai(self.build_ai_request(text, context, decision.tool_choice), saved)
+        if result is None:
+            return ""
+
+        # Sinais ambíguos e a IA não usou a ferramenta: força o uso
+        fell_back = decision.fallback and not result.tool_calls
+        if fell_back:
+            print("🔧 Detectei possíveis eventos. Forçando uso da ferramenta...")
+            result = self.stream_with_ai(self.build_forced_request(text), saved) or result
+        self.record_tool_outcome(decision, bool(result.tool_calls) and not fell_back, fell_back)
+
+        responses = []
+        if saved:
+            response = f"Perfeito! Registrei {len(saved)} evento(s).\n"
+            response += "".join(self.event_line(event) + "\n" for event in saved)
+            if any(event.reminder for event in saved):
+                response += "\n🔔 Lembretes configurados automaticamente!"
+            # As linhas de cada evento já apareceram conforme foram salvos
+            print(f"✅ {len(saved)} evento(s) registrados com sucesso!")
+            self.save_interaction(text, response)
+            responses.append(response)
+        elif result.tool_calls:
+            print("⚠️ IA não retornou eventos válidos. Processando como conversa...")
+
+        if result.content:
+            self.save_interaction(text, result.content)
+            responses.append(result.content)
+
+        return "\n".join(responses)
+
     def run(self) -> None:
         """Executa o loop principal do assistente"""
         print("🎤 Diga 'sair' para encerrar a aplicação")
@@ -262,262 +596,93 @@ class EnhancedMemoryAssistant:
 
         while True:
             try:
-                # Grava áudio
-                filename_audio = record_audio()
-                if not filename_audio:
-                    print("⚠️ Gravação muito curta. Tente novamente.")
+                audio = self.capture_stage()
+                if not audio:
                     continue
 
-                # Processa áudio
-                text = self.process_audio(filename_audio)
+                text = self.transcribe_stage(audio)
                 if not text:
-                    print("❌ Erro ao processar áudio")
                     continue
 
-                text = text.lower().strip()
-                print(f"🎤 Você disse: {text}")
-
-                # Verifica comando de saída (mais abrangente)
-                exit_commands = [
-                    "sair", "quit", "exit", "encerrar", "parar", "sair!", "quit!", "exit!",
-                    "encerrar a aplicação", "parar aplicação", "fechar", "close", "stop",
-                    "tchau", "bye", "até logo", "até mais"
-                ]
-
-                if any(cmd in text for cmd in exit_commands):
+                if self.is_exit_command(text):
                     print("👋 Encerrando aplicação...")
+                    print(f"🧭 Estratégia de ferramenta: {self.tool_strategy.stats.report()}")
+                    self.tool_strategy.persist()
                     self.reminder_system.stop()
+                    self.db_manager.close()
                     break
 
-                # Extrai identidades
-                identities = self.extract_identities(text)
-                if identities:
-                    print(f"👥 Identidades reconhecidas: {len(identities)}")
-
-                # Obtém contexto
-                context = self.get_context()
-
-                # Verifica se o texto contém palavras-chave de eventos (excluindo comandos de saída)
-                event_keywords = ['ontem', 'hoje', 'amanhã', 'estive', 'estou', 'estarei', 'visita', 'viagem', 'reunião', 'consulta', 'estudar', 'trabalho', 'família']
-                exit_keywords = ['sair', 'quit', 'exit', 'encerrar', 'parar', 'fechar', 'close', 'stop', 'tchau', 'bye']
-
-                # Só processa como evento se não for comando de saída
-                has_event_keywords = any(keyword in text.lower() for keyword in event_keywords) and not any(keyword in text.lower() for keyword in exit_keywords)
-
-                # Processa com IA
-                result = self.process_with_ai(text, context)
-                if not result:
+                if self.streaming:
+                    self.stream_stage(text)
                     continue
 
-                completion = result['completion']
-
-                # Se detectou palavras-chave de eventos mas não usou a ferramenta, força o uso
-                if has_event_keywords and not completion.choices[0].message.tool_calls:
-                    print("🔧 Detectei palavras-chave de eventos. Forçando uso da ferramenta...")
-                    # Tenta novamente com prompt mais específico
-                    result = self.process_with_ai_forced(text, context)
-                    if result:
-                        completion = result['completion']
-
-                # Processa resposta da IA
-                if completion.choices[0].message.tool_calls:
-                    print("🔧 Processando eventos com ferramenta DailyEvents...")
-                    for tool_call in completion.choices[0].message.tool_calls:
-                        if tool_call.function.name == "DailyEvents":
-                            try:
-                                # Obtém dados da IA
-                                ai_data = json.loads(tool_call.function.arguments)
-
-                                # Verifica se há eventos na resposta
-                                if 'events' not in ai_data or not ai_data['events']:
-                                    print("⚠️ IA não retornou eventos válidos. Processando como conversa...")
-                                    continue
-
-                                # Corrige campos da IA (português para inglês)
-                                for event in ai_data.get('events', []):
-                                    # Mapeia campos de português para inglês
-                                    field_mapping = {
-                                        'título': 'title',
-                                        'titulo': 'title',
-                                        'descrição': 'description',
-                                        'descricao': 'description',
-                                        'categoria': 'category',
-                                        'prioridade': 'priority',
-                                        'horário': 'time',
-                                        'horario': 'time',
-                                        'local': 'location',
-                                        'lembrete': 'reminder'
-                                    }
-
-                                    # Corrige campos
-                                    corrected_event = {}
-                                    for key, value in event.items():
-                                        corrected_key = field_mapping.get(key, key)
-                                        corrected_event[corrected_key] = value
-
-                                    # Atualiza o evento com campos corrigidos
-                                    event.clear()
-                                    event.update(corrected_event)
-
-                                # Mapeia valores da IA para nossas enumerações
-                                for event in ai_data.get('events', []):
-                                    # Mapeia categoria
-                                    category_mapping = {
-                                        'viagem': 'lazer',
-                                        'travel': 'lazer',
-                                        'trip': 'lazer',
-                                        'reunião': 'trabalho',
-                                        'meeting': 'trabalho',
-                                        'consulta': 'saude',
-                                        'appointment': 'saude',
-                                        'médico': 'saude',
-                                        'doctor': 'saude',
-                                        'estudo': 'estudos',
-                                        'study': 'estudos',
-                                        'curso': 'estudos',
-                                        'course': 'estudos',
-                                        'família': 'familia',
-                                        'family': 'familia',
-                                        'pessoal': 'pessoal',
-                                        'personal': 'pessoal',
-                                        'financeiro': 'financeiro',
-                                        'financial': 'financeiro',
-                                        'conta': 'financeiro',
-                                        'bill': 'financeiro'
-                                    }
-
-                                    if 'category' in event:
-                                        ai_category = event['category'].lower()
-                                        event['category'] = category_mapping.get(ai_category, 'outros')
-
-                                    # Mapeia prioridade
-                                    priority_mapping = {
-                                        'normal': 'media',
-                                        'regular': 'media',
-                                        'usual': 'media',
-                                        'importante': 'alta',
-                                        'important': 'alta',
-                                        'urgente': 'urgente',
-                                        'urgent': 'urgente',
-                                        'baixa': 'baixa',
-                                        'low': 'baixa'
-                                    }
-
-                                    if 'priority' in event:
-                                        ai_priority = event['priority'].lower()
-                                        event['priority'] = priority_mapping.get(ai_priority, 'media')
-
-                                # Cria objeto DailyEvents com dados corrigidos
-                                daily_events = DailyEvents(**ai_data)
-
-                                # Converte para formato do banco
-                                events_data = {
-                                    'date': daily_events.date,
-                                    'events': [
-                                        {
-                                            'title': event.title,
-                                            'description': event.description,
-                                            'category': event.category.value,
-                                            'priority': event.priority.value,
-                                            'time': event.time,
-                                            'location': event.location,
-                                            'reminder': event.reminder
-                                        }
-                                        for event in daily_events.events
-                                    ]
-                                }
-
-                                # Salva eventos
-                                if self.save_events(events_data):
-                                    print(f"✅ Eventos do dia {daily_events.date} registrados com sucesso!")
-
-                                    # Resposta contextualizada
-                                    response = f"Perfeito! Registrei {len(daily_events.events)} evento(s) para {daily_events.date}.\n"
-
-                                    for event in daily_events.events:
-                                        category_emoji = self.get_category_emoji(event.category.value)
-                                        priority_emoji = self.get_priority_emoji(event.priority.value)
-                                        response += f"{category_emoji} {priority_emoji} {event.title}\n"
-
-                                    if any(event.reminder for event in daily_events.events):
-                                        response += "\n🔔 Lembretes configurados automaticamente!"
-
-                                    print(response)
-                                    self.save_interaction(text, response)
-                                else:
-                                    print("❌ Erro ao salvar eventos")
-
-                            except Exception as e:
-                                print(f"❌ Erro ao processar eventos: {e}")
-                                print("💡 Tentando criar eventos automaticamente...")
-
-                                # Tenta criar eventos automaticamente baseado no texto
-                                try:
-                                    # Extrai datas mencionadas do texto
-                                    import re
-                                    date_patterns = [
-                                        r'ontem\s+(\d{1,2}/\d{1,2}/\d{4})',
-                                        r'hoje\s+(\d{1,2}/\d{1,2}/\d{4})',
-                                        r'amanhã\s+(\d{1,2}/\d{1,2}/\d{4})',
-                                        r'(\d{1,2}/\d{1,2}/\d{4})'
-                                    ]
-
-                                    extracted_events = []
-                                    for pattern in date_patterns:
-                                        matches = re.findall(pattern, text)
-                                        for match in matches:
-                                            # Cria evento básico
-                                            event_data = {
-                                                'date': match,
-                                                'events': [{
-                                                    'title': f'Evento em {match}',
-                                                    'description': f'Evento mencionado para {match}',
-                                                    'category': 'outros',
-                                                    'priority': 'media'
-                                                }]
-                                            }
-                                            extracted_events.append(event_data)
-
-                                    if extracted_events:
-                                        print("✅ Criando eventos automaticamente...")
-                                        for event_data in extracted_events:
-                                            daily_events = DailyEvents(**event_data)
-                                            events_data = {
-                                                'date': daily_events.date,
-                                                'events': [
-                                                    {
-                                                        'title': event.title,
-                                                        'description': event.description,
-                                                        'category': event.category.value,
-                                                        'priority': event.priority.value,
-                                                        'time': event.time,
-                                                        'location': event.location,
-                                                        'reminder': event.reminder
-                                                    }
-                                                    for event in daily_events.events
-                                                ]
-                                            }
-                                            if self.save_events(events_data):
-                                                print(f"✅ Evento criado para {daily_events.date}")
-
-                                except Exception as fallback_error:
-                                    print(f"❌ Erro no fallback: {fallback_error}")
-                                    print("💡 Processando como conversa normal...")
-                                    # Continua para processar como mensagem normal
+                completion = self.think_stage(text)
+                if completion is None:
+                    continue
 
-                if completion.choices[0].message.content:
-                    response = completion.choices[0].message.content
-                    print(f"🤖 {response}")
-                    self.save_interaction(text, response)
+                self.persist_stage(text, completion)
 
             except KeyboardInterrupt:
                 print("\n👋 Encerrando aplicação...")
+                print(f"🧭 Estratégia de ferramenta: {self.tool_strategy.stats.report()}")
+                self.tool_strategy.persist()
                 self.reminder_system.stop()
+                self.db_manager.close()
                 break
             except Exception as e:
                 print(f"❌ Erro inesperado: {e}")
                 continue
 
+    def run_pipelined(self) -> None:
+        """Executa o assistente em estágios paralelos ligados por filas limitadas.
+
+        Enquanto uma fala é transcrita, processada pela IA e salva, a próxima
+        já pode ser gravada. As falas são tratadas na ordem em que foram
+        ditas; se a IA atrasar, a gravação espera (PIPELINE_QUEUE_SIZE falas
+        por fila). A IA de uma fala pode não ver os eventos da fala anterior
+        se eles ainda estiverem sendo salvos.
+        """
+        print("🎤 Diga 'sair' para encerrar a aplicação (modo pipeline)")
+        print("-" * 50)
+
+        def transcribe(audio: EncodedAudio) -> Any:
+            text = self.transcribe_stage(audio)
+            if text and self.is_exit_command(text):
+                print("👋 Encerrando aplicação...")
+                return STOP
+            return text
+
+        def think(text: str) -> Optional[Tuple[str, Any]]:
+            completion = self.think_stage(text)
+            return None if completion is None else (text, completion)
+
+        def persist(item: Tuple[str, Any]) -> Tuple[str, Any]:
+            self.persist_stage(*item)
+            return item
+
+        def report(seq: int, timings: List[Tuple[str, float]], total: float) -> None:
+            stages = " | ".join(f"{name} {seconds:.2f}s" for name, seconds in timings)
+            print(f"⏱️ Fala #{seq}: {stages} | total {total:.2f}s")
+
+        pipeline = Pipeline(
+            self.capture_stage,
+            [("transcrição", transcribe), ("ia", think), ("persistência", persist)],
+            source_name="captura",
+            maxsize=int(os.getenv("PIPELINE_QUEUE_SIZE", "2")),
+            on_complete=report
+        )
+        try:
+            pipeline.run()
+        except KeyboardInterrupt:
+            print("\n👋 Encerrando aplicação...")
+        finally:
+            self.reminder_system.stop()
+            self.db_manager.close()
+            print("📊 Métricas por estágio:")
+            print(pipeline.report())
+            print(f"🧭 Estratégia de ferramenta: {self.tool_strategy.stats.report()}")
+            self.tool_strategy.persist()
+
     def get_category_emoji(self, category: str) -> str:
         """Retorna emoji para categoria"""
         emojis = {
@@ -544,4 +709,11 @@ class EnhancedMemoryAssistant:
 
 if __name__ == "__main__":
     assistant = EnhancedMemoryAssistant()
-    assistant.run()
+    # python main_enhanced.py --pipeline: grava a próxima fala enquanto processa a anterior
+    # python main_enhanced.py --stream: mostra a resposta e salva cada evento conforme chegam
+    if "--stream" in sys.argv:
+        assistant.streaming = True
+    if "--pipeline" in sys.argv or os.getenv("PIPELINE_MODE") == "1":
+        assistant.run_pipelined()
+    else:
+        assistant.run()
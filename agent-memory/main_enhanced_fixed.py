@@ -2,17 +2,20 @@ from openai import OpenAI
 from dotenv import load_dotenv
 from dotenv import find_dotenv
 import os
-from utils.record_audio import record_audio
-from utils.basemodel2tool import base_model2tool
+from utils.record_audio import record_utterance
+from utils.audio_encoding import AudioEncoder, EncodedAudio
+from utils.transcription import transcribe
+from utils.tool_registry import registry
 from tools.daily_events import DailyEvents
 # Requer: pip install mysql-connector-python
 from database.database_mysql import DatabaseManager
+from database.mysql_pool import get_default_provider
+from database.vector_index import VectorIndex
 from notifications.reminder_system import ReminderSystem
 from identity.identity_manager import IdentityManager
+from context.context_builder import ContextBuilder
 from datetime import datetime
 import json
-import threading
-import time
 from typing import Dict, Any, Optional
 
 # Carrega variáveis de ambiente
@@ -21,9 +24,21 @@ load_dotenv(find_dotenv())
 class EnhancedMemoryAssistant:
     def __init__(self):
         self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-        self.db_manager = DatabaseManager()
-        self.reminder_system = ReminderSystem()
-        self.identity_manager = IdentityManager()
+        # Um único pool de conexões MySQL compartilhado pelos três gerenciadores
+        self.db_provider = get_default_provider()
+        # Índice semântico local persistido em disco (busca por significado)
+        self.db_manager = DatabaseManager(
+            provider=self.db_provider,
+            vector_index=VectorIndex(os.getenv("VECTOR_INDEX_PATH", "memory_vectors.vec"))
+        )
+        self.reminder_system = ReminderSystem(provider=self.db_provider)
+        # Lembretes criados junto com os eventos entram direto na agenda
+        self.db_manager.reminder_listener = self.reminder_system.schedule_many
+        self.identity_manager = IdentityManager(provider=self.db_provider)
+        # Contexto do prompt limitado por orçamento de tokens
+        self.context_builder = ContextBuilder(max_tokens=int(os.getenv("CONTEXT_MAX_TOKENS", "1500")))
+        # Codificação do áudio enviado para transcrição (AUDIO_CODEC, AUDIO_SAMPLE_RATE)
+        self.audio_encoder = AudioEncoder.from_env()
 
         # Inicia sistema de lembretes
         self.reminder_system.start()
@@ -37,30 +52,10 @@ class EnhancedMemoryAssistant:
         print("   🎤 Interface por voz")
         print("-" * 50)
 
-    def process_audio(self, filename_audio: str) -> str:
-        """Processa áudio e retorna transcrição"""
+    def process_audio(self, audio: EncodedAudio) -> str:
+        """Transcreve o áudio gravado (enviado direto da memória) e retorna o texto"""
         try:
-            with open(filename_audio, "rb") as audio_file:
-                transcription = self.client.audio.transcriptions.create(
-                    model="whisper-1",
-                    file=audio_file,
-                    language="pt"
-                )
-
-            # Aguarda um pouco antes de tentar deletar o arquivo
-            time.sleep(0.5)
-
-            try:
-                os.remove(filename_audio)
-            except PermissionError:
-                print(f"⚠️ Não foi possível deletar {filename_audio} - arquivo ainda em uso")
-                time.sleep(1)
-                try:
-                    os.remove(filename_audio)
-                except PermissionError:
-                    print(f"⚠️ Arquivo {filename_audio} não foi deletado automaticamente")
-
-            return transcription.text
+            return transcribe(self.client, audio)
 
         except Exception as e:
             error_msg = str(e)
@@ -73,18 +68,17 @@ class EnhancedMemoryAssistant:
             else:
                 print(f"❌ Erro ao processar áudio: {e}")
 
-            # Tenta deletar o arquivo mesmo em caso de erro
-            try:
-                if os.path.exists(filename_audio):
-                    os.remove(filename_audio)
-            except:
-                pass
-
             return ""
 
-    def get_context(self) -> Dict[str, Any]:
+    def get_context(self, text: str = "") -> Dict[str, Any]:
         """Obtém contexto completo da memória"""
         memory_context = self.db_manager.get_memory_context()
+        if text:
+            # Soma às lembranças recentes as mais próximas da fala, mesmo que antigas
+            for hit in self.db_manager.semantic_search(text, k=5):
+                key = 'events' if hit['kind'] == 'event' else 'interactions'
+                if all(item['id'] != hit['id'] for item in memory_context[key]):
+                    memory_context[key].append(hit)
         identity_context = self.identity_manager.get_all_contexts()
 
         # Converte objetos datetime para string para serialização JSON
@@ -125,16 +119,25 @@ Available priorities: baixa, media, alta, urgente
 
 Use the DailyEvents tool whenever events are mentioned."""
 
+        # Seleciona apenas o contexto mais relevante para esta fala
+        bundle = self.context_builder.build(
+            text,
+            events=context['memory'].get('events', []),
+            interactions=context['memory'].get('interactions', []),
+            identities=context['identities']
+        )
+        print(f"🧮 Contexto: {bundle.report()}")
+
         try:
             completion = self.client.chat.completions.create(
                 model="gpt-4o",
                 messages=[
                     {"role": "system", "content": system_prompt},
-                    {"role": "assistant", "content": json.dumps(context['memory'], default=str)},
+                    {"role": "assistant", "content": bundle.text},
                     {"role": "user", "content": text}
                 ],
                 tool_choice="auto",
-                tools=[base_model2tool(DailyEvents)]  # type: ignore
+                tools=registry.tools(DailyEvents)  # type: ignore
             )
 
             return {
@@ -150,14 +153,13 @@ Use the DailyEvents tool whenever events are mentioned."""
     def save_events(self, events_data: Dict[str, Any]) -> bool:
         """Salva eventos no banco de dados"""
         try:
-            # Salva eventos
-            success = self.db_manager.save_events(events_data)
+            # Eventos e seus lembretes na mesma transação (os ids dos eventos vêm do insert)
+            success = bool(self.db_manager.save_events_batch([events_data], with_reminders=True))
 
             if success and events_data.get('events'):
-                # Cria lembretes para eventos com reminder
                 for event in events_data['events']:
                     if event.get('reminder'):
-                        print(f"🔔 Lembrete configurado para: {event.get('title')}")
+                        print(f"🔔 Lembrete configurado para: {event.get('title')} ({event['reminder']})")
 
             return success
 
@@ -176,14 +178,14 @@ Use the DailyEvents tool whenever events are mentioned."""
 
         while True:
             try:
-                # Grava áudio
-                filename_audio = record_audio()
-                if not filename_audio:
+                # Grava áudio (reamostrado e codificado em memória)
+                audio = record_utterance(encoder=self.audio_encoder)
+                if not audio:
                     print("⚠️ Gravação muito curta. Tente novamente.")
                     continue
 
                 # Processa áudio
-                text = self.process_audio(filename_audio)
+                text = self.process_audio(audio)
                 if not text:
                     print("❌ Erro ao processar áudio")
                     continue
@@ -196,10 +198,11 @@ Use the DailyEvents tool whenever events are mentioned."""
                 if any(cmd in text for cmd in exit_commands):
                     print("👋 Encerrando aplicação...")
                     self.reminder_system.stop()
+                    self.db_manager.close()
                     break
 
                 # Obtém contexto
-                context = self.get_context()
+                context = self.get_context(text)
 
                 # Processa com IA
                 result = self.process_with_ai(text, context)
@@ -300,6 +303,7 @@ Use the DailyEvents tool whenever events are mentioned."""
             except KeyboardInterrupt:
                 print("\n👋 Encerrando aplicação...")
                 self.reminder_system.stop()
+                self.db_manager.close()
                 break
             except Exception as e:
                 print(f"❌ Erro inesperado: {e}")
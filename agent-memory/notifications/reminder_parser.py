@@ -0,0 +1,157 @@
+import re
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+from typing import NamedTuple, Optional, Tuple
+from tools.event_normalizer import fold
+
+# Sem informação reconhecível o lembrete fica 1 hora antes do evento
+DEFAULT_OFFSET = timedelta(hours=1)
+
+_NUMBERS = {
+    'um': 1, 'uma': 1, 'one': 1,
+    'dois': 2, 'duas': 2, 'two': 2, 'tres': 3, 'three': 3, 'quatro': 4, 'four': 4,
+    'cinco': 5, 'five': 5, 'seis': 6, 'six': 6, 'dez': 10, 'ten': 10,
+    'quinze': 15, 'fifteen': 15, 'vinte': 20, 'twenty': 20, 'trinta': 30, 'thirty': 30,
+    'quarenta': 40, 'forty': 40, 'cinquenta': 50, 'fifty': 50
+}
+_UNITS = {
+    'm': 60, 'min': 60, 'mins': 60, 'minuto': 60, 'minutos': 60, 'minute': 60, 'minutes': 60,
+    'h': 3600, 'hr': 3600, 'hrs': 3600, 'hora': 3600, 'horas': 3600, 'hour': 3600, 'hours': 3600,
+    'd': 86400, 'dia': 86400, 'dias': 86400, 'day': 86400, 'days': 86400,
+    'semana': 604800, 'semanas': 604800, 'w': 604800, 'week': 604800, 'weeks': 604800
+}
+_UNIT = '|'.join(sorted(_UNITS, key=len, reverse=True))
+# "a"/"an" só valem 1 antes de uma unidade por extenso ("a day before", "an hour"),
+# para que artigos soltos ("levar a d") não virem durações
+_ARTICLE = r'an?(?=\s+(?:minutes?|hours?|days?|weeks?)\b)'
+_AMOUNT = r'\d+(?:[.,]\d+)?|' + '|'.join(sorted(_NUMBERS, key=len, reverse=True)) + '|' + _ARTICLE
+
+# Todos os padrões operam sobre o texto dobrado (minúsculas e sem acentos)
+_DURATION = re.compile(rf'\b(?P<amount>{_AMOUNT})\s*(?P<unit>{_UNIT})\b')
+# "1h30", "2h15min": minutos colados às horas
+_HOURS_MINUTES = re.compile(r'\b(?P<hours>\d{1,2})h(?P<minutes>\d{2})(?:min)?\b')
+_HALF_HOUR = re.compile(r'\b(?:meia hora|half an hour|half hour)\b')
+_AND_A_HALF = re.compile(r'\b(?:e meia|and a half)\b')
+# Horário absoluto: "às 18h", "as 7:30", "at 6pm", "18:45", "8h da manha"
+_CLOCK = re.compile(
+    r'(?:\b(?:as|at)\s+|@\s*)(?P<hour>\d{1,2})(?:[:h](?P<minute>\d{2})|h\b)?\s*(?P<period>am|pm|da manha|da tarde|da noite)?'
+    r'|\b(?P<hour2>\d{1,2}):(?P<minute2>\d{2})\s*(?P<period2>am|pm)?'
+    r'|\b(?P<hour3>\d{1,2})(?:h(?P<minute3>\d{2})?)?\s*(?P<period3>am|pm|da manha|da tarde|da noite)\b'
+)
+# "9h" sozinho é duração ("9h antes"), mas vira horário depois de uma data ou de "na véspera"
+_BARE_HOUR = re.compile(r'\b(?P<hour>\d{1,2})h(?P<minute>\d{2})?\b')
+_DATE = re.compile(r'\b(?P<day>\d{1,2})/(?P<month>\d{1,2})(?:/(?P<year>\d{2,4}))?\b')
+_DAY_BEFORE = re.compile(r'\b(?:vespera|dia anterior|noite anterior|day before|night before|the eve)\b')
+_AT_START = re.compile(r'\b(?:na hora|no horario|no inicio|at the time|on time|when it starts)\b')
+_AFTER = re.compile(r'\b(?:depois|apos|after|later)\b')
+
+class ReminderSpec(NamedTuple):
+    """Lembrete interpretado, independente do evento (por isso pode ficar em cache)"""
+    offset: Optional[timedelta] = None          # antes do evento (negativo: depois)
+    day_shift: int = 0                           # dias em relação ao dia do evento
+    at: Optional[time] = None                    # horário absoluto
+    on: Optional[Tuple[int, int, Optional[int]]] = None  # dia, mês e ano absolutos
+
+def _hour(hour: int, period: Optional[str]) -> int:
+    if period in ('pm', 'da tarde', 'da noite') and hour < 12:
+        return hour + 12
+    if period == 'am' and hour == 12:
+        return 0
+    return hour
+
+def _clock(text: str, bare_hours: bool = False) -> Tuple[bool, Optional[time]]:
+    """(havia um horário no texto, horário); um horário fora da faixa vem como (True, None)"""
+    match = _CLOCK.search(text)
+    if match:
+        groups = match.groupdict()
+        hour = groups['hour'] or groups['hour2'] or groups['hour3']
+        minute = groups['minute'] or groups['minute2'] or groups['minute3'] or 0
+        period = groups['period'] or groups['period2'] or groups['period3']
+    else:
+        match = _BARE_HOUR.search(text) if bare_hours else None
+        if not match:
+            return False, None
+        hour, minute, period = match.group('hour'), match.group('minute') or 0, None
+    hour, minute = _hour(int(hour), period), int(minute)
+    if hour > 23 or minute > 59:
+        return True, None
+    return True, time(hour, minute)
+
+def _duration(text: str) -> Optional[timedelta]:
+    seconds = 0.0
+    found = False
+    for match in _HOURS_MINUTES.finditer(text):
+        seconds += int(match.group('hours')) * 3600 + int(match.group('minutes')) * 60
+        found = True
+    text = _HOURS_MINUTES.sub(' ', text)
+    if _HALF_HOUR.search(text):
+        seconds += 1800
+        found = True
+        text = _HALF_HOUR.sub(' ', text)
+    for match in _DURATION.finditer(text):
+        amount = match.group('amount')
+        value = 1 if amount in ('a', 'an') else _NUMBERS.get(amount)
+        if value is None:
+            value = float(amount.replace(',', '.'))
+        seconds += value * _UNITS[match.group('unit')]
+        found = True
+    if found and _AND_A_HALF.search(text):
+        seconds += 1800
+    return timedelta(seconds=seconds) if found else None
+
+@lru_cache(maxsize=1024)
+def parse_reminder(text: str) -> Optional[ReminderSpec]:
+    """Interpreta o texto de um lembrete em português ou inglês.
+
+    Aceita durações ("30 minutos antes", "1h30", "2 days before", "meia
+    hora"), horários e datas absolutos ("às 18h", "at 6pm", "na véspera às
+    20:00", "14/03 9h") e "na hora". Retorna None se nada for reconhecido.
+    Os textos se repetem muito ("1h antes"), então o resultado fica em cache.
+    """
+    text = fold(text or '')
+    if not text:
+        return None
+
+    day_shift = -1 if _DAY_BEFORE.search(text) else 0
+    date_match = _DATE.search(text)
+    on = None
+    if date_match:
+        year = date_match.group('year')
+        on = (int(date_match.group('day')), int(date_match.group('month')),
+              (int(year) + 2000 if len(year) == 2 else int(year)) if year else None)
+        text = _DATE.sub(' ', text)
+
+    has_clock, at = _clock(text, bare_hours=bool(on or day_shift))
+    if has_clock and at is None:
+        # "às 25h" não é uma duração: fica o padrão
+        return None
+    if at is not None or on is not None:
+        return ReminderSpec(day_shift=day_shift, at=at, on=on)
+
+    offset = _duration(text)
+    if offset is not None:
+        # A duração já conta o dia ("1 dia anterior", "a day before"): a véspera não é somada de novo
+        return ReminderSpec(offset=-offset if _AFTER.search(text) else offset)
+    if day_shift:
+        return ReminderSpec(day_shift=day_shift)
+    if _AT_START.search(text):
+        return ReminderSpec(offset=timedelta(0))
+    return None
+
+def reminder_datetime(text: str, event_at: datetime) -> datetime:
+    """Momento do lembrete de um evento; sem nada reconhecível, DEFAULT_OFFSET antes"""
+    spec = parse_reminder(text)
+    if spec is None:
+        return event_at - DEFAULT_OFFSET
+    if spec.at is None and spec.on is None:
+        return event_at - (spec.offset or timedelta(0)) + timedelta(days=spec.day_shift)
+
+    day = event_at.date()
+    if spec.on is not None:
+        day_of_month, month, year = spec.on
+        try:
+            day = date(year or event_at.year, month, day_of_month)
+        except ValueError:
+            return event_at - DEFAULT_OFFSET
+    day += timedelta(days=spec.day_shift)
+    return datetime.combine(day, spec.at or event_at.time())
@@ -1,10 +1,15 @@
+import heapq
+import os
+import socket
 import threading
 import time
+import uuid
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
-import mysql.connector
+from typing import Callable, List, Dict, Any, Optional, Set, Tuple, Union
 from mysql.connector import Error
 import json
+from database.mysql_pool import MySQLConnectionProvider
+from notifications.reminder_parser import reminder_datetime as parse_reminder_datetime
 
 # Try to import plyer, but don't fail if not available
 try:
@@ -14,16 +19,57 @@ except ImportError:
     PLYER_AVAILABLE = False
     print("⚠️ Plyer não disponível - notificações desabilitadas")
 
+def _as_datetime(value: Union[datetime, str]) -> datetime:
+    return value if isinstance(value, datetime) else datetime.fromisoformat(str(value))
+
 class ReminderSystem:
-    def __init__(self, host="localhost", user="root", password="", database="agent_memory"):
-        self.connection = mysql.connector.connect(
+    """Entrega de lembretes por agendamento, sem polling.
+
+    Os horários dos lembretes pendentes ficam em um heap em memória,
+    carregado na partida e atualizado por create_reminder. A thread dorme em
+    uma Condition exatamente até o próximo horário e só então consulta o
+    banco; create_reminder e stop() a acordam na hora. A cada
+    `resync_interval` segundos o heap é recarregado (uma consulta leve no
+    índice de pendentes), para recolher lembretes criados por outros
+    processos; com None, só o que passa por create_reminder é agendado.
+
+    Vários processos (em uma ou mais máquinas) podem entregar lembretes do
+    mesmo banco: cada um reserva um lote de no máximo `batch_size` lembretes
+    vencidos com um único UPDATE (claimed_by/lease_until), entrega só o que
+    reservou e os marca como enviados com outro UPDATE. Se o processo cair
+    no meio, a reserva vence após `lease_seconds` e outro a retoma. Um
+    horário vencido que não foi entregue (erro no banco ou reserva de outro
+    processo) volta ao heap e é tentado de novo após `retry_delay` segundos.
+    """
+
+    def __init__(self, host="localhost", user="root", password="", database="agent_memory",
+                 provider: Optional[MySQLConnectionProvider] = None,
+                 resync_interval: Optional[float] = 300.0, batch_size: int = 50,
+                 lease_seconds: int = 60, worker_id: Optional[str] = None,
+                 retry_delay: float = 5.0):
+        # A thread de lembretes faz checkout de uma conexão só quando há
+        # trabalho, sem segurar um socket ocioso entre as entregas
+        self.provider = provider or MySQLConnectionProvider(
             host=host,
             user=user,
             password=password,
             database=database
         )
+        self.resync_interval = resync_interval
+        self.batch_size = batch_size
+        self.lease_seconds = lease_seconds
+        self.retry_delay = retry_delay
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
         self.running = False
         self.reminder_thread: Optional[threading.Thread] = None
+        # Heap de (reminder_time, id) dos lembretes ainda não enviados
+        self._schedule: List[Tuple[datetime, int]] = []
+        self._wakeup = threading.Condition()
+        self._rescheduled = False
+        self._next_resync = 0.0
+        # Chamados (fora do lock) quando um lembrete é agendado; acordam laços
+        # que não esperam em _wakeup, como o laço asyncio de main_async
+        self._wakeup_listeners: List[Callable[[], None]] = []
 
     def start(self) -> None:
         if not self.running:
@@ -33,40 +79,198 @@ class ReminderSystem:
             print("🔔 Sistema de lembretes iniciado!")
 
     def stop(self) -> None:
-        self.running = False
+        with self._wakeup:
+            self.running = False
+            self._wakeup.notify_all()
         if self.reminder_thread:
             self.reminder_thread.join()
+            self.reminder_thread = None
         print("🔔 Sistema de lembretes parado!")
 
+    # ------------------------------------------------------------------
+    # Agenda
+    # ------------------------------------------------------------------
+
+    def load_schedule(self) -> int:
+        """Recarrega do banco os horários dos lembretes pendentes; retorna quantos são"""
+        if self.resync_interval is not None:
+            self._next_resync = time.monotonic() + self.resync_interval
+        try:
+            with self.provider.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('SELECT id, reminder_time FROM reminders WHERE is_sent = 0')
+                rows = cursor.fetchall()
+        except Error as e:
+            print(f"Erro ao carregar lembretes: {e}")
+            return 0
+        schedule = [(_as_datetime(reminder_time), reminder_id) for reminder_id, reminder_time in rows]
+        heapq.heapify(schedule)
+        with self._wakeup:
+            self._schedule = schedule
+            self._rescheduled = True
+            self._wakeup.notify_all()
+        return len(schedule)
+
+    def schedule(self, reminder_id: int, reminder_time: Union[datetime, str]) -> None:
+        """Agenda um lembrete já gravado e acorda a thread se ele for o próximo"""
+        self.schedule_many([(reminder_id, reminder_time)])
+
+    def schedule_many(self, reminders: List[Tuple[int, Union[datetime, str]]]) -> None:
+        """Agenda vários lembretes já gravados (ex.: DatabaseManager.reminder_listener)"""
+        with self._wakeup:
+            for reminder_id, reminder_time in reminders:
+                heapq.heappush(self._schedule, (_as_datetime(reminder_time), reminder_id))
+            self._rescheduled = True
+            self._wakeup.notify_all()
+        for listener in list(self._wakeup_listeners):
+            try:
+                listener()
+            except Exception as e:
+                print(f"Erro ao acordar laço de lembretes: {e}")
+
+    def add_wakeup_listener(self, listener: Callable[[], None]) -> None:
+        """Registra uma função chamada sempre que schedule_many agenda lembretes"""
+        self._wakeup_listeners.append(listener)
+
+    def remove_wakeup_listener(self, listener: Callable[[], None]) -> None:
+        if listener in self._wakeup_listeners:
+            self._wakeup_listeners.remove(listener)
+
+    def seconds_until_next(self) -> Optional[float]:
+        """Segundos até o próximo lembrete agendado (None se não há nenhum)"""
+        with self._wakeup:
+            if not self._schedule:
+                return None
+            return max((self._schedule[0][0] - datetime.now()).total_seconds(), 0.0)
+
+    def run_pending(self) -> Optional[float]:
+        """Entrega o que venceu e retorna quantos segundos dormir até o próximo passo.
+
+        Só consulta o banco quando algum horário do heap venceu ou quando é
+        hora de ressincronizar. Retorna None se não há nada a esperar.
+        """
+        if self.resync_interval is not None and time.monotonic() >= self._next_resync:
+            self.load_schedule()
+        now = datetime.now()
+        due: List[int] = []
+        with self._wakeup:
+            while self._schedule and self._schedule[0][0] <= now:
+                due.append(heapq.heappop(self._schedule)[1])
+        if due:
+            handled: Set[int] = set()
+            self._process_reminders(handled)
+            missed = [reminder_id for reminder_id in due if reminder_id not in handled]
+            if missed:
+                self._retry_later(missed)
+        delay = self.seconds_until_next()
+        if self.resync_interval is None:
+            return delay
+        until_resync = max(self._next_resync - time.monotonic(), 0.0)
+        return until_resync if delay is None else min(delay, until_resync)
+
+    def process_due(self) -> int:
+        """Entrega uma vez os lembretes vencidos (para quem agenda o laço por conta própria)"""
+        return self._process_reminders()
+
     def _check_reminders(self) -> None:
         while self.running:
             try:
-                self._process_reminders()
-                time.sleep(60)
+                delay = self.run_pending()
             except Exception as e:
                 print(f"Erro no sistema de lembretes: {e}")
-                time.sleep(60)
+                delay = self.resync_interval
+            with self._wakeup:
+                # Dorme até o próximo horário, um novo agendamento ou stop()
+                self._wakeup.wait_for(lambda: self._rescheduled or not self.running, delay)
+                self._rescheduled = False
 
-    def _process_reminders(self) -> None:
+    def _retry_later(self, reminder_ids: List[int]) -> None:
+        """Devolve ao heap, daqui a retry_delay segundos, os vencidos que ainda não foram enviados"""
         try:
-            cursor = self.connection.cursor()
-            now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            cursor.execute('''
-                SELECT r.id, r.event_id, r.reminder_time, r.message, r.is_sent, e.title, e.date, e.time
-                FROM reminders r
-                JOIN events e ON r.event_id = e.id
-                WHERE r.is_sent = 0 AND r.reminder_time <= %s
-            ''', (now,))
-            reminders = cursor.fetchall()
-            for reminder in reminders:
-                reminder_id, event_id, reminder_time, message, is_sent, event_title, event_date, event_time = reminder
-                if PLYER_AVAILABLE:
-                    self._send_notification(event_title, message, event_time, event_date)
-                # Marca como enviado
-                cursor.execute('UPDATE reminders SET is_sent = 1 WHERE id = %s', (str(reminder_id),))
-            self.connection.commit()
+            with self.provider.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(f'''
+                    SELECT id FROM reminders
+                    WHERE is_sent = 0 AND id IN ({', '.join(['%s'] * len(reminder_ids))})
+                ''', reminder_ids)
+                pending = [row[0] for row in cursor.fetchall()]
+        except Error as e:
+            print(f"Erro ao verificar lembretes não entregues: {e}")
+            pending = reminder_ids
+        retry_at = datetime.now() + timedelta(seconds=self.retry_delay)
+        with self._wakeup:
+            for reminder_id in pending:
+                heapq.heappush(self._schedule, (retry_at, reminder_id))
+
+    def _process_reminders(self, handled: Optional[Set[int]] = None) -> int:
+        """Entrega os lembretes vencidos, um lote reservado por vez; retorna quantos foram entregues.
+
+        Os ids marcados como enviados são acrescentados a `handled`.
+        """
+        delivered = 0
+        try:
+            while True:
+                reminders = self._claim_batch()
+                for reminder in reminders:
+                    reminder_id, event_id, reminder_time, message, event_title, event_date, event_time = reminder
+                    if event_title is None:
+                        # Evento apagado: o lembrete é só marcado como enviado, para não ser reservado de novo
+                        print(f"⚠️ Lembrete {reminder_id} sem evento {event_id}; descartado")
+                        continue
+                    if PLYER_AVAILABLE:
+                        self._send_notification(event_title, message, event_time, event_date)
+                    delivered += 1
+                self._mark_sent([reminder[0] for reminder in reminders])
+                if handled is not None:
+                    handled.update(reminder[0] for reminder in reminders)
+                if len(reminders) < self.batch_size:
+                    return delivered
         except Error as e:
             print(f"Erro ao processar lembretes: {e}")
+            return delivered
+
+    def _claim_batch(self) -> List[Tuple[Any, ...]]:
+        """Reserva para este processo até batch_size lembretes vencidos e sem reserva válida.
+
+        O vencimento usa o relógio local, o mesmo em que reminder_time é
+        gravado (hora local sem fuso), e não o NOW() do banco, que pode estar
+        em UTC. A reserva usa NOW(), comum a todos os processos. Lembretes
+        já reservados por este processo e ainda não enviados (de uma entrega
+        interrompida) voltam no mesmo lote. O LEFT JOIN mantém no lote os
+        lembretes cujo evento foi apagado (título NULL), que são descartados e
+        marcados como enviados em vez de ficarem reservados para sempre.
+        """
+        with self.provider.transaction() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                UPDATE reminders
+                SET claimed_by = %s, lease_until = NOW() + INTERVAL %s SECOND
+                WHERE is_sent = 0 AND reminder_time <= %s
+                  AND (lease_until IS NULL OR lease_until < NOW())
+                ORDER BY reminder_time
+                LIMIT %s
+            ''', (self.worker_id, self.lease_seconds, datetime.now(), self.batch_size))
+            cursor.execute('''
+                SELECT r.id, r.event_id, r.reminder_time, r.message, e.title, e.date, e.time
+                FROM reminders r
+                LEFT JOIN events e ON r.event_id = e.id
+                WHERE r.claimed_by = %s AND r.is_sent = 0
+                ORDER BY r.reminder_time
+                LIMIT %s
+            ''', (self.worker_id, self.batch_size))
+            return cursor.fetchall()
+
+    def _mark_sent(self, reminder_ids: List[int]) -> None:
+        """Marca o lote como enviado em um único UPDATE, só se a reserva ainda é deste processo"""
+        if not reminder_ids:
+            return
+        with self.provider.transaction() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f'''
+                UPDATE reminders
+                SET is_sent = 1, claimed_by = NULL, lease_until = NULL
+                WHERE claimed_by = %s AND id IN ({', '.join(['%s'] * len(reminder_ids))})
+            ''', [self.worker_id, *reminder_ids])
 
     def _send_notification(self, title, message, event_time, event_date):
         if PLYER_AVAILABLE:
@@ -88,16 +292,20 @@ class ReminderSystem:
         else:
             print(f"🔔 Lembrete: {title} - {message}")
 
-    def create_reminder(self, event_id: int, reminder_time: str, message: str) -> None:
+    def create_reminder(self, event_id: int, reminder_time: str, message: str) -> Optional[int]:
         try:
-            cursor = self.connection.cursor()
-            cursor.execute('''
-                INSERT INTO reminders (event_id, reminder_time, message, is_sent)
-                VALUES (%s, %s, %s, 0)
-            ''', (event_id, reminder_time, message))
-            self.connection.commit()
+            with self.provider.transaction() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    INSERT INTO reminders (event_id, reminder_time, message, is_sent)
+                    VALUES (%s, %s, %s, 0)
+                ''', (event_id, reminder_time, message))
+                reminder_id = cursor.lastrowid
+            self.schedule(reminder_id, reminder_time)
+            return reminder_id
         except Error as e:
             print(f"Erro ao criar lembrete: {e}")
+            return None
 
     def parse_reminder_time(self, reminder_text: str, event_date: str, event_time: Optional[str] = None) -> str:
         """Converte texto de lembrete em timestamp"""
@@ -107,20 +315,8 @@ class ReminderSystem:
             if event_time:
                 event_datetime = datetime.strptime(f"{event_date} {event_time}", "%d/%m/%Y %H:%M")
 
-            # Processa diferentes formatos de lembrete
-            reminder_text = reminder_text.lower().strip()
-
-            if "30min" in reminder_text or "30 minutos" in reminder_text:
-                reminder_datetime = event_datetime - timedelta(minutes=30)
-            elif "1h" in reminder_text or "1 hora" in reminder_text:
-                reminder_datetime = event_datetime - timedelta(hours=1)
-            elif "2h" in reminder_text or "2 horas" in reminder_text:
-                reminder_datetime = event_datetime - timedelta(hours=2)
-            elif "1 dia" in reminder_text or "1d" in reminder_text:
-                reminder_datetime = event_datetime - timedelta(days=1)
-            else:
-                # Padrão: 1 hora antes
-                reminder_datetime = event_datetime - timedelta(hours=1)
+            # Durações e horários em português ou inglês (ver notifications.reminder_parser)
+            reminder_datetime = parse_reminder_datetime(reminder_text, event_datetime)
 
             return reminder_datetime.strftime("%Y-%m-%d %H:%M:%S")
 
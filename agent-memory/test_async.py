@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Script de teste do adaptador assíncrono do banco
+"""
+
+import asyncio
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+from database.async_adapter import AsyncAdapter, database_executor
+from database.database import DatabaseManager
+from utils.audio_encoding import EncodedAudio
+from utils.transcription import transcribe_async
+
+class _SlowTarget:
+    """Gerenciador falso que mede quantas chamadas rodam ao mesmo tempo"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.active = 0
+        self.peak = 0
+        self.name = "lento"
+
+    def query(self, value):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(0.05)
+        with self.lock:
+            self.active -= 1
+        return value * 2
+
+def test_adapter_runs_concurrently_within_pool_size():
+    """As chamadas não bloqueiam o laço e nunca passam do tamanho do pool"""
+    target = _SlowTarget()
+    executor = database_executor(pool_size=3)
+    adapter = AsyncAdapter(target, executor)
+
+    async def main():
+        start = time.perf_counter()
+        results = await asyncio.gather(*(adapter.query(i) for i in range(9)))
+        return results, time.perf_counter() - start
+
+    results, elapsed = asyncio.run(main())
+    executor.shutdown()
+
+    assert results == [i * 2 for i in range(9)]
+    assert target.peak == 3
+    assert elapsed < 0.4
+    assert adapter.name == "lento"
+
+def test_adapter_over_database_manager():
+    """O adaptador usa o esquema e as conexões do DatabaseManager existente"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(os.path.join(tmp, "memory.db"))
+        executor = database_executor(pool_size=2)
+        adb = AsyncAdapter(db, executor)
+
+        async def session(n):
+            await adb.save_interaction(f"sessão {n}", "ok")
+
+        async def main():
+            await asyncio.gather(*(session(n) for n in range(4)))
+            return await adb.get_recent_interactions(10)
+
+        interactions = asyncio.run(main())
+        executor.shutdown()
+        db.close()
+
+        assert sorted(item['human_message'] for item in interactions) == [f"sessão {n}" for n in range(4)]
+
+class _AsyncClient:
+    """Cliente mínimo com a interface de AsyncOpenAI().audio.transcriptions.create"""
+
+    def __init__(self):
+        self.audio = self
+        self.transcriptions = self
+        self.uploads = []
+
+    async def create(self, model, file, language):
+        self.uploads.append(file[0])
+        return type('Transcription', (), {'text': 'olá'})()
+
+def test_transcribe_async_uploads_from_memory():
+    """A transcrição assíncrona envia o áudio direto da memória"""
+    audio = EncodedAudio(b'RIFF', 'wav', 16000, 0.5, 16000, 0.0)
+    client = _AsyncClient()
+
+    assert asyncio.run(transcribe_async(client, audio)) == 'olá'
+    assert client.uploads == ['audio.wav']
+
+def test_reminder_loop_wakes_when_reminder_is_scheduled():
+    """Um lembrete agendado de outra thread acorda o laço antes de reminder_interval"""
+    from main_async import AsyncEnhancedMemoryAssistant
+    from notifications.reminder_system import ReminderSystem
+
+    delivered = []
+    system = ReminderSystem(provider=object(), resync_interval=None)
+
+    def process_reminders(handled):
+        delivered.append(time.monotonic())
+        handled.add(1)
+        return 1
+
+    system._process_reminders = process_reminders
+    executor = database_executor(pool_size=2)
+    assistant = AsyncEnhancedMemoryAssistant.__new__(AsyncEnhancedMemoryAssistant)
+    assistant.reminder_system = system
+    assistant.reminders = AsyncAdapter(system, executor)
+    assistant.reminder_interval = 60.0
+    assistant.reminder_task = None
+    assistant.reminder_wakeup = None
+    assistant._wake_reminder_loop = None
+
+    async def main():
+        await assistant.start()
+        await asyncio.sleep(0.05)
+        start = time.monotonic()
+        # Como save_events_batch no executor: agenda fora do laço de eventos
+        threading.Thread(target=system.schedule, args=(1, datetime.now())).start()
+        for _ in range(100):
+            if delivered:
+                break
+            await asyncio.sleep(0.01)
+        assistant.reminder_task.cancel()
+        try:
+            await assistant.reminder_task
+        except asyncio.CancelledError:
+            pass
+        return start
+
+    start = asyncio.run(main())
+    executor.shutdown()
+
+    assert len(delivered) == 1
+    assert delivered[0] - start < 0.5
+    assert system._wakeup_listeners == [assistant._wake_reminder_loop]
+
+def test_close_does_not_block_the_event_loop():
+    """close() espera as chamadas ao banco em andamento sem parar o laço de eventos"""
+    from types import SimpleNamespace
+    from main_async import AsyncEnhancedMemoryAssistant
+
+    executor = database_executor(pool_size=1)
+    closed = []
+    assistant = AsyncEnhancedMemoryAssistant.__new__(AsyncEnhancedMemoryAssistant)
+    assistant.executor = executor
+    assistant.reminder_task = None
+    assistant._wake_reminder_loop = None
+    assistant.tool_strategy = SimpleNamespace(stats=SimpleNamespace(report=lambda: "-"), persist=lambda: None)
+    assistant.db_manager = SimpleNamespace(close=lambda: closed.append(True))
+
+    async def main():
+        executor.submit(time.sleep, 0.3)
+        ticks = []
+
+        async def ticker():
+            while True:
+                ticks.append(time.monotonic())
+                await asyncio.sleep(0.01)
+
+        task = asyncio.create_task(ticker())
+        await assistant.close()
+        task.cancel()
+        return ticks
+
+    ticks = asyncio.run(main())
+    assert closed == [True]
+    assert len(ticks) > 10
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Script de teste para o pipeline de áudio (buffer de captura)
+"""
+
+import math
+import struct
+import threading
+import io
+import os
+import wave
+import utils.pcm
+from utils.audio_buffer import AudioRingBuffer
+from utils.audio_encoding import AudioEncoder
+from utils.pcm import Resampler
+from utils.transcription import transcribe
+from utils.vad import EnergyVAD
+
+RATE = 16000
+
+def _pcm(seconds: float, amplitude: int = 0, frequency: float = 220.0) -> bytes:
+    count = int(RATE * seconds)
+    return struct.pack(f'<{count}h', *(int(amplitude * math.sin(2 * math.pi * frequency * i / RATE)) for i in range(count)))
+
+def _chunks(data: bytes, size: int = 640):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+def test_ring_buffer_wraps_around():
+    """Leituras e escritas que atravessam o fim do buffer preservam a ordem"""
+    ring = AudioRingBuffer(8)
+    ring.write(b'abcdef')
+    assert ring.read(4) == b'abcd'
+    ring.write(b'ghijkl')
+    assert len(ring) == 8
+    assert ring.read(8) == b'efghijkl'
+    assert ring.dropped_bytes == 0
+
+def test_ring_buffer_drops_oldest_when_full():
+    """Com o consumidor atrasado a memória não cresce: o mais antigo é descartado"""
+    ring = AudioRingBuffer(6)
+    ring.write(b'aabbcc')
+    ring.write(b'ddee')
+    assert ring.dropped_bytes == 4
+    assert ring.read(6) == b'ccddee'
+
+def test_ring_buffer_blocks_until_data_or_close():
+    """A leitura espera o produtor e entrega o restante depois do close"""
+    ring = AudioRingBuffer(64)
+    assert ring.read(4, timeout=0.01) == b''
+
+    def producer() -> None:
+        ring.write(b'1234')
+        ring.write(b'56')
+        ring.close()
+
+    thread = threading.Thread(target=producer)
+    thread.start()
+    assert ring.read(4, timeout=1) == b'1234'
+    assert ring.read(4, timeout=1) == b'56'
+    assert ring.read(4) == b''
+    thread.join()
+
+def test_vad_trims_silence_and_stops():
+    """O VAD corta o silêncio das pontas e encerra sozinho após o silêncio final"""
+    audio = _pcm(1.0) + _pcm(0.6, 8000) + _pcm(0.3) + _pcm(0.6, 8000) + _pcm(3.0)
+    vad = EnergyVAD(RATE, trailing_silence_ms=800, pre_roll_ms=200)
+
+    kept = b''.join(vad.process(_chunks(audio)))
+    stats = vad.stats
+
+    assert stats.ended_by == 'silence'
+    assert abs(stats.voiced_seconds - 1.2) < 0.05
+    # Fala + pausa interna + pre-roll, sem o silêncio das pontas
+    assert abs(len(kept) / (RATE * 2) - 1.7) < 0.05
+    assert abs(stats.leading_trimmed_seconds - 0.8) < 0.05
+    assert abs(stats.trailing_trimmed_seconds - 0.8) < 0.05
+    assert stats.captured_seconds < 3.5
+
+def test_vad_gives_up_without_speech():
+    """Sem fala nenhuma, a gravação termina e nada é enviado"""
+    vad = EnergyVAD(RATE, max_leading_silence_ms=2000)
+    assert b''.join(vad.process(_chunks(_pcm(5.0, 50)))) == b''
+    assert vad.stats.ended_by == 'no_speech'
+    assert vad.stats.kept_seconds == 0
+
+def test_resampler_keeps_duration_in_chunks():
+    """Reamostrar bloco a bloco gera a duração certa, com ou sem audioop"""
+    audio = _pcm(1.0, 8000)
+    original = utils.pcm.audioop
+    try:
+        for backend in (original, None):
+            utils.pcm.audioop = backend
+            resampler = Resampler(RATE, 8000)
+            out = b''.join(resampler.process(chunk) for chunk in _chunks(audio, 2048 + 2))
+            assert abs(len(out) // 2 - 8000) <= 2
+    finally:
+        utils.pcm.audioop = original
+
+def test_encoder_writes_16k_wav_in_memory():
+    """O encoder gera um WAV 16 kHz em memória a partir de blocos a 44,1 kHz"""
+    rate = 44100
+    count = rate * 2
+    audio = struct.pack(f'<{count}h', *(int(8000 * math.sin(2 * math.pi * 220 * i / rate)) for i in range(count)))
+
+    encoded = AudioEncoder('wav', 16000).encode(_chunks(audio, 2048), rate)
+
+    with wave.open(io.BytesIO(encoded.data)) as wf:
+        assert wf.getframerate() == 16000
+        assert abs(wf.getnframes() - 32000) <= 2
+    assert encoded.pcm_bytes == len(audio)
+    assert encoded.bytes_on_wire < len(audio) / 2.5
+    assert encoded.as_upload()[0] == 'audio.wav'
+
+class _RecordingClient:
+    """Cliente mínimo com a mesma interface de client.audio.transcriptions.create"""
+
+    def __init__(self):
+        self.audio = self
+        self.transcriptions = self
+        self.uploads = []
+
+    def create(self, model, file, language):
+        if isinstance(file, tuple):
+            self.uploads.append(('memory', file[0], None))
+        else:
+            self.uploads.append(('file', file.name, file.read()))
+        return type('Transcription', (), {'text': 'olá'})()
+
+def test_transcribe_uploads_from_memory_or_unique_tempfile():
+    """O upload padrão não toca o disco; o modo arquivo temporário apaga o arquivo na hora"""
+    audio = AudioEncoder('wav', 16000).encode(_chunks(_pcm(1.0, 8000)), RATE)
+    client = _RecordingClient()
+
+    assert transcribe(client, audio, use_tempfile=False) == 'olá'
+    assert transcribe(client, audio, use_tempfile=True) == 'olá'
+
+    assert client.uploads[0] == ('memory', 'audio.wav', None)
+    kind, path, data = client.uploads[1]
+    assert kind == 'file' and data == audio.data
+    assert path.endswith('.wav') and not os.path.exists(path)
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Script de teste para o ContextBuilder (contexto do prompt com orçamento de tokens)
+"""
+
+from datetime import datetime
+from context.context_builder import ContextBuilder, estimate_tokens
+
+NOW = datetime(2025, 7, 10, 12, 0)
+
+def _events(count: int):
+    return [
+        {
+            'date': f"{(i % 28) + 1:02d}/06/2025",
+            'title': f"Evento rotineiro {i}",
+            'description': "Descrição longa " * 10,
+            'category': 'outros',
+            'priority': 'media'
+        }
+        for i in range(count)
+    ]
+
+def test_budget_is_respected():
+    """O contexto nunca passa do orçamento, mesmo com muita memória"""
+    builder = ContextBuilder(max_tokens=300)
+    interactions = [{'human_message': "oi " * 50, 'assistant_message': "olá " * 50} for _ in range(100)]
+    identities = "\n".join(f"Pessoa: Pessoa {i}, Relacionamento: amigo" for i in range(100))
+
+    bundle = builder.build("como foi a semana?", _events(200), interactions, identities, now=NOW)
+
+    assert bundle.total_tokens <= 300
+    assert estimate_tokens(bundle.text) <= 300
+    assert set(bundle.section_tokens) == {'events', 'interactions', 'identities'}
+    assert all(bundle.section_items[name] > 0 for name in bundle.section_items)
+    assert sum(bundle.dropped_items.values()) > 0
+
+def test_relevant_items_win():
+    """Itens que compartilham palavras com a fala passam na frente dos apenas recentes"""
+    builder = ContextBuilder(max_tokens=120)
+    events = _events(30) + [{
+        'date': '01/01/2024', 'title': 'Consulta com a dermatologista',
+        'description': 'Retorno', 'category': 'saude', 'priority': 'alta'
+    }]
+
+    bundle = builder.build("quando foi minha consulta na dermatologista?", events, now=NOW)
+
+    assert 'dermatologista' in bundle.text
+
+def test_compact_rendering():
+    """Eventos viram uma linha compacta, sem JSON indentado"""
+    builder = ContextBuilder()
+    bundle = builder.build("reunião", [{
+        'date': '10/07/2025', 'time': '10:00', 'title': 'Reunião', 'description': 'Planejamento',
+        'category': 'trabalho', 'priority': 'alta', 'location': 'Escritório'
+    }], now=NOW)
+
+    assert bundle.text == "EVENTOS:\n10/07/2025 10:00 [trabalho/alta] Reunião — Planejamento @ Escritório"
@@ -0,0 +1,389 @@
+#!/usr/bin/env python3
+"""
+Script de teste para o DatabaseManager SQLite
+"""
+
+import os
+import sqlite3
+import tempfile
+import threading
+from datetime import date
+from database.database import DatabaseManager
+from database.migrations import LATEST_VERSION, MigrationRunner, _mysql_upgrade_event_dates
+from database.sqlite_pool import SQLiteConnectionPool
+
+def _new_manager(tmp: str) -> DatabaseManager:
+    return DatabaseManager(os.path.join(tmp, "memory.db"))
+
+def test_connection_reuse():
+    """A mesma thread reutiliza a mesma conexão, em modo WAL"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db = _new_manager(tmp)
+        conn = db.pool.get_connection()
+        db.save_interaction("olá", "oi")
+        db.get_recent_interactions()
+        assert db.pool.get_connection() is conn
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        db.close()
+
+def test_connection_per_thread():
+    """Threads diferentes recebem conexões diferentes e enxergam os mesmos dados"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db = _new_manager(tmp)
+        main_conn = db.pool.get_connection()
+        seen = {}
+
+        def worker() -> None:
+            seen['conn'] = db.pool.get_connection()
+            db.save_interaction("da thread", "ok")
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+
+        assert seen['conn'] is not main_conn
+        assert db.get_recent_interactions(1)[0]['human_message'] == "da thread"
+        db.close()
+
+def test_save_and_fetch_events():
+    """Eventos salvos podem ser buscados por data"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db = _new_manager(tmp)
+        assert db.save_events({
+            'date': '15/01/2025',
+            'events': [
+                {'title': 'Reunião', 'description': 'Planejamento', 'category': 'trabalho', 'time': '10:00'},
+                {'title': 'Academia', 'description': 'Treino', 'category': 'saude', 'time': '07:00'}
+            ]
+        })
+        events = db.get_events_by_date('15/01/2025')
+        assert [event['title'] for event in events] == ['Academia', 'Reunião']
+        db.close()
+
+def test_save_events_batch_returns_ids():
+    """O insert em lote retorna os ids gerados de cada payload, na ordem dos eventos"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db = _new_manager(tmp)
+        db.save_interaction("antes", "ok")
+        first = db.insert_events({'date': '01/01/2025', 'events': [{'title': 'Antigo', 'description': ''}]})
+        payloads = [
+            {'date': '02/01/2025', 'events': [{'title': 'A', 'description': ''}, {'title': 'B', 'description': ''}]},
+            {'date': '03/01/2025', 'events': []},
+            {'date': '04/01/2025', 'events': [{'title': 'C', 'description': ''}]}
+        ]
+        ids = db.save_events_batch(payloads)
+
+        assert len(first) == 1
+        assert [len(group) for group in ids] == [2, 0, 1]
+        conn = db.pool.get_connection()
+        titles = {row[0]: row[1] for row in conn.execute('SELECT id, title FROM events')}
+        assert [titles[i] for group in ids for i in group] == ['A', 'B', 'C']
+        db.close()
+
+def test_save_events_with_reminders():
+    """Eventos futuros com reminder ganham lembretes na mesma transação e o listener é avisado"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db = _new_manager(tmp)
+        scheduled = []
+        db.reminder_listener = scheduled.extend
+        ids = db.save_events_batch([
+            {'date': '10/03/2099', 'events': [
+                {'title': 'Reunião', 'description': '', 'time': '10:00', 'reminder': '30 minutos antes'},
+                {'title': 'Almoço', 'description': '', 'time': '12:00'}
+            ]},
+            {'date': '01/01/2000', 'events': [{'title': 'Antigo', 'description': '', 'time': '09:00', 'reminder': '1h'}]}
+        ], with_reminders=True)
+
+        conn = db.pool.get_connection()
+        rows = conn.execute('SELECT id, event_id, reminder_time, message FROM reminders').fetchall()
+        assert [row[1:] for row in rows] == [(ids[0][0], '2099-03-10 09:30:00', '30 minutos antes')]
+        assert scheduled == [(rows[0][0], '2099-03-10 09:30:00')]
+        db.save_events({'date': '11/03/2099', 'events': [{'title': 'X', 'description': '', 'reminder': '1h'}]})
+        assert conn.execute('SELECT COUNT(*) FROM reminders').fetchone()[0] == 1
+        db.close()
+
+def test_legacy_dates_are_migrated():
+    """Bancos antigos com datas DD/MM/YYYY são convertidos para datas ISO"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "memory.db")
+        legacy = sqlite3.connect(db_path)
+        legacy.execute('''
+            CREATE TABLE events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                date TEXT NOT NULL,
+                title TEXT NOT NULL,
+                description TEXT,
+                category TEXT NOT NULL,
+                priority TEXT DEFAULT 'media',
+                time TEXT,
+                location TEXT,
+                reminder TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        legacy.execute("INSERT INTO events (date, title, category, time) VALUES ('7/3/2025', 'Antigo', 'outros', '9:30')")
+        legacy.execute("INSERT INTO events (date, title, category, created_at) VALUES ('amanhã', 'Ilegível', 'outros', '2025-03-01 10:00:00')")
+        legacy.commit()
+        legacy.close()
+
+        db = DatabaseManager(db_path)
+        conn = db.pool.get_connection()
+        assert conn.execute('SELECT date, time, event_at FROM events').fetchone() == ('2025-03-07', '09:30', '2025-03-07 09:30:00')
+        # Datas ilegíveis caem para o dia do registro em vez de ficarem como texto
+        assert conn.execute("SELECT date FROM events WHERE title = 'Ilegível'").fetchone() == ('2025-03-01',)
+        assert db.get_events_by_date('07/03/2025')[0]['date'] == '07/03/2025'
+        db.close()
+
+class _FakeMySQLEvents:
+    """Cursor MySQL falso: só a tabela events, com colunas e linhas em memória"""
+
+    def __init__(self, columns):
+        self.columns = dict(columns)
+        self.rows = {1: {'date': '7/3/2025', 'time': '9:30', 'created_at': '2025-03-01 10:00:00'}}
+        self.alters = []
+        self.result = []
+
+    def execute(self, query, params=()):
+        query = ' '.join(query.split())
+        if 'INFORMATION_SCHEMA.COLUMNS' in query:
+            self.result = list(self.columns.items())
+        elif query.startswith('ALTER TABLE events'):
+            self.alters.append(query)
+            if 'ADD COLUMN date_new' in query:
+                assert 'date_new' not in self.columns
+                self.columns['date_new'] = 'date'
+            elif 'ADD COLUMN event_at' in query:
+                assert 'event_at' not in self.columns
+                self.columns['event_at'] = 'datetime'
+            elif 'DROP COLUMN date' in query:
+                del self.columns['date']
+            elif 'CHANGE COLUMN date_new date' in query:
+                self.columns['date'] = self.columns.pop('date_new')
+        elif query.startswith('SELECT id, date, time FROM events'):
+            self.result = [(event_id, row['date'], row['time']) for event_id, row in self.rows.items()]
+        elif query.startswith('UPDATE events SET date_new = DATE(created_at)'):
+            for row in self.rows.values():
+                row.setdefault('date_new', row['created_at'][:10])
+        else:
+            raise AssertionError(f"consulta inesperada: {query}")
+
+    def executemany(self, query, params):
+        for date_new, time, event_at, event_id in params:
+            self.rows[event_id].update(date_new=date_new, time=time, event_at=event_at)
+
+    def fetchall(self):
+        return self.result
+
+def test_mysql_date_upgrade_resumes_after_partial_run():
+    """A conversão de datas no MySQL retoma de onde parou (o DDL faz commit implícito)"""
+    legacy = {'id': 'int', 'date': 'varchar', 'time': 'varchar', 'created_at': 'timestamp'}
+    states = [
+        legacy,
+        # Interrompida depois de criar date_new
+        dict(legacy, date_new='date'),
+        # Interrompida depois de remover a coluna antiga
+        {'id': 'int', 'date_new': 'date', 'time': 'varchar', 'event_at': 'datetime', 'created_at': 'timestamp'},
+    ]
+    for columns in states:
+        cursor = _FakeMySQLEvents(columns)
+        _mysql_upgrade_event_dates(cursor)
+        assert cursor.columns['date'] == 'date'
+        assert 'date_new' not in cursor.columns and 'event_at' in cursor.columns
+        assert cursor.alters[-1] == 'ALTER TABLE events CHANGE COLUMN date_new date DATE NOT NULL'
+
+        # Uma nova execução sobre o schema já convertido não faz nada
+        cursor.alters = []
+        _mysql_upgrade_event_dates(cursor)
+        assert cursor.alters == []
+
+    cursor = _FakeMySQLEvents(legacy)
+    _mysql_upgrade_event_dates(cursor)
+    assert cursor.rows[1]['date_new'] == '2025-03-07' and cursor.rows[1]['time'] == '09:30'
+
+def test_unreadable_payload_date_keeps_the_events():
+    """Uma data que não pode ser interpretada não descarta os eventos do payload"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db = _new_manager(tmp)
+        assert db.save_events({'date': 'hoje', 'events': [{'title': 'A'}, {'title': 'B'}]})
+        conn = db.pool.get_connection()
+        assert conn.execute('SELECT date FROM events').fetchall() == [(date.today().isoformat(),)] * 2
+        db.close()
+
+def test_range_queries_use_indexes():
+    """Consultas por data e por timestamp usam os índices criados"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db = _new_manager(tmp)
+        conn = db.pool.get_connection()
+        plan = ' '.join(str(row) for row in conn.execute(
+            "EXPLAIN QUERY PLAN SELECT id FROM events WHERE date >= date('now', '-7 days')"))
+        assert 'idx_events_date_time' in plan
+        plan = ' '.join(str(row) for row in conn.execute(
+            "EXPLAIN QUERY PLAN SELECT id FROM interactions ORDER BY timestamp DESC LIMIT 20"))
+        assert 'idx_interactions_timestamp' in plan
+        db.close()
+
+def test_migrations_record_version():
+    """As migrações registram a versão e a reinicialização não executa DDL"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "memory.db")
+        db = DatabaseManager(db_path)
+        conn = db.pool.get_connection()
+        assert MigrationRunner('sqlite').current_version(conn) == LATEST_VERSION
+        db.close()
+
+        pool = SQLiteConnectionPool(db_path)
+        statements = []
+        pool.get_connection().set_trace_callback(statements.append)
+        DatabaseManager(db_path, pool=pool).close()
+        assert statements == ['SELECT MAX(version) FROM schema_migrations']
+
+def test_identity_names_become_unique():
+    """A migração remove identidades duplicadas (mantendo a mais antiga) e cria o índice único"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "memory.db")
+        legacy = sqlite3.connect(db_path)
+        legacy.execute('CREATE TABLE identities (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL, relationship TEXT)')
+        legacy.executemany('INSERT INTO identities (name, relationship) VALUES (?, ?)',
+                           [('Ana', 'irmã'), ('Bruno', None), ('Ana', None)])
+        legacy.commit()
+        legacy.close()
+
+        db = DatabaseManager(db_path)
+        conn = db.pool.get_connection()
+        assert conn.execute('SELECT name, relationship FROM identities ORDER BY id').fetchall() == [('Ana', 'irmã'), ('Bruno', None)]
+        try:
+            conn.execute("INSERT INTO identities (name) VALUES ('Ana')")
+            assert False, "nome duplicado aceito"
+        except sqlite3.IntegrityError:
+            pass
+        db.close()
+
+def test_reminders_have_lease_columns():
+    """Lembretes têm as colunas de reserva usadas na entrega entre processos"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db = _new_manager(tmp)
+        conn = db.pool.get_connection()
+        columns = [row[1] for row in conn.execute('PRAGMA table_info(reminders)')]
+        assert 'claimed_by' in columns and 'lease_until' in columns
+        db.close()
+
+def test_post_commit_failures_keep_the_ids():
+    """Uma falha ao agendar ou indexar depois do commit não esconde os eventos gravados"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db = _new_manager(tmp)
+
+        def broken_listener(reminders):
+            raise RuntimeError("agenda indisponível")
+
+        def broken_index(items):
+            raise RuntimeError("índice indisponível")
+
+        db.reminder_listener = broken_listener
+        db.vector_index.add_many = broken_index
+        ids = db.save_events_batch([{'date': '11/03/2099', 'events': [{'title': 'X', 'reminder': '1h'}]}],
+                                   with_reminders=True)
+        conn = db.pool.get_connection()
+        assert ids == [[conn.execute('SELECT id FROM events').fetchone()[0]]]
+        assert conn.execute('SELECT COUNT(*) FROM reminders').fetchone()[0] == 1
+        db.close()
+
+def test_vector_index_errors_stay_in_the_manager():
+    """Falhas do índice semântico são registradas sem perder a interação nem derrubar a busca"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db = _new_manager(tmp)
+
+        def mismatched(*args):
+            raise ValueError("dimensão do vetor diferente da do índice")
+
+        db.vector_index.add = mismatched
+        db.vector_index.search = mismatched
+        db.save_interaction("comprei ração para o cachorro", "anotado")
+        conn = db.pool.get_connection()
+        assert conn.execute('SELECT COUNT(*) FROM interactions').fetchone()[0] == 1
+        assert db.semantic_search("cachorros") == []
+        db.close()
+
+def test_semantic_search():
+    """Eventos e interações são indexados ao salvar e o índice persiste ao lado do banco"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db = _new_manager(tmp)
+        db.save_events({
+            'date': '10/02/2025',
+            'events': [
+                {'title': 'Consulta na dermatologista', 'description': 'Retorno da pele', 'category': 'saude'},
+                {'title': 'Reunião de orçamento', 'description': 'Planilha do trimestre', 'category': 'trabalho'}
+            ]
+        })
+        db.save_interaction("comprei ração para o cachorro", "anotado")
+
+        hits = db.semantic_search("quando foi a dermatologia?", k=1)
+        assert hits[0]['kind'] == 'event' and hits[0]['title'] == 'Consulta na dermatologista'
+        hits = db.semantic_search("cachorros", k=1)
+        assert hits[0]['kind'] == 'interaction' and hits[0]['human_message'].startswith("comprei")
+        db.close()
+
+        reopened = _new_manager(tmp)
+        assert len(reopened.vector_index) == 3
+        assert reopened.semantic_search("orçamentos", k=1)[0]['title'] == 'Reunião de orçamento'
+        reopened.close()
+
+def test_vector_index_backfills_after_crash():
+    """Itens que estavam na fila do índice quando o processo caiu são indexados ao reabrir"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db = _new_manager(tmp)
+        db.save_events({'date': '10/02/2025', 'events': [{'title': 'Consulta na dermatologista', 'category': 'saude'}]})
+        db.close()
+
+        crashed = _new_manager(tmp)
+        crashed.save_events({'date': '11/02/2025', 'events': [{'title': 'Reunião de orçamento', 'category': 'trabalho'}]})
+        crashed.save_interaction("comprei ração para o cachorro", "anotado")
+        # Queda antes do flush: a fila do índice nunca chega ao disco
+        crashed.pool.close_all()
+
+        reopened = _new_manager(tmp)
+        assert len(reopened.vector_index) == 3
+        assert reopened.semantic_search("orçamentos", k=1)[0]['title'] == 'Reunião de orçamento'
+        assert reopened.semantic_search("cachorros", k=1)[0]['kind'] == 'interaction'
+        reopened.close()
+
+def test_search_ranks_older_matches():
+    """O ranking usa todos os registros que casam, não só os mais recentes (antes eram 2000)"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db = _new_manager(tmp)
+        db.save_events({'date': '10/02/2025', 'events': [
+            {'title': 'Dentista dentista', 'description': 'Limpeza no dentista', 'category': 'saude'}
+        ]})
+        db.save_events({'date': '11/02/2025', 'events': [
+            {'title': f'Tarefa {n}', 'description': f'Lembrar de ligar para o dentista e depois resolver o item {n} da lista de pendências', 'category': 'outros'}
+            for n in range(2100)
+        ]})
+
+        assert db.search("dentista", limit=1)[0]['title'] == 'Dentista dentista'
+        page = db.search("dentista", limit=5, offset=2095)
+        assert len(page) == 5 and all(item['title'].startswith('Tarefa') for item in page)
+        db.close()
+
+def test_full_text_search():
+    """A busca textual encontra eventos e interações, ignora acentos e pagina por relevância"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db = _new_manager(tmp)
+        db.save_events({
+            'date': '10/02/2025',
+            'events': [
+                {'title': 'Reunião de orçamento', 'description': 'Reunião com a diretoria', 'category': 'trabalho'},
+                {'title': 'Academia', 'description': 'Treino de pernas', 'category': 'saude', 'location': 'Centro'},
+                {'title': 'Almoço', 'description': 'Depois da reunião', 'category': 'pessoal'}
+            ]
+        })
+        db.save_interaction("marquei uma reuniao com o João", "anotado")
+
+        results = db.search("reuniao")
+        assert len(results) == 3
+        assert results[0]['title'] == 'Reunião de orçamento'
+        assert {item['kind'] for item in results} == {'event', 'interaction'}
+        assert db.search("reun", limit=2, offset=2)[0]['id'] == results[2]['id']
+        assert [item['title'] for item in db.search("centro")] == ['Academia']
+        assert db.search("reunião joão", kinds=('interaction',))[0]['human_message'].startswith("marquei")
+        assert db.search("inexistente") == [] and db.search("!!") == []
+        db.close()
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Script de teste da normalização dos eventos vindos da IA
+"""
+
+from tools.event_normalizer import (
+    CATEGORIES, FIELDS, PRIORITIES, normalize_daily_events, normalize_event, normalize_events
+)
+
+def test_portuguese_fields_and_values():
+    """Campos em português e valores livres viram os do modelo Event"""
+    event = normalize_event({
+        'Título': 'Reunião', 'descrição': 'Planejamento', 'categoria': 'Reunião',
+        'prioridade': 'IMPORTANTE', 'horário': '10:00', 'local': 'Escritório', 'lembrete': '1h antes'
+    })
+    assert event == {
+        'title': 'Reunião', 'description': 'Planejamento', 'category': 'trabalho',
+        'priority': 'alta', 'time': '10:00', 'location': 'Escritório', 'reminder': '1h antes'
+    }
+
+def test_canonical_values_are_kept():
+    """Categorias e prioridades já válidas não caem no padrão (com ou sem acento)"""
+    events = normalize_events([
+        {'title': 'A', 'category': 'saude', 'priority': 'urgente'},
+        {'title': 'B', 'category': 'Saúde', 'priority': 'média'},
+        {'title': 'C', 'category': 'família', 'priority': None},
+        {'title': 'D', 'category': 'desconhecida', 'extra': 1}
+    ])
+    assert [(e['category'], e.get('priority')) for e in events] == [
+        ('saude', 'urgente'), ('saude', 'media'), ('familia', 'media'), ('outros', None)
+    ]
+    assert events[3]['extra'] == 1
+
+def test_batch_does_not_mutate_input():
+    """O lote devolve dicionários novos e preserva os demais campos do payload"""
+    payload = {'date': '10/07/2025', 'events': [{'titulo': 'Viagem', 'categoria': 'trip'}]}
+    result = normalize_daily_events([payload, {'date': '11/07/2025', 'events': None}])
+
+    assert result[0] == {'date': '10/07/2025', 'events': [{'title': 'Viagem', 'category': 'lazer'}]}
+    assert result[1]['events'] == []
+    assert payload['events'][0] == {'titulo': 'Viagem', 'categoria': 'trip'}
+
+def test_tables_are_read_only():
+    """As tabelas do módulo não podem ser alteradas"""
+    for table in (FIELDS, CATEGORIES, PRIORITIES):
+        try:
+            table['x'] = 'y'  # type: ignore[index]
+        except TypeError:
+            continue
+        raise AssertionError("tabela mutável")
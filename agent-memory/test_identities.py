@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Script de teste da extração de nomes de pessoas
+"""
+
+from identity.name_extractor import clean_name, extract_names, is_valid_person_name, name_key
+
+def test_all_original_patterns():
+    """Os seis padrões originais continuam reconhecidos, agora numa única passada"""
+    assert extract_names("meu colega Pedro ligou") == [('Pedro', 'colega')]
+    assert extract_names("Ana é minha irmã") == [('Ana', 'irmã')]
+    assert extract_names("Carlos trabalha no banco") == [('Carlos', None)]
+    assert extract_names("ontem visitei Helena") == [('Helena', None)]
+    assert extract_names("Bruno contou a novidade") == [('Bruno', None)]
+    assert extract_names("tive um jantar com Rafael Souza") == [('Rafael Souza', None)]
+
+def test_accented_names_and_order():
+    """Nomes com acento vêm inteiros, uma vez cada, na ordem da fala"""
+    text = "Encontrei Ângela e meu amigo João disse que Ângela é minha amiga"
+    assert extract_names(text) == [('Ângela', 'amiga'), ('João', 'amigo')]
+
+def test_invalid_words_are_filtered():
+    """Palavras de início de frase não viram pessoas"""
+    assert extract_names("Hoje foi um dia longo") == []
+    assert extract_names("Ontem João foi ao médico") == [('João', None)]
+    assert not is_valid_person_name("amanhã")
+    assert clean_name("Hoje Maria") == "Maria" and clean_name("Ele") is None
+
+def test_lowercase_text_has_no_names():
+    """Sem letras maiúsculas nenhum padrão casa"""
+    assert extract_names("meu amigo joão disse oi") == []
+    assert extract_names("") == []
+
+def test_name_key_folds_case_accents_and_spaces():
+    """Variações de caixa, acento e espaços do mesmo nome têm a mesma chave do cache"""
+    assert name_key("João  Pedro") == name_key("joao pedro") == "joao pedro"
+    assert name_key("Ângela") != name_key("Angelo")
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Script de teste do cache e das consultas em lote do IdentityManager
+"""
+
+import re
+from contextlib import contextmanager
+from types import SimpleNamespace
+from database.migrations import LATEST_VERSION
+from identity.identity_manager import IDENTITY_FIELDS, IdentityManager
+from identity.name_extractor import name_key
+
+_UPSERT = 'ON DUPLICATE KEY UPDATE relationship = COALESCE(relationship, VALUES(relationship))'
+
+class _FakeCursor:
+    def __init__(self, db):
+        self.db = db
+        self.rows = []
+
+    def execute(self, query, params=()):
+        query = ' '.join(query.split())
+        self.db.statements.append((query, list(params)))
+        if query == 'SELECT * FROM identities ORDER BY name':
+            self.rows = [self.db.row(name) for name in sorted(self.db.identities)]
+        elif query.startswith('SELECT * FROM identities WHERE name IN'):
+            # A collation do MySQL ignora maiúsculas e acentos, como name_key
+            keys = {name_key(name) for name in params}
+            self.rows = [self.db.row(name) for name in self.db.identities if name_key(name) in keys]
+        elif query.startswith('INSERT INTO identities (name, relationship) VALUES'):
+            assert query.endswith(_UPSERT)
+            for name, relationship in zip(params[::2], params[1::2]):
+                existing = self.db.find(name)
+                if existing is None:
+                    self.db.insert(name, relationship=relationship)
+                elif self.db.identities[existing]['relationship'] is None:
+                    self.db.identities[existing]['relationship'] = relationship
+        elif query.startswith('INSERT INTO identities (name, role'):
+            name, role, relationship, preferences, notes = params
+            self.db.insert(name, role=role, relationship=relationship, preferences=preferences, notes=notes)
+        elif query.startswith('UPDATE identities SET'):
+            fields = re.findall(r'(\w+) = %s', query)
+            values = dict(zip(fields, params))
+            self.db.identities[self.db.find(values.pop('name'))].update(values)
+        else:
+            raise AssertionError(f"consulta inesperada: {query}")
+
+    def fetchall(self):
+        return self.rows
+
+class _FakeProvider:
+    """Tabela identities em memória; o schema já está na última versão"""
+
+    schema_version = LATEST_VERSION
+
+    def __init__(self, identities=()):
+        self.identities = {}
+        self.statements = []
+        for name, relationship in identities:
+            self.insert(name, relationship=relationship)
+
+    def insert(self, name, **fields):
+        row = dict.fromkeys(IDENTITY_FIELDS)
+        row.update(fields, id=len(self.identities) + 1, name=name)
+        self.identities[name] = row
+
+    def find(self, name):
+        return next((existing for existing in self.identities if name_key(existing) == name_key(name)), None)
+
+    def row(self, name):
+        return tuple(self.identities[name][field] for field in IDENTITY_FIELDS)
+
+    def queries(self, prefix):
+        return [params for query, params in self.statements if query.startswith(prefix)]
+
+    @contextmanager
+    def connection(self):
+        yield SimpleNamespace(cursor=lambda: _FakeCursor(self))
+
+    transaction = connection
+
+def test_cache_hits_and_misses():
+    """Nomes aquecidos no cache não vão ao banco; nomes novos vão uma vez e ficam em cache"""
+    db = _FakeProvider([('Ana', 'irmã'), ('Bruno', None)])
+    manager = IdentityManager(provider=db)
+    assert len(db.statements) == 1
+
+    assert manager.get_identity('ana')['relationship'] == 'irmã'
+    assert manager.get_identity('Bruno')['name'] == 'Bruno'
+    assert len(db.statements) == 1
+
+    # Gravada por outra sessão depois do aquecimento
+    db.insert('Carla', relationship='colega')
+    assert manager.get_identity('Carla')['relationship'] == 'colega'
+    assert manager.get_identity('Carla')['relationship'] == 'colega'
+    assert db.queries('SELECT * FROM identities WHERE name IN') == [['Carla']]
+
+def test_missing_names_use_one_in_query():
+    """Os nomes fora do cache são buscados juntos em um único SELECT ... IN"""
+    db = _FakeProvider([('Ana', 'irmã'), ('Bruno', None), ('Carla', 'colega')])
+    manager = IdentityManager(provider=db, warm_cache=False)
+
+    found = manager.get_identities(['Ana', 'Bruno', 'Carla', 'Daniel'])
+    assert sorted(found) == ['ana', 'bruno', 'carla']
+    assert db.queries('SELECT * FROM identities WHERE name IN') == [['Ana', 'Bruno', 'Carla', 'Daniel']]
+
+    # Só o nome que não existe volta ao banco
+    manager.get_identities(['Ana', 'Daniel'])
+    assert db.queries('SELECT * FROM identities WHERE name IN')[-1] == ['Daniel']
+
+def test_upsert_only_fills_empty_relationships():
+    """Um único INSERT grava os novos e preenche o relacionamento só de quem não tinha"""
+    db = _FakeProvider([('Ana', 'irmã'), ('Bruno', None)])
+    manager = IdentityManager(provider=db)
+
+    assert manager.add_identities([('Ana', 'prima'), ('bruno', 'amigo'), ('Carla', 'colega')])
+    assert len(db.queries('INSERT INTO identities')) == 1
+    assert db.identities['Ana']['relationship'] == 'irmã'
+    assert db.identities['Bruno']['relationship'] == 'amigo'
+    assert db.identities['Carla']['relationship'] == 'colega'
+    assert len(db.identities) == 3
+
+    # A escrita invalida o cache: a leitura seguinte enxerga as linhas atualizadas
+    assert manager.get_identity('Bruno')['relationship'] == 'amigo'
+    assert manager.get_identity('Carla')['relationship'] == 'colega'
+
+def test_contexts_are_rerendered_after_a_write():
+    """O texto de get_all_contexts sai do cache até uma escrita, que o invalida"""
+    db = _FakeProvider([('Ana', 'irmã'), ('Bruno', None)])
+    manager = IdentityManager(provider=db)
+
+    contexts = manager.get_all_contexts()
+    assert contexts == "Pessoa: Ana, Relacionamento: irmã\nPessoa: Bruno"
+    assert manager.get_all_contexts() is contexts
+    assert len(db.queries('SELECT * FROM identities ORDER BY name')) == 1
+
+    assert manager.update_identity('Bruno', relationship='amigo', notes='gosta de café')
+    contexts = manager.get_all_contexts()
+    assert contexts == "Pessoa: Ana, Relacionamento: irmã\nPessoa: Bruno, Relacionamento: amigo, Notas: gosta de café"
+    assert len(db.queries('SELECT * FROM identities ORDER BY name')) == 2
+    assert manager.get_all_contexts() is contexts
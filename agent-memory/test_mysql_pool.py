@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Script de teste do pool de conexões MySQL com um conector falso
+"""
+
+import time
+from types import SimpleNamespace
+from mysql.connector import Error
+from database.database_mysql import DatabaseManager
+from database.mysql_pool import MySQLConnectionProvider
+
+class _FakeConnection:
+    def __init__(self, number):
+        self.number = number
+        self.alive = True
+        self.closed = False
+        self.pings = 0
+        self.commits = 0
+        self.rollbacks = 0
+
+    def ping(self, reconnect=False, attempts=1, delay=0):
+        self.pings += 1
+        if not self.alive:
+            raise Error(msg="MySQL server has gone away", errno=2006)
+
+    def close(self):
+        self.closed = True
+
+    def start_transaction(self):
+        pass
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def cursor(self):
+        return SimpleNamespace(execute=lambda query, params=(): None, lastrowid=7)
+
+def _provider(**options):
+    provider = MySQLConnectionProvider(**options)
+    provider.connections = []
+
+    def connect():
+        conn = _FakeConnection(len(provider.connections) + 1)
+        provider.connections.append(conn)
+        return conn
+
+    provider._connect = connect
+    return provider
+
+def _lost():
+    return Error(msg="Lost connection to MySQL server during query", errno=2013)
+
+def test_checkout_is_reentrant():
+    """Checkouts aninhados na mesma thread usam a mesma conexão"""
+    provider = _provider()
+    with provider.connection() as outer:
+        with provider.transaction() as inner:
+            assert inner is outer
+    with provider.connection() as again:
+        assert again is outer
+    assert len(provider.connections) == 1
+    assert outer.commits == 1
+
+def test_lost_connection_is_discarded():
+    """Uma conexão perdida não volta ao pool e as ociosas antigas passam pelo ping"""
+    provider = _provider()
+    with provider.connection() as first:
+        # Segunda conexão ociosa, de antes da queda
+        second = provider._acquire()
+    provider._release(second)
+    try:
+        with provider.connection():
+            raise _lost()
+    except Error:
+        pass
+    assert second.closed and provider._created == 1
+
+    with provider.connection() as conn:
+        assert conn is first and first.pings == 1
+    assert not first.closed
+
+def test_health_check_replaces_dead_idle_connections():
+    """Só conexões ociosas além do intervalo são verificadas; as mortas são trocadas"""
+    provider = _provider(health_check_interval=60.0)
+    with provider.connection() as conn:
+        pass
+    with provider.connection():
+        pass
+    assert conn.pings == 0
+
+    provider.health_check_interval = 0.0
+    conn.alive = False
+    time.sleep(0.01)
+    with provider.connection() as replacement:
+        assert replacement is not conn
+    assert conn.closed and provider._created == 1
+
+def test_idle_connections_are_pruned():
+    """Conexões ociosas há mais de max_idle_time são fechadas ao devolver outra"""
+    provider = _provider(max_idle_time=5.0)
+    old = provider._acquire()
+    recent = provider._acquire()
+    provider._idle.put((old, time.monotonic() - 10))
+    provider._release(recent)
+    assert old.closed and not recent.closed
+    assert provider._idle.qsize() == 1 and provider._created == 1
+
+def test_exhausted_pool_times_out():
+    """Sem conexões livres o checkout espera checkout_timeout e falha"""
+    provider = _provider(pool_size=1, checkout_timeout=0.05)
+    held = provider._acquire()
+    start = time.monotonic()
+    try:
+        provider._acquire()
+        assert False, "o pool deveria estar esgotado"
+    except Error as e:
+        assert "esgotado" in str(e)
+    assert time.monotonic() - start >= 0.05
+    provider._release(held)
+    assert provider._acquire() is held
+
+def test_run_retries_once_after_lost_connection():
+    """run() repete uma vez a operação interrompida antes do commit"""
+    provider = _provider()
+    calls = []
+
+    def insert(conn):
+        calls.append(conn)
+        if len(calls) == 1:
+            raise _lost()
+        return 42
+
+    assert provider.run(insert, transaction=True) == 42
+    assert len(calls) == 2 and calls[0] is not calls[1]
+    assert calls[0].closed and calls[1].commits == 1
+
+    # Duas quedas seguidas: a segunda chega a quem chamou
+    def always_lost(conn):
+        raise _lost()
+
+    try:
+        provider.run(always_lost)
+        assert False, "a segunda queda deveria ser levantada"
+    except Error as e:
+        assert e.errno == 2013
+
+def test_run_does_not_retry_a_failed_commit():
+    """Uma queda no commit não é repetida: o INSERT pode já ter sido aplicado"""
+    provider = _provider()
+    calls = []
+
+    def lost_commit():
+        raise _lost()
+
+    def insert(conn):
+        calls.append(conn)
+        conn.commit = lost_commit
+
+    try:
+        provider.run(insert, transaction=True)
+        assert False, "a queda no commit deveria ser levantada"
+    except Error:
+        pass
+    assert len(calls) == 1
+
+def test_vector_index_errors_do_not_escape():
+    """Erros do índice semântico (dimensão, disco) não saem de save_interaction nem de semantic_search"""
+    manager = DatabaseManager.__new__(DatabaseManager)
+    manager.provider = _provider()
+
+    def full_disk(*args):
+        raise OSError(28, "No space left on device")
+
+    def mismatched(*args):
+        raise ValueError("dimensão do vetor diferente da do índice")
+
+    class _BrokenIndex:
+        add = staticmethod(full_disk)
+        search = staticmethod(mismatched)
+
+        def __len__(self):
+            return 1
+
+    manager.vector_index = _BrokenIndex()
+    manager.save_interaction("comprei ração para o cachorro", "anotado")
+    assert manager.provider.connections[0].commits == 1
+    assert manager.semantic_search("cachorros") == []
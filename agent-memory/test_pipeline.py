@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Script de teste para o Pipeline (loop de voz em estágios)
+"""
+
+import itertools
+import threading
+import time
+from utils.pipeline import STOP, Pipeline
+
+def test_pipeline_keeps_order_with_backpressure():
+    """Os itens saem na ordem de entrada e a fonte espera quando o estágio lento atrasa"""
+    counter = itertools.count(1)
+    done = []
+
+    def source():
+        value = next(counter)
+        return value if value <= 8 else STOP
+
+    def slow(value):
+        time.sleep(0.02 if value % 2 else 0.005)
+        return value * 10
+
+    pipeline = Pipeline(source, [("lento", slow), ("gravar", lambda value: done.append(value) or value)],
+                        source_name="fonte", maxsize=1)
+    pipeline.run()
+
+    assert done == [value * 10 for value in range(1, 9)]
+    assert pipeline.completed == 8
+    assert pipeline.metrics[0].blocked_seconds > 0.02
+    assert all(metrics.count == 8 for metrics in pipeline.metrics)
+
+def test_pipeline_stop_drains_earlier_items():
+    """Um estágio que retorna STOP deixa os itens anteriores terminarem e descarta os seguintes"""
+    counter = itertools.count(1)
+    persisted = []
+    release = threading.Event()
+
+    def transcribe(value):
+        return STOP if value == 3 else value
+
+    def persist(value):
+        release.wait(1)
+        persisted.append(value)
+        return value
+
+    pipeline = Pipeline(lambda: next(counter), [("transcrever", transcribe), ("gravar", persist)], maxsize=4)
+    pipeline.start()
+    time.sleep(0.05)
+    release.set()
+    assert pipeline.join(timeout=2)
+
+    assert persisted == [1, 2]
+    assert pipeline.stopped
+
+def test_pipeline_drops_none_and_errors():
+    """None descarta o item; exceções são contadas e o pipeline continua"""
+    items = iter([1, None, 2, 3, STOP])
+    seen = []
+
+    def stage(value):
+        if value == 2:
+            raise ValueError("falhou")
+        return value
+
+    pipeline = Pipeline(lambda: next(items), [("estágio", stage), ("fim", seen.append)])
+    pipeline.run()
+
+    assert pipeline.metrics[0].dropped == 1
+    assert pipeline.metrics[1].errors == 1
+    # seen.append retorna None: o último estágio registra como descartado
+    assert seen == [1, 3]
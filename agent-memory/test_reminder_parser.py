@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Script de teste do interpretador de lembretes
+"""
+
+from datetime import datetime
+from notifications.reminder_parser import parse_reminder, reminder_datetime
+
+EVENT = datetime(2025, 3, 14, 10, 0)
+
+def test_durations():
+    """Durações em português e inglês, inclusive combinadas e por extenso"""
+    assert reminder_datetime("30min", EVENT) == datetime(2025, 3, 14, 9, 30)
+    assert reminder_datetime("2 horas antes", EVENT) == datetime(2025, 3, 14, 8, 0)
+    assert reminder_datetime("uma hora e meia antes", EVENT) == datetime(2025, 3, 14, 8, 30)
+    assert reminder_datetime("1h30", EVENT) == datetime(2025, 3, 14, 8, 30)
+    assert reminder_datetime("15 minutes before", EVENT) == datetime(2025, 3, 14, 9, 45)
+    assert reminder_datetime("2 days before", EVENT) == datetime(2025, 3, 12, 10, 0)
+    assert reminder_datetime("10 minutos depois", EVENT) == datetime(2025, 3, 14, 10, 10)
+
+def test_day_before_is_not_counted_twice():
+    """Duração e "véspera" na mesma frase descrevem o mesmo dia, que é subtraído uma vez só"""
+    for text in ("1 day before", "one day before", "a day before", "um dia anterior"):
+        assert reminder_datetime(text, EVENT) == datetime(2025, 3, 13, 10, 0), text
+
+def test_articles_need_a_unit_word():
+    """"a"/"an" só contam como 1 antes de uma unidade por extenso"""
+    assert reminder_datetime("an hour before", EVENT) == datetime(2025, 3, 14, 9, 0)
+    assert parse_reminder("lembrar de levar a d") is None
+    assert parse_reminder("am") is None
+
+def test_absolute_times():
+    """Horários e datas absolutos, relativos ao dia do evento"""
+    assert reminder_datetime("às 18h", EVENT) == datetime(2025, 3, 14, 18, 0)
+    assert reminder_datetime("at 6pm", EVENT) == datetime(2025, 3, 14, 18, 0)
+    assert reminder_datetime("8h da manhã", EVENT) == datetime(2025, 3, 14, 8, 0)
+    assert reminder_datetime("na véspera às 20:00", EVENT) == datetime(2025, 3, 13, 20, 0)
+    assert reminder_datetime("na véspera", EVENT) == datetime(2025, 3, 13, 10, 0)
+    assert reminder_datetime("13/03 9h", EVENT) == datetime(2025, 3, 13, 9, 0)
+    assert reminder_datetime("na hora", EVENT) == EVENT
+
+def test_unknown_text_defaults_to_one_hour():
+    """Texto sem duração nem horário cai no padrão de 1 hora antes"""
+    assert parse_reminder("sim") is None
+    assert reminder_datetime("sim", EVENT) == datetime(2025, 3, 14, 9, 0)
+    assert reminder_datetime("", EVENT) == datetime(2025, 3, 14, 9, 0)
+
+def test_out_of_range_clock_uses_default():
+    """Horários impossíveis não viram durações ("às 25h" não é "25 horas antes")"""
+    assert parse_reminder("às 25h") is None
+    assert reminder_datetime("às 25h", EVENT) == datetime(2025, 3, 14, 9, 0)
+    assert reminder_datetime("at 10:75", EVENT) == datetime(2025, 3, 14, 9, 0)
+    assert reminder_datetime("na véspera 30h", EVENT) == datetime(2025, 3, 14, 9, 0)
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Script de teste da entrega de lembretes com reserva (lease) entre processos
+"""
+
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from mysql.connector import Error
+from notifications.reminder_system import ReminderSystem
+
+NOW = datetime(2025, 3, 14, 12, 0)
+
+class _FakeCursor:
+    def __init__(self, db):
+        self.db = db
+        self.rows = []
+
+    def execute(self, query, params=()):
+        query = ' '.join(query.split())
+        self.db.statements.append(query)
+        reminders = self.db.reminders
+        if query.startswith('UPDATE reminders SET claimed_by'):
+            worker_id, lease_seconds, due, limit = params
+            free = sorted(
+                (reminder['time'], reminder_id) for reminder_id, reminder in reminders.items()
+                if not reminder['is_sent'] and reminder['time'] <= due
+                and (reminder['lease_until'] is None or reminder['lease_until'] < self.db.now)
+            )[:limit]
+            for _, reminder_id in free:
+                reminders[reminder_id]['claimed_by'] = worker_id
+                reminders[reminder_id]['lease_until'] = self.db.now + timedelta(seconds=lease_seconds)
+        elif query.startswith('SELECT r.id'):
+            worker_id, limit = params
+            claimed = sorted(
+                (reminder['time'], reminder_id) for reminder_id, reminder in reminders.items()
+                if reminder['claimed_by'] == worker_id and not reminder['is_sent']
+            )
+            self.rows = []
+            for reminder_time, reminder_id in claimed:
+                reminder = reminders[reminder_id]
+                # LEFT JOIN: evento apagado vem com colunas NULL
+                title, day, hour = self.db.events.get(reminder['event_id'], (None, None, None))
+                self.rows.append((reminder_id, reminder['event_id'], reminder_time, reminder['message'],
+                                  title, day, hour))
+            self.rows = self.rows[:limit]
+        elif query.startswith('UPDATE reminders SET is_sent'):
+            worker_id, *ids = params
+            marked = [reminder_id for reminder_id in ids if reminders[reminder_id]['claimed_by'] == worker_id]
+            for reminder_id in marked:
+                reminders[reminder_id].update(is_sent=1, claimed_by=None, lease_until=None)
+            self.db.marked.append((worker_id, marked))
+        elif query.startswith('SELECT id FROM reminders WHERE is_sent = 0 AND id IN'):
+            self.rows = [(reminder_id,) for reminder_id in params if not reminders[reminder_id]['is_sent']]
+        elif query.startswith('SELECT id, reminder_time'):
+            self.rows = [(reminder_id, reminder['time']) for reminder_id, reminder in reminders.items()
+                         if not reminder['is_sent']]
+        else:
+            raise AssertionError(f"consulta inesperada: {query}")
+
+    def fetchall(self):
+        return self.rows
+
+class _FakeProvider:
+    """Tabelas reminders e events em memória, com o relógio do banco em `now`"""
+
+    def __init__(self, count):
+        self.now = NOW
+        self.down = False
+        self.events = {1: ('Reunião', '2025-03-14', '13:00')}
+        self.reminders = {
+            reminder_id: {'event_id': 1, 'time': NOW - timedelta(minutes=10 - reminder_id),
+                          'message': f'lembrete {reminder_id}', 'is_sent': 0,
+                          'claimed_by': None, 'lease_until': None}
+            for reminder_id in range(1, count + 1)
+        }
+        self.statements = []
+        self.marked = []
+
+    @contextmanager
+    def connection(self):
+        if self.down:
+            raise Error("Lost connection to MySQL server")
+        yield SimpleNamespace(cursor=lambda: _FakeCursor(self))
+
+    transaction = connection
+
+def _system(provider, worker_id, batch_size=50, retry_delay=5.0):
+    return ReminderSystem(provider=provider, resync_interval=None, batch_size=batch_size,
+                          lease_seconds=60, worker_id=worker_id, retry_delay=retry_delay)
+
+def test_due_check_uses_the_local_clock():
+    """reminder_time é hora local: um banco em UTC não antecipa os lembretes"""
+    db = _FakeProvider(1)
+    local_now = datetime.now().replace(microsecond=0)
+    db.reminders[1]['time'] = local_now + timedelta(hours=1)
+    # Servidor MySQL em UTC com o cliente em UTC-3: NOW() do banco está 3 horas à frente
+    db.now = local_now + timedelta(hours=3)
+
+    assert _system(db, 'a').process_due() == 0
+    assert db.reminders[1]['claimed_by'] is None
+
+    db.reminders[1]['time'] = local_now - timedelta(minutes=1)
+    assert _system(db, 'a').process_due() == 1
+
+def test_only_claimed_rows_are_delivered():
+    """Um lembrete com reserva válida de outro processo não é entregue de novo"""
+    db = _FakeProvider(3)
+    db.reminders[2].update(claimed_by='outro', lease_until=NOW + timedelta(seconds=30))
+
+    assert _system(db, 'a').process_due() == 2
+    assert db.marked == [('a', [1, 3])]
+    assert db.reminders[2]['is_sent'] == 0
+    assert db.reminders[2]['claimed_by'] == 'outro'
+
+    # Um segundo processo não encontra nada livre
+    assert _system(db, 'b').process_due() == 0
+    assert db.marked == [('a', [1, 3])]
+
+def test_expired_lease_is_reclaimed():
+    """A reserva de um processo que morreu vence e outro processo retoma o lembrete"""
+    db = _FakeProvider(2)
+    db.reminders[1].update(claimed_by='morto', lease_until=NOW - timedelta(seconds=1))
+    db.reminders[2].update(claimed_by='vivo', lease_until=NOW + timedelta(seconds=1))
+
+    assert _system(db, 'a').process_due() == 1
+    assert db.reminders[1]['is_sent'] == 1
+    assert db.reminders[2]['is_sent'] == 0
+
+    # O processo que perdeu a reserva não marca o lembrete de outro
+    db.now = NOW + timedelta(seconds=2)
+    assert _system(db, 'b').process_due() == 1
+    _system(db, 'vivo')._mark_sent([2])
+    assert db.marked[-1] == ('vivo', [])
+    assert db.reminders[2]['is_sent'] == 1
+
+def test_rows_are_marked_sent_in_batches():
+    """Cada lote reservado é marcado como enviado com um único UPDATE"""
+    db = _FakeProvider(5)
+
+    assert _system(db, 'a', batch_size=2).process_due() == 5
+    assert db.marked == [('a', [1, 2]), ('a', [3, 4]), ('a', [5])]
+    claims = [query for query in db.statements if query.startswith('UPDATE reminders SET claimed_by')]
+    assert len(claims) == 3
+    assert all(reminder['is_sent'] for reminder in db.reminders.values())
+
+def test_orphaned_reminders_are_marked_sent():
+    """Um lembrete cujo evento foi apagado não é notificado nem fica reservado para sempre"""
+    db = _FakeProvider(3)
+    db.reminders[2]['event_id'] = 99
+
+    assert _system(db, 'a').process_due() == 2
+    assert db.marked == [('a', [1, 2, 3])]
+    assert _system(db, 'b').process_due() == 0
+
+def test_undelivered_reminders_stay_scheduled():
+    """Um horário vencido que não pôde ser entregue volta ao heap em vez de sumir"""
+    db = _FakeProvider(2)
+    db.reminders[2].update(claimed_by='outro', lease_until=NOW + timedelta(seconds=30))
+    system = _system(db, 'a', retry_delay=0.0)
+    system.schedule_many([(1, NOW), (2, NOW)])
+
+    # O lembrete 2 está reservado por outro processo: fica agendado para nova tentativa
+    assert system.run_pending() is not None
+    assert [reminder_id for _, reminder_id in system._schedule] == [2]
+
+    # Banco fora do ar: nada é entregue e o lembrete continua na agenda
+    db.down = True
+    system.run_pending()
+    assert [reminder_id for _, reminder_id in system._schedule] == [2]
+
+    # O outro processo entregou: a nova tentativa descobre e o tira da agenda
+    db.down = False
+    db.reminders[2].update(is_sent=1, claimed_by=None, lease_until=None)
+    assert system.run_pending() is None
+    assert system._schedule == []
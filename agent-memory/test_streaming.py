@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Script de teste do parser incremental das respostas em stream
+"""
+
+import json
+from types import SimpleNamespace
+from utils.json_stream import JsonArrayStream, consume_stream
+
+DOCUMENT = {
+    'date': '07/07/2025',
+    'events': [
+        {'title': 'Reunião {trimestral}', 'description': 'Com "diretoria" [sala 2]', 'category': 'trabalho'},
+        {'title': 'Academia', 'description': 'Treino', 'tags': [{'a': 1}, {'b': [2, 3]}]}
+    ]
+}
+
+def test_items_are_emitted_as_each_object_closes():
+    """Cada evento sai assim que seu objeto fecha, não importa onde o fragmento corta"""
+    text = json.dumps(DOCUMENT, ensure_ascii=False)
+    for size in (1, 2, 7):
+        stream = JsonArrayStream('events')
+        items, emitted_at = [], []
+        for start in range(0, len(text), size):
+            for item in stream.feed(text[start:start + size]):
+                items.append(item)
+                emitted_at.append(len(stream.text))
+        assert items == DOCUMENT['events'], size
+        assert stream.fields == {'date': '07/07/2025'}
+        # O primeiro evento sai antes do documento terminar
+        assert emitted_at[0] < len(text) - 50
+
+def test_fields_after_the_array():
+    """Campos do objeto raiz depois da lista também são capturados"""
+    stream = JsonArrayStream('events')
+    items = stream.feed('{"events": [{"title": "A"}], ')
+    assert items == [{'title': 'A'}] and stream.fields == {}
+    assert stream.feed('"date": "01/02/2025"}') == []
+    assert stream.fields == {'date': '01/02/2025'}
+
+def _chunk(content=None, tool_calls=None):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content, tool_calls=tool_calls))])
+
+def _tool_delta(index, name=None, arguments=None):
+    return [SimpleNamespace(index=index, function=SimpleNamespace(name=name, arguments=arguments))]
+
+def test_consume_stream_routes_text_and_tool_arguments():
+    """Texto vai para on_text conforme chega e os eventos para on_item com os campos já lidos"""
+    arguments = json.dumps(DOCUMENT, ensure_ascii=False)
+    chunks = [_chunk(content="Ok, "), _chunk(content="anotado."), _chunk(tool_calls=_tool_delta(0, name="DailyEvents"))]
+    chunks += [_chunk(tool_calls=_tool_delta(0, arguments=arguments[i:i + 10])) for i in range(0, len(arguments), 10)]
+    chunks.append(SimpleNamespace(choices=[]))
+
+    texts, items = [], []
+    result = consume_stream(iter(chunks), "DailyEvents", "events", on_text=texts.append,
+                            on_item=lambda item, fields: items.append((item['title'], fields.get('date'))))
+
+    assert texts == ["Ok, ", "anotado."] and result.content == "Ok, anotado."
+    assert items == [('Reunião {trimestral}', '07/07/2025'), ('Academia', '07/07/2025')]
+    assert result.tool_calls == [{'name': 'DailyEvents', 'arguments': arguments}]
+    assert result.items == 2 and result.first_chunk_seconds is not None
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Script de teste do registro de schemas de ferramentas
+"""
+
+import json
+from typing import ClassVar, List, Literal, Optional
+from pydantic import BaseModel, Field
+from tools.daily_events import DailyEvents
+from utils.tool_registry import ToolRegistry, model_version
+
+def test_nested_events_have_full_schema():
+    """Os itens de List[Event] trazem propriedades, enums, nulos e campos obrigatórios"""
+    parameters = ToolRegistry().schema(DailyEvents)['function']['parameters']
+    assert parameters['properties']['events']['items'] == {'$ref': '#/$defs/Event'}
+    items = parameters['$defs']['Event']
+
+    assert parameters['required'] == ['date', 'events']
+    assert items['type'] == 'object' and items['additionalProperties'] is False
+    assert items['required'] == ['title', 'description']
+    assert items['properties']['category']['enum'][0] == 'trabalho'
+    assert items['properties']['category']['default'] == 'outros'
+    assert items['properties']['priority']['enum'] == ['baixa', 'media', 'alta', 'urgente']
+    assert items['properties']['time'] == {'type': ['string', 'null'], 'description': 'Horário do evento (HH:MM)'}
+
+def test_strict_mode():
+    """No modo strict todos os campos são obrigatórios, sem defaults, e a função é marcada strict"""
+    function = ToolRegistry().schema(DailyEvents, strict=True)['function']
+    items = function['parameters']['$defs']['Event']
+
+    assert function['strict'] is True
+    assert items['required'] == list(items['properties'])
+    assert all('default' not in prop for prop in items['properties'].values())
+    assert items['properties']['location']['type'] == ['string', 'null']
+
+def test_nested_optional_models_and_literals():
+    """Modelos opcionais viram anyOf com null e modelos repetidos aparecem uma vez em $defs"""
+    class Place(BaseModel):
+        name: str = Field(description="Nome")
+        kind: Literal['casa', 'trabalho'] = Field(description="Tipo")
+
+    class Trip(BaseModel):
+        """Viagem"""
+        origin: Place = Field(description="Origem")
+        destination: Optional[Place] = Field(default=None, description="Destino")
+        stops: List[Place] = Field(default_factory=list, description="Paradas")
+
+    parameters = ToolRegistry().schema(Trip)['function']['parameters']
+    properties = parameters['properties']
+
+    assert list(parameters['$defs']) == ['Place']
+    assert parameters['$defs']['Place']['properties']['kind'] == {'type': 'string', 'enum': ['casa', 'trabalho'], 'description': 'Tipo'}
+    assert properties['origin'] == {'$ref': '#/$defs/Place', 'description': 'Origem'}
+    assert properties['destination']['anyOf'] == [{'$ref': '#/$defs/Place'}, {'type': 'null'}]
+    assert parameters['required'] == ['origin']
+
+    strict = ToolRegistry().schema(Trip, strict=True)['function']['parameters']
+    assert strict['properties']['origin'] == {'$ref': '#/$defs/Place'}
+
+def test_schema_is_compiled_once():
+    """O mesmo modelo devolve o mesmo schema e o JSON já serializado"""
+    registry = ToolRegistry()
+    first = registry.compile(DailyEvents)
+
+    assert registry.compile(DailyEvents) is first
+    assert registry.tools(DailyEvents)[0] is first.schema
+    assert json.loads(registry.json(DailyEvents)) == first.schema
+    assert len(registry) == 1
+
+def test_version_bump_recompiles():
+    """Um novo TOOL_VERSION gera uma nova entrada no cache"""
+    class Note(BaseModel):
+        """Nota"""
+        TOOL_VERSION: ClassVar[str] = "1"
+        text: str = Field(description="Texto")
+        tags: Optional[List[str]] = Field(default=None, description="Etiquetas")
+
+    registry = ToolRegistry()
+    first = registry.compile(Note)
+    Note.TOOL_VERSION = "2"
+    second = registry.compile(Note)
+
+    assert first is not second and (first.version, second.version) == ("1", "2")
+    assert second.schema['function']['parameters']['properties']['tags']['items'] == {'type': 'string'}
+    assert len(model_version(DailyEvents)) == 12
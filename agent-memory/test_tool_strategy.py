@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Script de teste da estratégia de tool_choice (classificador local)
+"""
+
+import os
+import tempfile
+from tools.tool_strategy import ToolStrategy, extract_features, has_event_keywords
+
+def test_strong_signals_force_the_tool():
+    """Falas com palavras-chave de eventos já saem com a ferramenta exigida"""
+    strategy = ToolStrategy()
+    for text in ("amanhã tenho reunião às 10h", "ontem fui ao médico", "me lembra de pagar o aluguel"):
+        decision = strategy.decide(text)
+        assert decision.forced and not decision.fallback, text
+        assert decision.tool_choice == {"type": "function", "function": {"name": "DailyEvents"}}
+
+def test_ambiguous_and_conversational_turns():
+    """Perguntas com palavra-chave ficam em auto com fallback; conversa e saída não forçam nada"""
+    strategy = ToolStrategy()
+    question = strategy.decide("quando foi a reunião?")
+    assert question.tool_choice == "auto" and question.fallback
+    chat = strategy.decide("oi, tudo bem?")
+    assert chat.tool_choice == "auto" and not chat.fallback
+    goodbye = strategy.decide("tchau, até amanhã")
+    assert goodbye.tool_choice == "auto" and not goodbye.fallback
+
+def test_keywords_ignore_accents():
+    """As palavras-chave originais valem também sem acento (erros de transcrição)"""
+    assert has_event_keywords("amanha tenho consulta")
+    assert not has_event_keywords("encerrar amanhã")
+    assert 'kw:reuniao' in extract_features("Reuniao com o time")
+    assert {'date', 'weekday'} <= set(extract_features("sexta, dia 12"))
+
+def test_stats_track_fallback_rate():
+    """A taxa de fallback conta só as falas que precisaram da segunda chamada"""
+    strategy = ToolStrategy()
+    strategy.record(strategy.decide("amanhã tenho reunião"), used_tool=True)
+    strategy.record(strategy.decide("oi"), used_tool=False)
+    strategy.record(strategy.decide("quando foi a reunião?"), used_tool=False, fell_back=True)
+    strategy.record(strategy.decide("quando é a consulta?"), used_tool=True)
+
+    stats = strategy.stats
+    assert (stats.turns, stats.forced, stats.auto, stats.fallbacks) == (4, 1, 3, 1)
+    assert stats.fallback_rate == 0.25 and stats.llm_calls_per_turn == 1.25
+    assert "1 fallbacks (25%)" in stats.report()
+
+def test_learned_weights():
+    """Pesos vêm de arquivo e o aprendizado reforça sinais de falas que usaram a ferramenta"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "weights.json")
+        ToolStrategy(weights={'weekday': 1.0}).save(path)
+        assert ToolStrategy.from_file(path).decide("na sexta").forced
+
+    strategy = ToolStrategy(learning_rate=0.5)
+    decision = strategy.decide("quando é a reunião?")
+    strategy.record(decision, used_tool=False, fell_back=True)
+    assert strategy.decide("quando é a reunião?").forced
+
+def test_learning_is_bounded_and_decays():
+    """Um sinal fraco reforçado várias vezes não força a ferramenta sozinho e volta ao padrão com o tempo"""
+    strategy = ToolStrategy(learning_rate=0.5)
+    for _ in range(10):
+        strategy.record(strategy.decide("na sexta?"), used_tool=True)
+    assert strategy.weights['weekday'] == 0.9
+    assert not strategy.decide("na sexta").forced
+
+    for _ in range(300):
+        strategy.record(strategy.decide("tudo bem com você?"), used_tool=False)
+    assert abs(strategy.weights['weekday'] - 0.5) < 0.01
+    assert abs(strategy.weights['question'] + 0.5) < 0.01
+
+def test_learned_weights_are_persisted():
+    """persist() grava os pesos aprendidos no arquivo de onde a estratégia foi carregada"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "weights.json")
+        ToolStrategy().persist()
+        ToolStrategy(path=path).persist()
+        assert not os.path.exists(path)
+
+        strategy = ToolStrategy(learning_rate=0.5, path=path)
+        strategy.record(strategy.decide("na sexta?"), used_tool=True)
+        strategy.persist()
+        assert ToolStrategy.from_file(path).weights['weekday'] == strategy.weights['weekday']
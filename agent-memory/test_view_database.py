@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Script de teste da exportação do banco para JSON
+"""
+
+import json
+import os
+import tempfile
+from datetime import date, datetime
+from types import SimpleNamespace
+import view_database
+
+_ROWS = {
+    'events': [(1, date(2025, 3, 14), 'Reunião', '', 'trabalho', 'alta', '09:30', None, '1h antes',
+                datetime(2025, 3, 1, 10, 0), datetime(2025, 3, 1, 10, 0), datetime(2025, 3, 14, 9, 30))],
+    'interactions': [(1, datetime(2025, 3, 1, 10, 0), 'oi', 'olá', '')],
+    'reminders': [(1, 1, datetime(2025, 3, 14, 8, 30), '1h antes', 0, datetime(2025, 3, 1, 10, 0), None, None)],
+    'identities': [(1, 'Ana', None, 'irmã', None, None, datetime(2025, 3, 1, 10, 0), None)],
+}
+
+class _FakeCursor:
+    def execute(self, query):
+        self.rows = _ROWS[query.split()[-1]]
+
+    def fetchall(self):
+        return self.rows
+
+def test_export_serialises_date_columns():
+    """events.date vem como datetime.date do MySQL e é exportado como DD/MM/YYYY"""
+    connect = view_database.mysql.connector.connect
+    view_database.mysql.connector.connect = lambda **config: SimpleNamespace(cursor=_FakeCursor, close=lambda: None)
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            output = os.path.join(tmp, "export.json")
+            view_database.export_to_json(output_file=output)
+            with open(output, encoding='utf-8') as f:
+                data = json.load(f)
+    finally:
+        view_database.mysql.connector.connect = connect
+
+    assert data['events'][0]['date'] == '14/03/2025'
+    assert data['events'][0]['created_at'] == '2025-03-01 10:00:00'
+    assert data['reminders'][0]['reminder_time'] == '2025-03-14 08:30:00'
@@ -0,0 +1,85 @@
+import unicodedata
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, List, Mapping
+
+DEFAULT_CATEGORY = 'outros'
+DEFAULT_PRIORITY = 'media'
+
+@lru_cache(maxsize=4096)
+def fold(text: str) -> str:
+    """Minúsculas, sem acentos e sem espaços nas pontas (o vocabulário é pequeno, então fica em cache)"""
+    decomposed = unicodedata.normalize('NFKD', text.strip().lower())
+    return ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+def _table(entries: Mapping[str, str]) -> Dict[str, str]:
+    """Tabela indexada pela forma dobrada das chaves"""
+    return {fold(key): value for key, value in entries.items()}
+
+# Campos em português (ou com maiúsculas) -> campos do modelo Event
+_FIELDS = _table({
+    'title': 'title', 'título': 'title',
+    'description': 'description', 'descrição': 'description',
+    'category': 'category', 'categoria': 'category',
+    'priority': 'priority', 'prioridade': 'priority',
+    'time': 'time', 'horário': 'time', 'hora': 'time',
+    'location': 'location', 'local': 'location',
+    'reminder': 'reminder', 'lembrete': 'reminder'
+})
+
+# Valores livres da IA -> EventCategory
+_CATEGORIES = _table({
+    'trabalho': 'trabalho', 'reunião': 'trabalho', 'meeting': 'trabalho', 'work': 'trabalho',
+    'saude': 'saude', 'consulta': 'saude', 'appointment': 'saude', 'médico': 'saude',
+    'doctor': 'saude', 'health': 'saude',
+    'pessoal': 'pessoal', 'personal': 'pessoal',
+    'familia': 'familia', 'family': 'familia',
+    'lazer': 'lazer', 'viagem': 'lazer', 'travel': 'lazer', 'trip': 'lazer', 'leisure': 'lazer',
+    'estudos': 'estudos', 'estudo': 'estudos', 'study': 'estudos', 'curso': 'estudos', 'course': 'estudos',
+    'financeiro': 'financeiro', 'financial': 'financeiro', 'conta': 'financeiro', 'bill': 'financeiro',
+    'outros': 'outros', 'other': 'outros'
+})
+
+# Valores livres da IA -> EventPriority
+_PRIORITIES = _table({
+    'baixa': 'baixa', 'low': 'baixa',
+    'media': 'media', 'normal': 'media', 'regular': 'media', 'usual': 'media', 'medium': 'media',
+    'alta': 'alta', 'importante': 'alta', 'important': 'alta', 'high': 'alta',
+    'urgente': 'urgente', 'urgent': 'urgente'
+})
+
+# Visões somente leitura expostas pelo módulo; as funções usam os dicts diretamente
+FIELDS: Mapping[str, str] = MappingProxyType(_FIELDS)
+CATEGORIES: Mapping[str, str] = MappingProxyType(_CATEGORIES)
+PRIORITIES: Mapping[str, str] = MappingProxyType(_PRIORITIES)
+
+def _lookup(table: Dict[str, str], value: Any, default: str) -> str:
+    if not isinstance(value, str):
+        return default
+    # Valores já canônicos (o caso comum com o schema completo) dispensam a dobra
+    return table.get(value) or table.get(fold(value), default)
+
+def normalize_event(event: Mapping[str, Any]) -> Dict[str, Any]:
+    """Corrige um evento vindo da IA: campos em português e valores fora das enumerações"""
+    return normalize_events((event,))[0]
+
+def normalize_events(events: Iterable[Mapping[str, Any]]) -> List[Dict[str, Any]]:
+    """Normaliza uma lista de eventos em uma passada, sem alterar os dicionários recebidos"""
+    fields_get = _FIELDS.get
+    categories, priorities = _CATEGORIES, _PRIORITIES
+    normalized = []
+    for event in events:
+        corrected = {fields_get(key) or fields_get(fold(key), key): value for key, value in event.items()}
+        if 'category' in corrected:
+            corrected['category'] = _lookup(categories, corrected['category'], DEFAULT_CATEGORY)
+        if 'priority' in corrected:
+            corrected['priority'] = _lookup(priorities, corrected['priority'], DEFAULT_PRIORITY)
+        normalized.append(corrected)
+    return normalized
+
+def normalize_daily_events(payloads: Iterable[Mapping[str, Any]]) -> List[Dict[str, Any]]:
+    """Normaliza vários payloads {'date', 'events'} (importações e reprocessamentos em lote)"""
+    return [
+        {**payload, 'events': normalize_events(payload.get('events') or ())}
+        for payload in payloads
+    ]
@@ -0,0 +1,206 @@
+import json
+import os
+import re
+import unicodedata
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Union
+
+# Palavras que indicam que a fala descreve eventos (lista original do assistente)
+EVENT_KEYWORDS = ('ontem', 'hoje', 'amanhã', 'estive', 'estou', 'estarei', 'visita', 'viagem',
+                  'reunião', 'consulta', 'estudar', 'trabalho', 'família')
+EXIT_KEYWORDS = ('sair', 'quit', 'exit', 'encerrar', 'parar', 'fechar', 'close', 'stop', 'tchau', 'bye')
+
+TOOL_NAME = "DailyEvents"
+
+def _fold(text: str) -> str:
+    decomposed = unicodedata.normalize('NFKD', text.lower())
+    return ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+_EVENT_KEYWORDS = tuple(_fold(keyword) for keyword in EVENT_KEYWORDS)
+_EXIT_KEYWORDS = tuple(_fold(keyword) for keyword in EXIT_KEYWORDS)
+
+# Sinais fracos: sozinhos não bastam para forçar a ferramenta
+_PATTERNS = {
+    'date': re.compile(r'\b\d{1,2}/\d{1,2}(?:/\d{2,4})?\b|\bdia \d{1,2}\b'),
+    'time': re.compile(r'\b\d{1,2}(?::\d{2}|h\d{0,2})\b|\bas \d{1,2}\b'),
+    'weekday': re.compile(r'\b(?:segunda|terca|quarta|quinta|sexta|sabado|domingo)\b'),
+    'reminder': re.compile(r'\blembr'),
+    'question': re.compile(r'\?\s*$|^(?:o que|quando|qual|quais|quem|como|onde)\b')
+}
+
+DEFAULT_WEIGHTS: Dict[str, float] = {
+    **{f"kw:{keyword}": 1.0 for keyword in _EVENT_KEYWORDS},
+    'date': 0.5,
+    'time': 0.5,
+    'weekday': 0.5,
+    'reminder': 1.0,
+    'question': -0.5,
+    'exit': -5.0
+}
+
+def has_event_keywords(text: str) -> bool:
+    """Verifica se o texto contém palavras-chave de eventos (excluindo comandos de saída)"""
+    folded = _fold(text)
+    return any(keyword in folded for keyword in _EVENT_KEYWORDS) and not any(keyword in folded for keyword in _EXIT_KEYWORDS)
+
+def extract_features(text: str) -> List[str]:
+    """Sinais locais da fala usados pelo classificador"""
+    folded = _fold(text).strip()
+    features = [f"kw:{keyword}" for keyword in _EVENT_KEYWORDS if keyword in folded]
+    features += [name for name, pattern in _PATTERNS.items() if pattern.search(folded)]
+    if any(keyword in folded for keyword in _EXIT_KEYWORDS):
+        features.append('exit')
+    return features
+
+@dataclass
+class ToolDecision:
+    """Escolha de tool_choice para uma fala"""
+    tool_choice: Union[str, Dict[str, Any]]
+    score: float
+    features: List[str]
+    fallback: bool  # se a IA não usar a ferramenta, vale uma segunda chamada forçada
+
+    @property
+    def forced(self) -> bool:
+        return self.tool_choice != "auto"
+
+    def report(self) -> str:
+        mode = "forçada" if self.forced else ("auto com fallback" if self.fallback else "auto")
+        signals = ", ".join(self.features) or "sem sinais"
+        return f"Ferramenta: {mode} (score {self.score:.1f}: {signals})"
+
+@dataclass
+class ToolStrategyStats:
+    """Contadores das decisões, para acompanhar a taxa de fallback"""
+    turns: int = 0
+    forced: int = 0
+    auto: int = 0
+    auto_used_tool: int = 0
+    fallbacks: int = 0
+    by_feature: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def fallback_rate(self) -> float:
+        return self.fallbacks / self.turns if self.turns else 0.0
+
+    @property
+    def llm_calls_per_turn(self) -> float:
+        return (self.turns + self.fallbacks) / self.turns if self.turns else 0.0
+
+    def report(self) -> str:
+        return (f"{self.turns} falas: {self.forced} forçadas, {self.auto} auto "
+                f"({self.auto_used_tool} usaram a ferramenta), {self.fallbacks} fallbacks "
+                f"({self.fallback_rate:.0%}), {self.llm_calls_per_turn:.2f} chamadas/fala")
+
+class ToolStrategy:
+    """Decide o tool_choice antes da chamada ao modelo, com um classificador local.
+
+    Cada sinal da fala (palavras-chave de eventos, datas, horários, dias da
+    semana, pedidos de lembrete, perguntas, comandos de saída) tem um peso.
+    Com score >= force_threshold a ferramenta DailyEvents é exigida já na
+    primeira chamada; entre fallback_threshold e force_threshold a IA decide
+    (tool_choice="auto") e, se não usar a ferramenta, ainda cabe a chamada
+    forçada. Abaixo disso a fala é tratada como conversa.
+
+    Os pesos podem vir de um JSON ({"bias", "weights", "force_threshold",
+    "fallback_threshold"}) e, com learning_rate > 0, são reforçados a cada
+    fala em modo auto que acabou usando a ferramenta, para que falas
+    parecidas sejam forçadas já na primeira chamada. O reforço é limitado a
+    max_weight (abaixo de force_threshold: um sinal aprendido sozinho não
+    força a ferramenta) e a cada fala os pesos voltam `decay` em direção aos
+    padrões, para que um acerto isolado não fique valendo para sempre.
+    Os pesos aprendidos são gravados por persist() no encerramento.
+    """
+
+    def __init__(self, weights: Optional[Dict[str, float]] = None, bias: float = 0.0,
+                 force_threshold: float = 1.0, fallback_threshold: float = 0.5,
+                 learning_rate: float = 0.0, max_weight: float = 0.9, decay: float = 0.02,
+                 path: Optional[str] = None):
+        self.weights = dict(DEFAULT_WEIGHTS)
+        self.weights.update(weights or {})
+        self.bias = bias
+        self.force_threshold = force_threshold
+        self.fallback_threshold = fallback_threshold
+        self.learning_rate = learning_rate
+        self.max_weight = max_weight
+        self.decay = decay
+        # Arquivo de onde os pesos vieram; persist() grava os aprendidos nele
+        self.path = path
+        self.stats = ToolStrategyStats()
+
+    @classmethod
+    def from_file(cls, path: str, **kwargs: Any) -> "ToolStrategy":
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        for key in ('bias', 'force_threshold', 'fallback_threshold'):
+            if key in data:
+                kwargs.setdefault(key, data[key])
+        kwargs.setdefault('path', path)
+        return cls(weights=data.get('weights'), **kwargs)
+
+    @classmethod
+    def from_env(cls) -> "ToolStrategy":
+        """Pesos de TOOL_STRATEGY_WEIGHTS (se o arquivo existir); senão os padrões"""
+        path = os.getenv("TOOL_STRATEGY_WEIGHTS")
+        learning_rate = float(os.getenv("TOOL_STRATEGY_LEARNING_RATE", "0"))
+        if path and os.path.exists(path):
+            try:
+                return cls.from_file(path, learning_rate=learning_rate)
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Pesos da estratégia de ferramenta inválidos ({e}); usando os padrões")
+        return cls(learning_rate=learning_rate, path=path)
+
+    def save(self, path: str) -> None:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'bias': self.bias,
+                'weights': self.weights,
+                'force_threshold': self.force_threshold,
+                'fallback_threshold': self.fallback_threshold
+            }, f, ensure_ascii=False, indent=2)
+
+    def persist(self) -> None:
+        """Grava os pesos aprendidos em `path` (só com aprendizado habilitado)"""
+        if not self.learning_rate or not self.path:
+            return
+        try:
+            self.save(self.path)
+            print(f"💾 Pesos da estratégia de ferramenta salvos em {self.path}")
+        except OSError as e:
+            print(f"⚠️ Erro ao salvar pesos da estratégia de ferramenta: {e}")
+
+    def score(self, features: List[str]) -> float:
+        return self.bias + sum(self.weights.get(name, 0.0) for name in features)
+
+    def decide(self, text: str) -> ToolDecision:
+        features = extract_features(text)
+        score = self.score(features)
+        if score >= self.force_threshold:
+            return ToolDecision({"type": "function", "function": {"name": TOOL_NAME}}, score, features, False)
+        return ToolDecision("auto", score, features, score >= self.fallback_threshold)
+
+    def record(self, decision: ToolDecision, used_tool: bool, fell_back: bool = False) -> None:
+        """Registra o resultado da fala (e aprende com ele, se habilitado)"""
+        stats = self.stats
+        stats.turns += 1
+        for name in decision.features:
+            stats.by_feature[name] = stats.by_feature.get(name, 0) + 1
+        if decision.forced:
+            stats.forced += 1
+            return
+        stats.auto += 1
+        stats.auto_used_tool += used_tool
+        stats.fallbacks += fell_back
+        if self.learning_rate:
+            self._learn(decision.features, used_tool or fell_back)
+
+    def _learn(self, features: List[str], needed_tool: bool) -> None:
+        # Decaimento: o que foi aprendido volta aos poucos para os pesos padrão
+        for name, weight in self.weights.items():
+            base = DEFAULT_WEIGHTS.get(name, 0.0)
+            self.weights[name] = base + (weight - base) * (1.0 - self.decay)
+        if needed_tool:
+            # Perceptron: a fala precisava da ferramenta e não foi forçada; reforça seus sinais
+            for name in features:
+                cap = max(DEFAULT_WEIGHTS.get(name, 0.0), self.max_weight)
+                self.weights[name] = min(self.weights.get(name, 0.0) + self.learning_rate, cap)
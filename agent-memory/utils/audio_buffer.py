@@ -0,0 +1,79 @@
+import threading
+from typing import Optional
+
+class AudioRingBuffer:
+    """Buffer circular pré-alocado para áudio PCM.
+
+    O callback do PyAudio escreve e o consumidor lê blocos de tamanho fixo,
+    então a memória usada não cresce com a duração da gravação. Se o
+    consumidor atrasar mais do que a capacidade, as amostras mais antigas
+    são descartadas e contadas em `dropped_bytes`.
+    """
+
+    def __init__(self, capacity: int):
+        if capacity <= 0:
+            raise ValueError("A capacidade do buffer deve ser positiva")
+        self.capacity = capacity
+        self.dropped_bytes = 0
+        self._buffer = bytearray(capacity)
+        self._start = 0
+        self._size = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def __len__(self) -> int:
+        with self._cond:
+            return self._size
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def write(self, data: bytes) -> None:
+        """Escreve no fim do buffer, sobrescrevendo o mais antigo se estiver cheio"""
+        if not data:
+            return
+        with self._cond:
+            if self._closed:
+                return
+            view = memoryview(data)
+            if len(view) > self.capacity:
+                self.dropped_bytes += len(view) - self.capacity
+                view = view[-self.capacity:]
+            overflow = self._size + len(view) - self.capacity
+            if overflow > 0:
+                self.dropped_bytes += overflow
+                self._start = (self._start + overflow) % self.capacity
+                self._size -= overflow
+
+            end = (self._start + self._size) % self.capacity
+            first = min(len(view), self.capacity - end)
+            self._buffer[end:end + first] = view[:first]
+            self._buffer[:len(view) - first] = view[first:]
+            self._size += len(view)
+            self._cond.notify_all()
+
+    def read(self, size: int, timeout: Optional[float] = None) -> bytes:
+        """Lê exatamente `size` bytes, esperando até `timeout` segundos.
+
+        Retorna b'' se o tempo esgotar antes de haver `size` bytes. Depois
+        de fechado, entrega o que restou (possivelmente menos que `size`)
+        e então b''.
+        """
+        size = min(size, self.capacity)
+        with self._cond:
+            self._cond.wait_for(lambda: self._size >= size or self._closed, timeout)
+            count = min(size, self._size)
+            if count == 0 or (count < size and not self._closed):
+                return b''
+            first = min(count, self.capacity - self._start)
+            data = bytes(self._buffer[self._start:self._start + first]) + bytes(self._buffer[:count - first])
+            self._start = (self._start + count) % self.capacity
+            self._size -= count
+            return data
+
+    def close(self) -> None:
+        """Encerra a escrita; leitores recebem o que restou e depois b''"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
@@ -0,0 +1,144 @@
+import io
+import os
+import tempfile
+import time
+import wave
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import partial
+from typing import BinaryIO, Iterable, Iterator, Tuple
+from utils.pcm import Resampler
+
+# FLAC e Opus são opcionais: requerem pip install soundfile (libsndfile)
+try:
+    import soundfile  # type: ignore
+    SOUNDFILE_AVAILABLE = True
+except Exception:
+    soundfile = None
+    SOUNDFILE_AVAILABLE = False
+
+# codec -> (nome do arquivo enviado, tipo MIME, formato e subtipo do libsndfile)
+CODECS = {
+    'wav': ('audio.wav', 'audio/wav', None, None),
+    'flac': ('audio.flac', 'audio/flac', 'FLAC', 'PCM_16'),
+    'opus': ('audio.ogg', 'audio/ogg', 'OGG', 'OPUS'),
+}
+
+@dataclass
+class EncodedAudio:
+    """Áudio de uma fala pronto para upload, com as métricas da codificação"""
+    data: bytes
+    codec: str
+    sample_rate: int
+    duration_seconds: float
+    pcm_bytes: int  # tamanho do PCM original, na taxa de captura
+    encode_seconds: float
+
+    @property
+    def filename(self) -> str:
+        return CODECS[self.codec][0]
+
+    @property
+    def mime_type(self) -> str:
+        return CODECS[self.codec][1]
+
+    @property
+    def bytes_on_wire(self) -> int:
+        return len(self.data)
+
+    def as_upload(self) -> Tuple[str, bytes, str]:
+        """Formato aceito pelo parâmetro `file` do cliente OpenAI"""
+        return (self.filename, self.data, self.mime_type)
+
+    @contextmanager
+    def temporary_file(self) -> Iterator[BinaryIO]:
+        """Grava o áudio em um arquivo temporário de nome único e o abre para leitura.
+
+        O arquivo é fechado antes de ser removido, então não há espera por
+        liberação do arquivo (nem no Windows).
+        """
+        fd, path = tempfile.mkstemp(prefix="agent-memory-", suffix=os.path.splitext(self.filename)[1])
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(self.data)
+            with open(path, 'rb') as f:
+                yield f
+        finally:
+            try:
+                os.remove(path)
+            except OSError as e:
+                print(f"⚠️ Arquivo temporário {path} não foi removido: {e}")
+
+    def report(self) -> str:
+        ratio = self.pcm_bytes / self.bytes_on_wire if self.bytes_on_wire else 0.0
+        return (f"{self.codec} {self.sample_rate} Hz, {self.duration_seconds:.1f}s: "
+                f"{self.bytes_on_wire / 1024:.1f} KB enviados ({ratio:.1f}x menor que o PCM capturado), "
+                f"codificação {self.encode_seconds * 1000:.1f} ms")
+
+class AudioEncoder:
+    """Reamostra e codifica os blocos PCM da captura direto em memória.
+
+    Os blocos são convertidos conforme chegam (sem arquivo temporário).
+    16 kHz mono basta para transcrição de fala; FLAC reduz o tamanho sem
+    perdas e Opus bem mais. Sem soundfile instalado, FLAC/Opus caem para WAV.
+    """
+
+    def __init__(self, codec: str = "wav", sample_rate: int = 16000):
+        if codec not in CODECS:
+            raise ValueError(f"Codec não suportado: {codec} (opções: {', '.join(CODECS)})")
+        if codec != 'wav' and not SOUNDFILE_AVAILABLE:
+            print(f"⚠️ soundfile não instalado; usando WAV em vez de {codec}")
+            codec = 'wav'
+        self.codec = codec
+        self.sample_rate = sample_rate
+
+    @classmethod
+    def from_env(cls) -> "AudioEncoder":
+        return cls(codec=os.getenv("AUDIO_CODEC", "wav").lower(),
+                   sample_rate=int(os.getenv("AUDIO_SAMPLE_RATE", "16000")))
+
+    def encode(self, chunks: Iterable[bytes], rate: int) -> EncodedAudio:
+        """Consome os blocos PCM 16-bit mono capturados a `rate` Hz"""
+        buffer = io.BytesIO()
+        resampler = Resampler(rate, self.sample_rate)
+        pcm_bytes = 0
+        frames = 0
+        elapsed = 0.0
+
+        start = time.perf_counter()
+        if self.codec == 'wav':
+            writer = wave.open(buffer, 'wb')
+            writer.setnchannels(1)
+            writer.setsampwidth(2)
+            writer.setframerate(self.sample_rate)
+            write = writer.writeframes
+        else:
+            _, _, file_format, subtype = CODECS[self.codec]
+            writer = soundfile.SoundFile(buffer, mode='w', samplerate=self.sample_rate, channels=1,
+                                         format=file_format, subtype=subtype)
+            write = partial(writer.buffer_write, dtype='int16')
+        elapsed += time.perf_counter() - start
+
+        try:
+            for chunk in chunks:
+                # Mede só o trabalho de codificação, não a espera pelo microfone
+                start = time.perf_counter()
+                pcm_bytes += len(chunk)
+                converted = resampler.process(chunk)
+                frames += len(converted) // 2
+                if converted:
+                    write(converted)
+                elapsed += time.perf_counter() - start
+        finally:
+            start = time.perf_counter()
+            writer.close()
+            elapsed += time.perf_counter() - start
+
+        return EncodedAudio(
+            data=buffer.getvalue(),
+            codec=self.codec,
+            sample_rate=self.sample_rate,
+            duration_seconds=frames / self.sample_rate,
+            pcm_bytes=pcm_bytes,
+            encode_seconds=elapsed
+        )
@@ -1,8 +1,11 @@
 from enum import Enum
 from types import UnionType
 from typing import (
+    Any,
+    Dict,
     List,
     Literal,
+    Optional,
     Union,
     get_args,
     get_origin,
@@ -10,6 +13,7 @@ from typing import (
 
 from pydantic import BaseModel
 from pydantic.fields import FieldInfo
+from pydantic_core import PydanticUndefined
 
 
 def get_field_type(field: FieldInfo) -> str:
@@ -46,56 +50,171 @@ def get_simple_type_name(type_hint: type) -> str:
         return "boolean"
     elif get_origin(type_hint) == Literal:
         return "string"  # Literal values will be handled as enum values
+    elif isinstance(type_hint, type) and issubclass(type_hint, Enum):
+        return "string"  # Enum members are listed as enum values
     elif isinstance(type_hint, type) and issubclass(type_hint, BaseModel):
         return "object"  # Handle nested BaseModel classes
     else:
         raise ValueError(f"Type hint {type_hint} not supported.")
 
 
-def base_model2tool(model: type[BaseModel]) -> dict:
+class SchemaBuilder:
+    """Build recursive JSON schemas for Pydantic models.
+
+    Nested models are emitted once under ``$defs`` and referenced with
+    ``$ref``; enums and ``Literal`` values are inlined with their members;
+    ``Optional`` fields become nullable. In strict mode every object
+    lists all of its properties as required (optional ones stay nullable)
+    and field defaults are left out, as required by OpenAI structured
+    outputs. Objects never accept additional properties.
+    """
+
+    def __init__(self, strict: bool = False):
+        self.strict = strict
+        self.defs: Dict[str, dict] = {}
+
+    def type_schema(self, type_hint: Any, description: Optional[str] = None) -> dict:
+        """Build the JSON schema of a type hint.
+
+        Args:
+            type_hint (Any): Python type hint to convert
+            description (Optional[str]): Description of the property, if any
+
+        Returns:
+            dict: JSON schema of the type
+        """
+        if get_origin(type_hint) in (Union, UnionType) or isinstance(type_hint, UnionType):
+            args = get_args(type_hint)
+            types = [t for t in args if t is not type(None)]
+            if not types:
+                raise ValueError(f"Invalid Union type {type_hint}")
+            if len(types) == 1:
+                schema = self.type_schema(types[0])
+            else:
+                schema = {"anyOf": [self.type_schema(t) for t in types]}
+            if len(types) < len(args):
+                schema = self._nullable(schema)
+        elif get_origin(type_hint) in (list, List):
+            schema = {"type": "array"}
+            args = get_args(type_hint)
+            if args:
+                schema["items"] = self.type_schema(args[0])
+        elif get_origin(type_hint) == Literal:
+            values = list(get_args(type_hint))
+            schema = {"type": _json_type(values), "enum": values}
+        elif isinstance(type_hint, type) and issubclass(type_hint, Enum):
+            values = [e.value for e in type_hint]
+            schema = {"type": _json_type(values), "enum": values}
+        elif isinstance(type_hint, type) and issubclass(type_hint, BaseModel):
+            schema = self._ref(type_hint)
+        else:
+            schema = {"type": get_simple_type_name(type_hint)}
+
+        if description is not None:
+            if "$ref" in schema:
+                # $ref cannot have sibling keywords in strict mode
+                if not self.strict:
+                    schema = {**schema, "description": description}
+            else:
+                schema["description"] = description
+        return schema
+
+    def object_schema(self, model: type[BaseModel]) -> dict:
+        """Build the object schema (properties and required fields) of a model.
+
+        Args:
+            model (type[BaseModel]): Pydantic model class to convert
+
+        Returns:
+            dict: JSON schema with "type", "properties", "required" and
+                "additionalProperties"
+        """
+        schema: dict = {"type": "object", "properties": {}}
+        required_properties = []
+
+        for name, field in model.model_fields.items():
+            if field.annotation is None:
+                prop_dict = {"type": "any", "description": field.description or ""}
+            else:
+                prop_dict = self.type_schema(field.annotation, field.description or "")
+
+            if field.is_required() or self.strict:
+                required_properties.append(name)
+            elif not self.strict and field.default is not None and field.default is not PydanticUndefined:
+                prop_dict["default"] = field.default.value if isinstance(field.default, Enum) else field.default
+
+            schema["properties"][name] = prop_dict
+
+        if required_properties:
+            schema["required"] = required_properties
+        schema["additionalProperties"] = False
+
+        return schema
+
+    def _ref(self, model: type[BaseModel]) -> dict:
+        name = model.__name__
+        if name not in self.defs:
+            self.defs[name] = {}  # reserve the name first so self-referencing models terminate
+            self.defs[name] = self.object_schema(model)
+        return {"$ref": f"#/$defs/{name}"}
+
+    @staticmethod
+    def _nullable(schema: dict) -> dict:
+        if isinstance(schema.get("type"), str) and "$ref" not in schema:
+            schema = dict(schema)
+            schema["type"] = [schema["type"], "null"]
+            if "enum" in schema:
+                schema["enum"] = schema["enum"] + [None]
+            return schema
+        return {"anyOf": [schema, {"type": "null"}]}
+
+
+def _json_type(values: list) -> str:
+    """Return the JSON type shared by enum or Literal values."""
+    if all(isinstance(value, bool) for value in values):
+        return "boolean"
+    if all(isinstance(value, int) and not isinstance(value, bool) for value in values):
+        return "integer"
+    if all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in values):
+        return "number"
+    return "string"
+
+
+def get_object_schema(model: type[BaseModel], strict: bool = False) -> dict:
+    """Build the object schema of a model, with nested models under "$defs".
+
+    Args:
+        model (type[BaseModel]): Pydantic model class to convert
+        strict (bool): Emit a schema valid for OpenAI strict mode
+
+    Returns:
+        dict: JSON schema of the model
+    """
+    builder = SchemaBuilder(strict)
+    schema = builder.object_schema(model)
+    if builder.defs:
+        schema["$defs"] = builder.defs
+    return schema
+
+
+def base_model2tool(model: type[BaseModel], strict: bool = False) -> dict:
     """Convert a Pydantic BaseModel to OpenAI function format.
     
     Args:
         model (type[BaseModel]): Pydantic model class to convert
+        strict (bool): Enable OpenAI strict mode (arguments always match the schema)
         
     Returns:
         dict: OpenAI function-calling format dictionary
     """
-    json_output = {
+    function = {
+        "name": model.__name__,
+        "description": model.__doc__ or "",
+        "parameters": get_object_schema(model, strict)
+    }
+    if strict:
+        function["strict"] = True
+    return {
         "type": "function",
-        "function": {
-            "name": model.__name__,
-            "description": model.__doc__ or "",
-            "parameters": {
-                "type": "object",
-                "properties": {}
-            }
-        }
+        "function": function
     }
-
-    required_properties = []
-
-    for name, field in model.model_fields.items():
-        prop_dict = {
-            "type": get_field_type(field),
-            "description": field.description or "",
-        }
-
-        if get_origin(field.annotation) in (list, List):
-            prop_dict["type"] = "array"
-            args = get_args(field.annotation)
-            if args:
-                prop_dict["items"] = {"type": get_simple_type_name(args[0])}
-
-        if field.is_required():
-            required_properties.append(name)
-
-        if isinstance(field.annotation, type) and issubclass(field.annotation, Enum):
-            prop_dict["enum"] = [str(e.value) for e in field.annotation]
-
-        json_output["function"]["parameters"]["properties"][name] = prop_dict
-
-    if required_properties:
-        json_output["function"]["parameters"]["required"] = required_properties
-
-    return json_output
@@ -0,0 +1,160 @@
+import json
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+class JsonArrayStream:
+    """Parser incremental para o JSON de argumentos de uma tool call.
+
+    Recebe os fragmentos na ordem em que chegam do stream e devolve cada
+    item do array `array_key` (no objeto raiz) assim que o objeto do item
+    fecha, sem esperar o restante do documento. Os valores de texto do
+    objeto raiz (ex.: "date") ficam disponíveis em `fields` assim que
+    terminam de chegar.
+
+        stream = JsonArrayStream("events")
+        for fragment in fragments:
+            for event in stream.feed(fragment):
+                ...
+    """
+
+    def __init__(self, array_key: str):
+        self.array_key = array_key
+        self.fields: Dict[str, Any] = {}
+        self.items_emitted = 0
+        self._text = ""
+        self._pos = 0
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._last_string: Optional[str] = None
+        self._key: Optional[str] = None
+        self._expect_value = False
+        self._array_depth: Optional[int] = None
+        self._item_start: Optional[int] = None
+
+    @property
+    def text(self) -> str:
+        """Tudo o que foi recebido até agora"""
+        return self._text
+
+    def feed(self, fragment: str) -> List[Any]:
+        """Consome um fragmento e retorna os itens que fecharam nele"""
+        self._text += fragment
+        items = []
+        text = self._text
+        for i in range(self._pos, len(text)):
+            ch = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == '\\':
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    self._close_string(text[self._string_start:i + 1])
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                self._string_start = i
+            elif ch == ':' and len(self._stack) == 1:
+                self._key = self._last_string
+                self._expect_value = True
+            elif ch == ',' and len(self._stack) == 1:
+                self._expect_value = False
+            elif ch in '{[':
+                if ch == '[' and len(self._stack) == 1 and self._expect_value and self._key == self.array_key:
+                    self._array_depth = 2
+                elif ch == '{' and self._array_depth is not None and len(self._stack) == self._array_depth:
+                    self._item_start = i
+                self._stack.append(ch)
+                self._expect_value = False
+            elif ch in '}]':
+                if self._stack:
+                    self._stack.pop()
+                if ch == '}' and self._item_start is not None and len(self._stack) == self._array_depth:
+                    try:
+                        items.append(json.loads(text[self._item_start:i + 1]))
+                        self.items_emitted += 1
+                    except ValueError:
+                        pass
+                    self._item_start = None
+                elif ch == ']' and self._array_depth is not None and len(self._stack) == self._array_depth - 1:
+                    self._array_depth = None
+        self._pos = len(text)
+        return items
+
+    def _close_string(self, literal: str) -> None:
+        if len(self._stack) != 1:
+            return
+        try:
+            value = json.loads(literal)
+        except ValueError:
+            return
+        if self._expect_value and self._key is not None:
+            self.fields[self._key] = value
+            self._expect_value = False
+        else:
+            self._last_string = value
+
+@dataclass
+class StreamedCompletion:
+    """Resultado de uma resposta em stream, já remontada"""
+    content: str = ""
+    tool_calls: List[Dict[str, str]] = field(default_factory=list)  # [{'name', 'arguments'}]
+    fields: Dict[str, Any] = field(default_factory=dict)
+    items: int = 0
+    first_chunk_seconds: Optional[float] = None
+    total_seconds: float = 0.0
+
+def consume_stream(stream: Iterable[Any], tool_name: str, array_key: str,
+                   on_text: Optional[Callable[[str], None]] = None,
+                   on_item: Optional[Callable[[Any, Dict[str, Any]], None]] = None) -> StreamedCompletion:
+    """Consome os chunks de chat.completions.create(stream=True).
+
+    Cada pedaço de texto vai para `on_text` assim que chega; os argumentos
+    das tool calls `tool_name` passam por um JsonArrayStream e cada item de
+    `array_key` vai para `on_item(item, fields)` assim que seu objeto fecha.
+    """
+    start = time.perf_counter()
+    result = StreamedCompletion()
+    content: List[str] = []
+    calls: Dict[int, Dict[str, Any]] = {}
+
+    for chunk in stream:
+        if not chunk.choices:
+            continue
+        if result.first_chunk_seconds is None:
+            result.first_chunk_seconds = time.perf_counter() - start
+        delta = chunk.choices[0].delta
+        if delta.content:
+            content.append(delta.content)
+            if on_text:
+                on_text(delta.content)
+        for tool_call in delta.tool_calls or []:
+            call = calls.setdefault(tool_call.index, {'name': '', 'arguments': [], 'parser': None})
+            function = tool_call.function
+            if function is None:
+                continue
+            if function.name:
+                call['name'] = function.name
+                if function.name == tool_name:
+                    call['parser'] = JsonArrayStream(array_key)
+            if function.arguments:
+                call['arguments'].append(function.arguments)
+                if call['parser'] is not None:
+                    for item in call['parser'].feed(function.arguments):
+                        result.items += 1
+                        if on_item:
+                            on_item(item, call['parser'].fields)
+
+    result.content = ''.join(content)
+    for index in sorted(calls):
+        call = calls[index]
+        result.tool_calls.append({'name': call['name'], 'arguments': ''.join(call['arguments'])})
+        if call['parser'] is not None:
+            result.fields.update(call['parser'].fields)
+    result.total_seconds = time.perf_counter() - start
+    return result
@@ -0,0 +1,59 @@
+import math
+import warnings
+from array import array
+from typing import Optional
+
+# audioop processa PCM em C, mas foi removido no Python 3.13
+try:
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", DeprecationWarning)
+        import audioop  # type: ignore
+except ImportError:
+    audioop = None
+
+def frame_rms(data: bytes, sample_width: int = 2) -> float:
+    """Energia (RMS) de um bloco PCM 16-bit"""
+    if audioop is not None:
+        return float(audioop.rms(data, sample_width))
+    samples = array('h')
+    samples.frombytes(data[:len(data) - len(data) % 2])
+    if not samples:
+        return 0.0
+    return math.sqrt(sum(sample * sample for sample in samples) / len(samples))
+
+class Resampler:
+    """Converte PCM 16-bit mono de uma taxa para outra, bloco a bloco.
+
+    Mantém o estado entre os blocos, então a saída é a mesma de converter
+    a gravação inteira de uma vez.
+    """
+
+    def __init__(self, from_rate: int, to_rate: int):
+        self.from_rate = from_rate
+        self.to_rate = to_rate
+        self._state = None
+        self._position = 0.0
+        self._last: Optional[int] = None
+
+    def process(self, data: bytes) -> bytes:
+        if self.from_rate == self.to_rate or not data:
+            return data
+        if audioop is not None:
+            converted, self._state = audioop.ratecv(data, 2, 1, self.from_rate, self.to_rate, self._state)
+            return converted
+
+        # Interpolação linear; a posição é relativa à última amostra do bloco anterior
+        samples = array('h')
+        samples.frombytes(data[:len(data) - len(data) % 2])
+        window = ([self._last] if self._last is not None else []) + samples.tolist()
+        step = self.from_rate / self.to_rate
+        position = self._position
+        out = array('h')
+        while position < len(window) - 1:
+            index = int(position)
+            frac = position - index
+            out.append(int(window[index] + (window[index + 1] - window[index]) * frac))
+            position += step
+        self._position = position - (len(window) - 1)
+        self._last = window[-1]
+        return out.tobytes()
@@ -0,0 +1,217 @@
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+class _Stop:
+    """Sentinela: um estágio que a retorna encerra o pipeline (ex.: comando 'sair')"""
+
+    def __repr__(self) -> str:
+        return "STOP"
+
+STOP = _Stop()
+
+@dataclass
+class StageMetrics:
+    """Latência e vazão de um estágio do pipeline"""
+    name: str
+    count: int = 0
+    dropped: int = 0
+    errors: int = 0
+    busy_seconds: float = 0.0
+    max_seconds: float = 0.0
+    blocked_seconds: float = 0.0  # tempo esperando vaga na fila seguinte (back-pressure)
+
+    def record(self, seconds: float) -> None:
+        self.count += 1
+        self.busy_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+
+    @property
+    def mean_seconds(self) -> float:
+        return self.busy_seconds / self.count if self.count else 0.0
+
+    def report(self) -> str:
+        return (f"{self.name}: {self.count} itens, média {self.mean_seconds:.2f}s, máx {self.max_seconds:.2f}s, "
+                f"bloqueado {self.blocked_seconds:.2f}s, descartados {self.dropped}, erros {self.errors}")
+
+@dataclass
+class _Item:
+    seq: int
+    payload: Any
+    created: float
+    timings: List[Tuple[str, float]]
+
+class Pipeline:
+    """Executa estágios em threads separadas, ligados por filas limitadas.
+
+    `source` é chamada em loop e produz os itens (ex.: gravar uma fala);
+    cada estágio recebe o resultado do anterior. Há uma thread por estágio
+    e as filas são FIFO, então os itens saem na mesma ordem em que
+    entraram. Filas com `maxsize` itens geram back-pressure: um estágio
+    rápido espera quando o seguinte está atrasado, sem acumular memória.
+
+    Retornar None descarta o item; retornar STOP (da fonte ou de um
+    estágio) encerra o pipeline depois de concluir os itens anteriores.
+    Exceções são registradas e o item é descartado.
+    """
+
+    def __init__(self, source: Callable[[], Any], stages: Sequence[Tuple[str, Callable[[Any], Any]]],
+                 source_name: str = "fonte", maxsize: int = 2,
+                 on_complete: Optional[Callable[[int, List[Tuple[str, float]], float], None]] = None):
+        if not stages:
+            raise ValueError("O pipeline precisa de pelo menos um estágio")
+        self.source = source
+        self.stages = list(stages)
+        self.on_complete = on_complete
+        self.metrics = [StageMetrics(source_name)] + [StageMetrics(name) for name, _ in self.stages]
+        self.queues: List["queue.Queue[Any]"] = [queue.Queue(maxsize=maxsize) for _ in self.stages]
+        self.completed = 0
+        self.end_to_end_seconds = 0.0
+        self._stop = threading.Event()
+        self._stop_index = -1  # estágio que pediu a parada; os anteriores descartam o que restar
+        self._abort = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    @property
+    def stopped(self) -> bool:
+        return self._stop.is_set()
+
+    def _discarding(self, index: int) -> bool:
+        """True se o estágio `index` (-1 = fonte) deve parar sem entregar mais nada"""
+        return self._abort.is_set() or (self._stop.is_set() and index < self._stop_index)
+
+    def _put(self, index: int, item: Any, metrics: StageMetrics) -> bool:
+        """Entrega na fila do estágio `index`; espera enquanto cheia. False se desistiu."""
+        start = time.perf_counter()
+        try:
+            while True:
+                try:
+                    self.queues[index].put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    if self._discarding(index - 1):
+                        return False
+        finally:
+            metrics.blocked_seconds += time.perf_counter() - start
+
+    def _request_stop(self, index: int) -> None:
+        self._stop_index = index
+        self._stop.set()
+
+    def _run_source(self) -> None:
+        metrics = self.metrics[0]
+        seq = 0
+        while not self._stop.is_set():
+            start = time.perf_counter()
+            try:
+                payload = self.source()
+            except Exception as e:
+                metrics.errors += 1
+                print(f"❌ Erro em {metrics.name}: {e}")
+                continue
+            elapsed = time.perf_counter() - start
+            if self._stop.is_set():
+                # Capturado depois que um estágio pediu a parada: descartado
+                return
+            if payload is STOP:
+                self._request_stop(-1)
+                break
+            if payload is None:
+                metrics.dropped += 1
+                continue
+            metrics.record(elapsed)
+            seq += 1
+            if not self._put(0, _Item(seq, payload, time.perf_counter() - elapsed, [(metrics.name, elapsed)]), metrics):
+                return
+        self._put(0, STOP, metrics)
+
+    def _run_stage(self, index: int) -> None:
+        name, func = self.stages[index]
+        metrics = self.metrics[index + 1]
+        last = index == len(self.stages) - 1
+        while True:
+            if self._discarding(index):
+                return
+            try:
+                item = self.queues[index].get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if item is STOP:
+                if not last:
+                    self._put(index + 1, STOP, metrics)
+                return
+
+            start = time.perf_counter()
+            try:
+                result = func(item.payload)
+            except Exception as e:
+                metrics.errors += 1
+                print(f"❌ Erro em {name}: {e}")
+                continue
+            elapsed = time.perf_counter() - start
+            metrics.record(elapsed)
+            item.timings.append((name, elapsed))
+
+            if result is STOP:
+                # Itens anteriores seguem até o fim; os posteriores são descartados
+                self._request_stop(index)
+                if not last:
+                    self._put(index + 1, STOP, metrics)
+                return
+            if result is None:
+                metrics.dropped += 1
+                continue
+            if last:
+                total = time.perf_counter() - item.created
+                self.completed += 1
+                self.end_to_end_seconds += total
+                if self.on_complete:
+                    self.on_complete(item.seq, item.timings, total)
+                continue
+            item.payload = result
+            if not self._put(index + 1, item, metrics):
+                return
+
+    def start(self) -> None:
+        # A fonte normalmente bloqueia esperando o usuário: thread daemon, não é aguardada
+        source = threading.Thread(target=self._run_source, name="pipeline-source", daemon=True)
+        self._threads = [
+            threading.Thread(target=self._run_stage, args=(index,), name=f"pipeline-{name}", daemon=True)
+            for index, (name, _) in enumerate(self.stages)
+        ]
+        source.start()
+        for thread in self._threads:
+            thread.start()
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        """Espera os estágios terminarem; True se terminaram"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for thread in self._threads:
+            while thread.is_alive():
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                # Espera em fatias curtas para que Ctrl+C funcione na thread principal
+                thread.join(0.2 if remaining is None else min(0.2, remaining))
+        return True
+
+    def stop(self) -> None:
+        """Interrompe o pipeline sem esperar os itens em andamento"""
+        self._abort.set()
+        self._stop.set()
+
+    def run(self) -> None:
+        self.start()
+        try:
+            self.join()
+        except KeyboardInterrupt:
+            self.stop()
+            raise
+
+    def report(self) -> str:
+        lines = [metrics.report() for metrics in self.metrics]
+        if self.completed:
+            lines.append(f"ponta a ponta: {self.completed} itens, média {self.end_to_end_seconds / self.completed:.2f}s")
+        return "\n".join(lines)
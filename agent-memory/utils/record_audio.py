@@ -1,84 +1,178 @@
+import os
 import pyaudio
 import wave
-import sys
-import platform
-
-# Conditionally import msvcrt on Windows
-if platform.system() == "Windows":
-    import msvcrt
-
-def record_audio(filename="output.wav"):
+import threading
+from typing import BinaryIO, Iterator, Optional, Union
+from utils.audio_buffer import AudioRingBuffer
+from utils.audio_encoding import AudioEncoder, EncodedAudio
+from utils.vad import EnergyVAD
+
+CHUNK = 1024
+SAMPLE_FORMAT = pyaudio.paInt16
+SAMPLE_WIDTH = 2  # bytes por amostra em paInt16
+CHANNELS = 1
+RATE = 44100
+BUFFER_SECONDS = 5.0  # folga do buffer circular se o consumidor atrasar
+MIN_DURATION = 0.5  # Duração mínima em segundos
+
+class EnterListener:
+    """Escuta o Enter em uma única thread de fundo, bloqueada em input().
+
+    Evita o polling do teclado entre os blocos de áudio (funciona igual em
+    Windows, Linux e macOS) e, por ser uma só thread, uma gravação encerrada
+    pelo VAD não deixa para trás um input() pendente que roubaria o próximo
+    Enter.
     """
-    Grava áudio do microfone e salva em um arquivo WAV.
-    A gravação para quando o usuário pressiona Enter.
-    Retorna None se a gravação for muito curta.
+
+    def __init__(self):
+        self.pressed = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def _listen(self) -> None:
+        while True:
+            try:
+                input()
+            except EOFError:
+                self.pressed.set()
+                return
+            self.pressed.set()
+
+    def arm(self) -> threading.Event:
+        """Descarta Enters antigos e retorna o evento do próximo Enter"""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._listen, daemon=True)
+                self._thread.start()
+        # Sem stdin (EOF) a thread termina e o evento fica sinalizado
+        if self._thread.is_alive():
+            self.pressed.clear()
+        return self.pressed
+
+    def wait(self) -> None:
+        self.arm().wait()
+
+enter_listener = EnterListener()
+
+def stream_audio(stop_event: threading.Event, rate: int = RATE, chunk: int = CHUNK,
+                 buffer_seconds: float = BUFFER_SECONDS) -> Iterator[bytes]:
+    """Captura o microfone e gera blocos PCM de `chunk` amostras à medida que chegam.
+
+    O PyAudio grava em modo callback dentro de um buffer circular
+    pré-alocado; o gerador lê desse buffer, então a memória é constante
+    qualquer que seja a duração. A captura termina quando `stop_event` é
+    sinalizado (os blocos já capturados ainda são entregues) ou quando o
+    consumidor fecha o gerador.
     """
-    chunk = 1024
-    sample_format = pyaudio.paInt16
-    channels = 1
-    fs = 44100
-    min_duration = 0.5  # Duração mínima em segundos
+    block = chunk * SAMPLE_WIDTH * CHANNELS
+    ring = AudioRingBuffer(max(int(rate * buffer_seconds), chunk) * SAMPLE_WIDTH * CHANNELS)
 
-    p = pyaudio.PyAudio()
+    def callback(in_data, frame_count, time_info, status):
+        ring.write(in_data)
+        return (None, pyaudio.paContinue)
 
+    p = pyaudio.PyAudio()
+    stream = p.open(format=SAMPLE_FORMAT,
+                    channels=CHANNELS,
+                    rate=rate,
+                    frames_per_buffer=chunk,
+                    input=True,
+                    stream_callback=callback)
+    try:
+        while not stop_event.is_set():
+            data = ring.read(block, timeout=0.1)
+            if data:
+                yield data
+        stream.stop_stream()
+        ring.close()
+        while True:
+            data = ring.read(block)
+            if not data:
+                break
+            yield data
+    finally:
+        stream.close()
+        p.terminate()
+        ring.close()
+        if ring.dropped_bytes:
+            print(f"⚠️ {ring.dropped_bytes // SAMPLE_WIDTH} amostras descartadas (consumidor lento)")
+
+def _default_vad() -> Optional[EnergyVAD]:
+    if os.getenv("VAD_ENABLED", "1") == "0":
+        return None
+    return EnergyVAD(RATE, SAMPLE_WIDTH, trailing_silence_ms=int(os.getenv("VAD_SILENCE_MS", "800")))
+
+def _capture(vad: Optional[EnergyVAD]) -> Iterator[bytes]:
+    """Espera o Enter, grava e gera os blocos PCM (já sem silêncio, com VAD)"""
     print("Press Enter to start recording, press Enter again to stop...")
 
     # Wait for user to press Enter to start
-    input()
+    enter_listener.wait()
     print("🎤 Gravando...")
 
-    stream = p.open(format=sample_format,
-                    channels=channels,
-                    rate=fs,
-                    frames_per_buffer=chunk,
-                    input=True)
+    chunks = stream_audio(enter_listener.arm())
+    try:
+        yield from (vad.process(chunks) if vad else chunks)
+    finally:
+        chunks.close()
 
-    frames = []
-    start_time = None
+    print("🔴 Gravação finalizada.")
+    if vad:
+        print(f"🗣️ VAD: {vad.stats.report()}")
 
-    while True:
-        # Check for stop condition based on OS
-        if platform.system() == "Windows":
-            # Non-blocking key check for Windows
-            if msvcrt.kbhit() and msvcrt.getch() == b'\r':
-                break
-        else:
-            # Non-blocking key check for Unix-like systems (Linux, macOS)
-            import select
-            if select.select([sys.stdin], [], [], 0.01)[0]:
-                sys.stdin.readline()
-                break
+def record_audio(filename: Union[str, BinaryIO] = "output.wav",
+                 vad: Optional[EnergyVAD] = None) -> Optional[Union[str, BinaryIO]]:
+    """
+    Grava áudio do microfone e salva em um arquivo WAV.
+    A gravação para quando o usuário pressiona Enter ou, com VAD, depois de
+    VAD_SILENCE_MS de silêncio. Silêncio no início e no fim é cortado.
+    Retorna None se a fala for muito curta.
 
-        data = stream.read(chunk)
-        frames.append(data)
+    Os blocos são gravados no WAV conforme chegam (sem acumular a
+    gravação inteira em memória). `filename` também pode ser um objeto
+    de arquivo, como io.BytesIO. As estatísticas ficam em `vad.stats`.
+    """
+    vad = vad or _default_vad()
+    frames = 0
+    wf = wave.open(filename, 'wb')
+    try:
+        wf.setnchannels(CHANNELS)
+        wf.setsampwidth(SAMPLE_WIDTH)
+        wf.setframerate(RATE)
+        for data in _capture(vad):
+            wf.writeframes(data)
+            frames += len(data) // (SAMPLE_WIDTH * CHANNELS)
+    finally:
+        wf.close()
 
-        # Registra o tempo de início na primeira frame
-        if start_time is None:
-            import time
-            start_time = time.time()
+    # Verifica duração da gravação
+    duration = frames / RATE
+    if duration < MIN_DURATION:
+        print(f"⚠️ Gravação muito curta ({duration:.2f}s). Mínimo: {MIN_DURATION}s")
+        if isinstance(filename, str):
+            os.remove(filename)
+        return None
 
-    stream.stop_stream()
-    stream.close()
-    p.terminate()
+    return filename
 
-    print("🔴 Gravação finalizada.")
+def record_utterance(vad: Optional[EnergyVAD] = None,
+                     encoder: Optional[AudioEncoder] = None) -> Optional[EncodedAudio]:
+    """
+    Grava uma fala e devolve o áudio já reamostrado e codificado em memória,
+    pronto para upload (nenhum arquivo é escrito em disco).
+    Retorna None se a fala for muito curta.
+    """
+    vad = vad or _default_vad()
+    encoder = encoder or AudioEncoder.from_env()
 
-    # Verifica duração da gravação
-    if start_time is not None:
-        import time
-        duration = time.time() - start_time
-        if duration < min_duration:
-            print(f"⚠️ Gravação muito curta ({duration:.2f}s). Mínimo: {min_duration}s")
-            return None
+    audio = encoder.encode(_capture(vad), RATE)
+    print(f"📦 Áudio: {audio.report()}")
 
-    wf = wave.open(filename, 'wb')
-    wf.setnchannels(channels)
-    wf.setsampwidth(p.get_sample_size(sample_format))
-    wf.setframerate(fs)
-    wf.writeframes(b''.join(frames))
-    wf.close()
+    if audio.duration_seconds < MIN_DURATION:
+        print(f"⚠️ Gravação muito curta ({audio.duration_seconds:.2f}s). Mínimo: {MIN_DURATION}s")
+        return None
 
-    return filename
+    return audio
 
 if __name__ == '__main__':
     record_audio()
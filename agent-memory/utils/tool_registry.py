@@ -0,0 +1,90 @@
+import hashlib
+import json
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+from utils.basemodel2tool import base_model2tool
+
+
+@dataclass(frozen=True)
+class CompiledTool:
+    """Schema OpenAI de um modelo de ferramenta, compilado uma única vez"""
+    name: str
+    version: str
+    schema: Dict[str, Any]
+    json: str
+    compile_seconds: float
+
+
+def model_version(model: type[BaseModel]) -> str:
+    """Versão do modelo: o atributo TOOL_VERSION, se houver, senão uma impressão dos campos"""
+    explicit = getattr(model, "TOOL_VERSION", None)
+    if explicit is not None:
+        return str(explicit)
+    fingerprint = repr([
+        (name, repr(field.annotation), field.description, field.is_required())
+        for name, field in model.model_fields.items()
+    ]) + (model.__doc__ or "")
+    return hashlib.sha1(fingerprint.encode("utf-8")).hexdigest()[:12]
+
+
+class ToolRegistry:
+    """Compila cada modelo Pydantic de ferramenta uma vez e reutiliza o schema.
+
+    A chave do cache é (classe, TOOL_VERSION, strict): modelos sem versão explícita
+    são compilados uma única vez por processo; com `TOOL_VERSION:
+    ClassVar[str]` declarado, um novo valor força a recompilação. O schema
+    devolvido é compartilhado entre as requisições e não deve ser
+    modificado; `json` traz o mesmo schema já serializado.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cache: Dict[Tuple[type, Optional[str], bool], CompiledTool] = {}
+
+    def compile(self, model: type[BaseModel], strict: bool = False) -> CompiledTool:
+        key = (model, getattr(model, "TOOL_VERSION", None), strict)
+        compiled = self._cache.get(key)
+        if compiled is not None:
+            return compiled
+        with self._lock:
+            compiled = self._cache.get(key)
+            if compiled is None:
+                start = time.perf_counter()
+                schema = base_model2tool(model, strict)
+                compiled = CompiledTool(
+                    name=schema["function"]["name"],
+                    version=model_version(model),
+                    schema=schema,
+                    json=json.dumps(schema, ensure_ascii=False, separators=(",", ":")),
+                    compile_seconds=time.perf_counter() - start
+                )
+                self._cache[key] = compiled
+        return compiled
+
+    def schema(self, model: type[BaseModel], strict: bool = False) -> Dict[str, Any]:
+        """Schema no formato de tools da OpenAI"""
+        return self.compile(model, strict).schema
+
+    def json(self, model: type[BaseModel], strict: bool = False) -> str:
+        """Schema já serializado (compacto)"""
+        return self.compile(model, strict).json
+
+    def tools(self, *models: type[BaseModel], strict: bool = False) -> List[Dict[str, Any]]:
+        """Lista pronta para o parâmetro tools de chat.completions.create"""
+        return [self.compile(model, strict).schema for model in models]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+
+# Registro compartilhado pelo processo
+registry = ToolRegistry()
@@ -0,0 +1,33 @@
+import os
+import time
+from typing import Any, Optional
+from utils.audio_encoding import EncodedAudio
+
+def transcribe(client: Any, audio: EncodedAudio, model: str = "whisper-1", language: str = "pt",
+               use_tempfile: Optional[bool] = None) -> str:
+    """Envia o áudio para transcrição e retorna o texto.
+
+    Por padrão o upload sai direto da memória, sem tocar no disco. Com
+    AUDIO_TEMPFILE=1 (ou use_tempfile=True) o áudio passa por um arquivo
+    temporário de nome único, removido logo após o envio. Erros da API
+    são propagados para quem chamou.
+    """
+    if use_tempfile is None:
+        use_tempfile = os.getenv("AUDIO_TEMPFILE", "0") == "1"
+
+    start = time.perf_counter()
+    if use_tempfile:
+        with audio.temporary_file() as audio_file:
+            transcription = client.audio.transcriptions.create(model=model, file=audio_file, language=language)
+    else:
+        transcription = client.audio.transcriptions.create(model=model, file=audio.as_upload(), language=language)
+    print(f"📝 Transcrição: {audio.bytes_on_wire / 1024:.1f} KB em {time.perf_counter() - start:.2f}s")
+    return transcription.text
+
+async def transcribe_async(client: Any, audio: EncodedAudio, model: str = "whisper-1",
+                           language: str = "pt") -> str:
+    """Versão de transcribe para o cliente assíncrono (AsyncOpenAI), sempre da memória"""
+    start = time.perf_counter()
+    transcription = await client.audio.transcriptions.create(model=model, file=audio.as_upload(), language=language)
+    print(f"📝 Transcrição: {audio.bytes_on_wire / 1024:.1f} KB em {time.perf_counter() - start:.2f}s")
+    return transcription.text
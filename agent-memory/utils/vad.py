@@ -0,0 +1,146 @@
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Iterable, Iterator, List, Optional, Tuple
+from utils.pcm import frame_rms
+
+@dataclass
+class UtteranceStats:
+    """Estatísticas de fala/silêncio de uma gravação"""
+    captured_seconds: float = 0.0
+    voiced_seconds: float = 0.0
+    kept_seconds: float = 0.0
+    leading_trimmed_seconds: float = 0.0
+    trailing_trimmed_seconds: float = 0.0
+    threshold: float = 0.0
+    ended_by: str = 'manual'  # 'silence', 'no_speech', 'max_duration' ou 'manual'
+
+    @property
+    def trimmed_seconds(self) -> float:
+        return self.leading_trimmed_seconds + self.trailing_trimmed_seconds
+
+    def report(self) -> str:
+        return (f"fala {self.voiced_seconds:.1f}s, enviado {self.kept_seconds:.1f}s de "
+                f"{self.captured_seconds:.1f}s, silêncio cortado {self.trimmed_seconds:.1f}s "
+                f"(início {self.leading_trimmed_seconds:.1f}s, fim {self.trailing_trimmed_seconds:.1f}s), "
+                f"fim por {self.ended_by}")
+
+class EnergyVAD:
+    """Detector de atividade de voz por energia.
+
+    Consome os blocos PCM da captura e devolve apenas o trecho com fala:
+    o silêncio inicial é descartado (exceto `pre_roll_ms` antes da primeira
+    fala, para não cortar o começo das palavras) e o final também. A
+    gravação termina sozinha depois de `trailing_silence_ms` de silêncio.
+
+    O limiar é `threshold` ou, se None, calculado a partir do ruído de fundo
+    nos primeiros `calibration_ms` (o bloco mais quieto vezes `noise_ratio`).
+    """
+
+    def __init__(self, rate: int, sample_width: int = 2, threshold: Optional[float] = None,
+                 trailing_silence_ms: int = 800, pre_roll_ms: int = 200,
+                 max_leading_silence_ms: Optional[int] = 10000, max_seconds: Optional[float] = None,
+                 calibration_ms: int = 300, noise_ratio: float = 3.0, min_threshold: float = 300.0):
+        self.rate = rate
+        self.sample_width = sample_width
+        self.threshold = threshold
+        self.trailing_silence_ms = trailing_silence_ms
+        self.pre_roll_ms = pre_roll_ms
+        self.max_leading_silence_ms = max_leading_silence_ms
+        self.max_seconds = max_seconds
+        self.calibration_ms = calibration_ms
+        self.noise_ratio = noise_ratio
+        self.min_threshold = min_threshold
+        self.stats = UtteranceStats()
+
+    def _seconds(self, data: bytes) -> float:
+        return len(data) / (self.rate * self.sample_width)
+
+    def process(self, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        """Gera os blocos com fala; retorna quando a fala termina ou a captura acaba"""
+        stats = self.stats = UtteranceStats()
+        threshold = self.threshold
+        calibration: List[Tuple[bytes, float]] = []
+        pre_roll: Deque[bytes] = deque()
+        pending: List[bytes] = []
+        state = {'speaking': False, 'pre_roll': 0.0, 'pending': 0.0}
+
+        def classify(chunk: bytes, level: float) -> Tuple[List[bytes], bool]:
+            """Retorna os blocos a entregar e se a gravação deve terminar"""
+            seconds = self._seconds(chunk)
+            voiced = level >= stats.threshold
+            if voiced:
+                stats.voiced_seconds += seconds
+
+            if not state['speaking']:
+                if voiced:
+                    state['speaking'] = True
+                    out = list(pre_roll) + [chunk]
+                    pre_roll.clear()
+                    return out, False
+                pre_roll.append(chunk)
+                state['pre_roll'] += seconds
+                while pre_roll and state['pre_roll'] - self._seconds(pre_roll[0]) >= self.pre_roll_ms / 1000:
+                    dropped = self._seconds(pre_roll.popleft())
+                    state['pre_roll'] -= dropped
+                    stats.leading_trimmed_seconds += dropped
+                if (self.max_leading_silence_ms is not None
+                        and stats.captured_seconds * 1000 >= self.max_leading_silence_ms):
+                    stats.ended_by = 'no_speech'
+                    return [], True
+                return [], False
+
+            if voiced:
+                out = pending + [chunk]
+                pending.clear()
+                state['pending'] = 0.0
+                return out, False
+            pending.append(chunk)
+            state['pending'] += seconds
+            if state['pending'] * 1000 >= self.trailing_silence_ms:
+                stats.ended_by = 'silence'
+                return [], True
+            return [], False
+
+        def deliver(out: List[bytes]) -> List[bytes]:
+            stats.kept_seconds += sum(self._seconds(chunk) for chunk in out)
+            return out
+
+        stop = False
+        for chunk in chunks:
+            stats.captured_seconds += self._seconds(chunk)
+            level = frame_rms(chunk, self.sample_width)
+
+            if threshold is None:
+                calibration.append((chunk, level))
+                if sum(self._seconds(c) for c, _ in calibration) * 1000 < self.calibration_ms:
+                    continue
+                threshold = max(self.min_threshold, min(lvl for _, lvl in calibration) * self.noise_ratio)
+                batch, calibration = calibration, []
+            else:
+                batch = [(chunk, level)]
+            stats.threshold = threshold
+
+            for item, item_level in batch:
+                out, stop = classify(item, item_level)
+                yield from deliver(out)
+                if stop:
+                    break
+            if not stop and self.max_seconds is not None and stats.captured_seconds >= self.max_seconds:
+                stats.ended_by = 'max_duration'
+                stop = True
+            if stop:
+                break
+
+        # Captura terminou antes do fim da calibração: usa o limiar do trecho disponível
+        if calibration:
+            stats.threshold = max(self.min_threshold, min(lvl for _, lvl in calibration) * self.noise_ratio)
+            for item, item_level in calibration:
+                out, stop = classify(item, item_level)
+                yield from deliver(out)
+                if stop:
+                    break
+
+        # Silêncio que sobrou no buffer não é enviado
+        stats.trailing_trimmed_seconds += state['pending']
+        if not state['speaking']:
+            stats.leading_trimmed_seconds += state['pre_roll']
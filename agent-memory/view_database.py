@@ -8,6 +8,7 @@ from mysql.connector import Error
 import json
 from datetime import datetime
 from typing import List, Dict, Any, cast
+from database.common import to_display_date
 
 def view_database(host="localhost", user="root", password="", database="agent_memory"):
     """Visualiza todos os dados do banco de dados"""
@@ -181,7 +182,8 @@ def export_to_json(host="localhost", user="root", password="", database="agent_m
             event_data = cast(Any, event)
             data['events'].append({
                 'id': event_data[0],
-                'date': event_data[1],
+                # Depois da migração 2 a coluna é DATE: vira DD/MM/YYYY como na aplicação
+                'date': to_display_date(event_data[1]),
                 'title': event_data[2],
                 'description': event_data[3],
                 'category': event_data[4],
@@ -247,7 +249,32 @@ def export_to_json(host="localhost", user="root", password="", database="agent_m
     except Error as e:
         print(f"❌ Erro ao exportar dados: {e}")
 
+def search_database(query: str, limit: int = 10, offset: int = 0):
+    """Busca eventos e interações por palavras-chave (índices FULLTEXT)"""
+    from database.database_mysql import DatabaseManager
+    from database.mysql_pool import get_default_provider
+
+    db = DatabaseManager(provider=get_default_provider())
+    results = db.search(query, limit=limit, offset=offset)
+
+    print(f"🔎 RESULTADOS PARA \"{query}\" ({len(results)}):")
+    print("-" * 30)
+    for item in results:
+        if item['kind'] == 'event':
+            print(f"📅 [{item['score']}] {item['date']} {item['time'] or ''} - {item['title']}: {item['description']}")
+        else:
+            print(f"💬 [{item['score']}] {item['timestamp']} - Você: {item['human_message']}")
+    if not results:
+        print("❌ Nada encontrado")
+
 if __name__ == "__main__":
+    import sys
+
+    # python view_database.py buscar <palavras>
+    if len(sys.argv) > 2 and sys.argv[1] == "buscar":
+        search_database(" ".join(sys.argv[2:]))
+        sys.exit(0)
+
     print("🔍 VISUALIZADOR DO BANCO DE DADOS MySQL")
     print("=" * 50)
 